@@ -4,4 +4,6 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
-    
\ No newline at end of file
+
+    def ready(self):
+        import core.signals
@@ -0,0 +1,127 @@
+import io
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+
+class FaceEncodingBusy(Exception):
+    """Raised when the encoding pool is saturated or too slow to answer"""
+
+
+def _encode_image_bytes(image_bytes, max_side):
+    # Runs inside a pool worker, so the dlib work never blocks a web worker
+    import face_recognition
+    import numpy as np
+    from PIL import Image
+
+    timings = {}
+    started = time.perf_counter()
+    image = Image.open(io.BytesIO(image_bytes))
+    # Lets JPEGs decode at a reduced scale instead of full resolution
+    image.draft('RGB', (max_side, max_side))
+    image = image.convert('RGB')
+    if max(image.size) > max_side:
+        # Detection cost grows with pixel count; faces stay well above HOG's minimum size
+        image.thumbnail((max_side, max_side))
+    pixels = np.asarray(image)
+    timings['decode'] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    locations = face_recognition.face_locations(pixels)
+    timings['detect'] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    encodings = face_recognition.face_encodings(pixels, known_face_locations=locations)
+    timings['encode'] = (time.perf_counter() - started) * 1000
+
+    return encodings, timings
+
+
+def with_server_timing(response, timings):
+    """Expose per-stage durations (ms) in a Server-Timing header"""
+    response['Server-Timing'] = ', '.join(
+        f'{stage};dur={duration:.1f}' for stage, duration in timings.items()
+    )
+    return response
+
+
+class FaceEncodingService:
+    """Process pool that runs face detection and encoding off the request thread.
+
+    At most max_pending jobs are queued or running at once, including jobs
+    whose request already timed out; further submissions fail fast with
+    FaceEncodingBusy so the view can answer 503 instead of piling up
+    requests behind CPU-bound work.
+    """
+
+    def __init__(self, workers, max_pending, timeout, max_image_side):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_image_side = max_image_side
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def encode(self, image_bytes):
+        """Return (encodings, stage timings in ms) for an encoded image in memory"""
+        if not self._slots.acquire(blocking=False):
+            raise FaceEncodingBusy('Face recognition is busy, please try again')
+        try:
+            future = self._get_executor().submit(_encode_image_bytes, image_bytes, self.max_image_side)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._reset_executor()
+            raise FaceEncodingBusy('Face recognition worker crashed, please try again')
+        except BaseException:
+            self._slots.release()
+            raise
+        # A running job can't be cancelled, so its slot is only freed once it really finishes
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise FaceEncodingBusy('Face recognition timed out, please try again')
+        except BrokenProcessPool:
+            self._reset_executor()
+            raise FaceEncodingBusy('Face recognition worker crashed, please try again')
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: forking a threaded WSGI worker can deadlock the child
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            return self._executor
+
+    def _reset_executor(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_face_encoding_service():
+    """Process-wide FaceEncodingService configured from settings"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = FaceEncodingService(
+                workers=settings.FACE_ENCODING_WORKERS,
+                max_pending=settings.FACE_ENCODING_MAX_PENDING,
+                timeout=settings.FACE_ENCODING_TIMEOUT,
+                max_image_side=settings.FACE_IMAGE_MAX_SIDE,
+            )
+    return _service
@@ -0,0 +1,173 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Same tolerance face_recognition.compare_faces uses by default
+FACE_MATCH_TOLERANCE = 0.6
+ENCODING_SIZE = 128
+
+
+class FaceIndex:
+    """All registered face encodings as one contiguous float32 matrix.
+
+    The matrix and the matching user ids are persisted as .npy sidecar files
+    and memory-mapped on load, so a worker can start answering 1:N lookups
+    without reading every user's encoding from the database. Registrations append to the
+    index in place; other processes pick the change up from the sidecar's
+    modification time. Writers hold an exclusive lock on a lock file next to
+    the sidecar and re-read it first, so concurrent workers never drop each
+    other's rows.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or settings.FACE_INDEX_DIR
+        self.encodings_path = os.path.join(self.directory, 'encodings.npy')
+        self.user_ids_path = os.path.join(self.directory, 'user_ids.npy')
+        self.lock_path = os.path.join(self.directory, 'index.lock')
+        self._lock = threading.RLock()
+        self._encodings = np.empty((0, ENCODING_SIZE), dtype=np.float32)
+        self._user_ids = np.empty(0, dtype=np.int64)
+        self._loaded_mtime = None
+
+    def __len__(self):
+        self._ensure_fresh()
+        return len(self._user_ids)
+
+    def identify(self, encoding, k=5):
+        """Return up to k (user_id, distance) pairs, closest first"""
+        self._ensure_fresh()
+        encodings, user_ids = self._encodings, self._user_ids
+        if not len(user_ids):
+            return []
+
+        query = np.asarray(encoding, dtype=np.float32)
+        distances = np.linalg.norm(encodings - query, axis=1)
+
+        k = min(k, len(distances))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return [(int(user_ids[i]), float(distances[i])) for i in nearest]
+
+    def add(self, user_id, encoding):
+        """Insert or replace one user's encoding and persist the sidecar"""
+        row = np.asarray(encoding, dtype=np.float32).reshape(1, ENCODING_SIZE)
+        with self._write_lock():
+            encodings, user_ids = self._read()
+
+            existing = np.flatnonzero(user_ids == user_id)
+            if len(existing):
+                encodings[existing[0]] = row
+            else:
+                encodings = np.concatenate([encodings, row])
+                user_ids = np.append(user_ids, np.int64(user_id))
+
+            self._save(encodings, user_ids)
+
+    def remove(self, user_id):
+        """Drop one user's encoding, if indexed, and persist the sidecar"""
+        with self._write_lock():
+            encodings, user_ids = self._read()
+            keep = user_ids != user_id
+            if not keep.all():
+                self._save(encodings[keep], user_ids[keep])
+
+    def rebuild(self):
+        """Reload every stored encoding from the database and rewrite the sidecar"""
+        with self._write_lock():
+            encodings, user_ids = self._from_database()
+            self._save(encodings, user_ids)
+        return len(user_ids)
+
+    @contextmanager
+    def _write_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, open(self.lock_path, 'a+b') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _read(self):
+        """Writable copies of the sidecar arrays as currently on disk (from the database if there is none)"""
+        try:
+            return np.load(self.encodings_path), np.load(self.user_ids_path)
+        except FileNotFoundError:
+            return self._from_database()
+
+    def _from_database(self):
+        from .models import User
+
+        rows = User.objects.exclude(face_encoding__isnull=True).exclude(face_encoding=b'')
+        user_ids = []
+        encodings = []
+        for user_id, face_encoding in rows.values_list('id', 'face_encoding').iterator(chunk_size=2000):
+            face_encoding = bytes(face_encoding)
+            # Anything but 128 float32 values can't be compared, so leave it out
+            if len(face_encoding) != ENCODING_SIZE * 4:
+                continue
+            user_ids.append(user_id)
+            encodings.append(face_encoding)
+        return (
+            np.frombuffer(b''.join(encodings), dtype=np.float32).reshape(-1, ENCODING_SIZE).copy(),
+            np.asarray(user_ids, dtype=np.int64),
+        )
+
+    def _ensure_fresh(self):
+        try:
+            mtime = os.stat(self.encodings_path).st_mtime_ns
+        except FileNotFoundError:
+            if self._loaded_mtime is None:
+                self.rebuild()
+            return
+
+        if mtime != self._loaded_mtime:
+            encodings = np.load(self.encodings_path, mmap_mode='r')
+            user_ids = np.load(self.user_ids_path, mmap_mode='r')
+            # A writer replaces the ids first; keep the old pair until both files agree
+            if len(encodings) == len(user_ids):
+                self._encodings, self._user_ids = encodings, user_ids
+                self._loaded_mtime = mtime
+
+    def _save(self, encodings, user_ids):
+        os.makedirs(self.directory, exist_ok=True)
+        # Ids first: readers key off the encodings file's mtime
+        for path, array in ((self.user_ids_path, user_ids), (self.encodings_path, encodings)):
+            temp_path = f'{path}.{os.getpid()}.tmp'
+            with open(temp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(temp_path, path)
+
+        self._encodings = encodings
+        self._user_ids = user_ids
+        self._loaded_mtime = os.stat(self.encodings_path).st_mtime_ns
+
+
+_face_index = None
+_face_index_lock = threading.Lock()
+
+
+def get_face_index():
+    """Process-wide FaceIndex, created on first use"""
+    global _face_index
+    with _face_index_lock:
+        if _face_index is None:
+            _face_index = FaceIndex()
+    return _face_index
@@ -0,0 +1,54 @@
+import json
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Compare load and compare time of JSON text vs binary float32 face encodings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000, help='Number of stored encodings')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        encodings = rng.normal(0, 0.1, size=(options['users'], 128))
+        probe = encodings[rng.integers(len(encodings))]
+
+        # What each format looks like as it comes back from the database
+        json_rows = [json.dumps(encoding.tolist()) for encoding in encodings]
+        binary_rows = [encoding.astype(np.float32).tobytes() for encoding in encodings]
+
+        started = time.perf_counter()
+        json_matrix = np.array([json.loads(row) for row in json_rows])
+        json_load = time.perf_counter() - started
+
+        started = time.perf_counter()
+        binary_matrix = np.frombuffer(b''.join(binary_rows), dtype=np.float32).reshape(-1, 128)
+        binary_load = time.perf_counter() - started
+
+        started = time.perf_counter()
+        json_best = int(np.argmin(np.linalg.norm(json_matrix - probe, axis=1)))
+        json_compare = time.perf_counter() - started
+
+        started = time.perf_counter()
+        binary_best = int(np.argmin(np.linalg.norm(binary_matrix - probe.astype(np.float32), axis=1)))
+        binary_compare = time.perf_counter() - started
+
+        json_size = sum(len(row) for row in json_rows)
+        binary_size = sum(len(row) for row in binary_rows)
+
+        self.stdout.write(f"Users: {options['users']}")
+        self.stdout.write(f"{'format':<8}{'bytes/user':>12}{'load ms':>12}{'compare ms':>12}")
+        self.stdout.write(
+            f"{'json':<8}{json_size / len(json_rows):>12.0f}{json_load * 1000:>12.1f}{json_compare * 1000:>12.1f}"
+        )
+        self.stdout.write(
+            f"{'binary':<8}{binary_size / len(binary_rows):>12.0f}{binary_load * 1000:>12.1f}{binary_compare * 1000:>12.1f}"
+        )
+        if json_best != binary_best:
+            self.stdout.write(self.style.WARNING('Formats disagree on the closest match'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Binary load is {json_load / binary_load:.0f}x faster'))
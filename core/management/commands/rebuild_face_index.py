@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.face_index import get_face_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the face identification index from the stored user face encodings'
+
+    def handle(self, *args, **kwargs):
+        count = get_face_index().rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} face encodings"))
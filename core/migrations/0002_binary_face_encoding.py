@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+from django.db import migrations, models
+
+
+def json_to_binary(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    users = User.objects.exclude(face_encoding__isnull=True).exclude(face_encoding='')
+    for user in users.only('id', 'face_encoding').iterator(chunk_size=1000):
+        user.face_encoding_binary = np.asarray(json.loads(user.face_encoding), dtype=np.float32).tobytes()
+        user.save(update_fields=['face_encoding_binary'])
+
+
+def binary_to_json(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    users = User.objects.exclude(face_encoding_binary__isnull=True)
+    for user in users.only('id', 'face_encoding_binary').iterator(chunk_size=1000):
+        encoding = np.frombuffer(user.face_encoding_binary, dtype=np.float32)
+        user.face_encoding = json.dumps(encoding.astype(float).tolist())
+        user.save(update_fields=['face_encoding'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='face_encoding_binary',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(json_to_binary, binary_to_json),
+        migrations.RemoveField(
+            model_name='user',
+            name='face_encoding',
+        ),
+        migrations.RenameField(
+            model_name='user',
+            old_name='face_encoding_binary',
+            new_name='face_encoding',
+        ),
+    ]
@@ -1,3 +1,4 @@
+import numpy as np
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
@@ -12,8 +13,19 @@ class User(AbstractUser):
 
     email = models.EmailField(unique=True)
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
-    face_encoding = models.TextField(null=True, blank=True)
+    # 128 float32 values (512 bytes), see face_encoding_array / set_face_encoding
+    face_encoding = models.BinaryField(null=True, blank=True)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='joueur')
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username'] 
+
+    @property
+    def face_encoding_array(self):
+        """Stored face encoding as a read-only float32 view over the raw bytes"""
+        if not self.face_encoding:
+            return None
+        return np.frombuffer(self.face_encoding, dtype=np.float32)
+
+    def set_face_encoding(self, encoding):
+        self.face_encoding = np.asarray(encoding, dtype=np.float32).tobytes()
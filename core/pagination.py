@@ -0,0 +1,197 @@
+import base64
+import json
+from datetime import datetime, time
+from functools import reduce
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DataError
+from django.db.models import Q
+from django.http import JsonResponse
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed ?limit=, ?cursor= or ?fields= parameter"""
+
+
+def is_paginated(request):
+    """Paging is opt-in so existing clients keep receiving full listings"""
+    return 'limit' in request.GET or 'cursor' in request.GET
+
+
+def get_limit(request):
+    raw = request.GET.get('limit')
+    if raw in (None, ''):
+        return settings.API_PAGE_SIZE
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be positive')
+    return min(limit, settings.API_MAX_PAGE_SIZE)
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder drops microseconds, which would skip rows on a page boundary
+    def default(self, o):
+        if isinstance(o, (datetime, time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(position):
+    payload = json.dumps(position, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, UnicodeDecodeError):
+        raise PaginationError('Invalid cursor')
+
+
+def select_fields(request, available):
+    """Names from ?fields=a,b in the order given, or every available field"""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(available)
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise PaginationError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def project(rows, fields):
+    return [{name: row[name] for name in fields if name in row} for row in rows]
+
+
+# Integers beyond a BIGINT pass filter() and only fail once the database sees them
+_MAX_CURSOR_INTEGER = 2 ** 63 - 1
+
+
+def _is_cursor_value(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return -_MAX_CURSOR_INTEGER - 1 <= value <= _MAX_CURSOR_INTEGER
+    return value is None or isinstance(value, (str, float, bool))
+
+
+def _value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def keyset_filter(ordering, position):
+    """Q matching rows strictly after position in ordering.
+
+    ordering is a sequence of field names, '-' prefixed for descending, whose
+    last entry must be unique (normally the primary key). For (a, -b, id) this
+    builds a > x | (a = x & b < y) | (a = x & b = y & id > z), which the
+    database can answer from an index on the same columns.
+    """
+    if not isinstance(position, list) or len(position) != len(ordering):
+        raise PaginationError('Invalid cursor')
+    if not all(_is_cursor_value(value) for value in position):
+        raise PaginationError('Invalid cursor')
+
+    clauses = []
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        equal = {ordering[j].lstrip('-'): position[j] for j in range(i)}
+        clauses.append(Q(**equal, **{f'{name}__{lookup}': position[i]}))
+    return reduce(lambda a, b: a | b, clauses)
+
+
+def after_position(queryset, ordering, position):
+    """Filter queryset to rows after position, rejecting malformed cursors"""
+    where = keyset_filter(ordering, position)
+    try:
+        return queryset.filter(where)
+    except (TypeError, ValueError, ValidationError):
+        raise PaginationError('Invalid cursor')
+
+
+def keyset_page(queryset, ordering, limit, position=None):
+    """Return (rows, last position or None when this is the final page)"""
+    queryset = queryset.order_by(*ordering)
+    if position is not None:
+        queryset = after_position(queryset, ordering, position)
+    return fetch_page(queryset, ordering, limit, position)
+
+
+def fetch_page(queryset, ordering, limit, position=None):
+    """Evaluate an ordered, already filtered queryset as one page.
+
+    Returns (rows, last position or None when this is the final page). A
+    cursor value the database itself rejects is reported as PaginationError.
+    """
+    try:
+        # One extra row tells us whether another page exists without a COUNT
+        rows = list(queryset[:limit + 1])
+    except (TypeError, ValueError, OverflowError, ValidationError, DataError):
+        if position is None:
+            raise
+        raise PaginationError('Invalid cursor')
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, row_position(rows[-1], ordering)
+
+
+def row_position(row, ordering):
+    return [_value(row, field.lstrip('-')) for field in ordering]
+
+
+def values_page(request, queryset, available, ordering):
+    """Project a queryset to ?fields= and, if requested, page it by keyset.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page and
+    whenever the client did not ask for paging. available must include
+    every field named in ordering.
+    """
+    fields = select_fields(request, available)
+    keys = [field.lstrip('-') for field in ordering]
+    queryset = queryset.values(*dict.fromkeys(fields + keys))
+
+    if not is_paginated(request):
+        return project(queryset.order_by(*ordering), fields), None
+
+    rows, position = keyset_page(
+        queryset, ordering, get_limit(request), decode_cursor(request.GET.get('cursor'))
+    )
+    return project(rows, fields), encode_cursor(position) if position else None
+
+
+def list_response(request, rows, next_cursor):
+    """Plain JSON array, or a results/next_cursor envelope when paging"""
+    if is_paginated(request):
+        return JsonResponse({'results': rows, 'next_cursor': next_cursor})
+    return JsonResponse(rows, safe=False)
+
+
+class KeysetPagination(BasePagination):
+    """DRF pagination using the same ?limit=&cursor= contract as values_page.
+
+    The view declares keyset_ordering; without limit or cursor in the query
+    string the listing is returned unpaginated, as before.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not is_paginated(request):
+            return None
+        rows, position = keyset_page(
+            queryset, view.keyset_ordering, get_limit(request), decode_cursor(request.query_params.get('cursor'))
+        )
+        self.next_cursor = encode_cursor(position) if position else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({'results': data, 'next_cursor': self.next_cursor})
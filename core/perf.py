@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets; the last bucket is open-ended
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Fixed-bucket histogram: constant memory however many samples it sees"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of samples (the max for the last one)"""
+        target = fraction * sum(self.counts)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+        return 0
+
+    def summary(self, samples):
+        return {
+            'avg': round(self.total / samples, 2) if samples else 0,
+            'p50': self.percentile(0.50),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'max': round(self.max, 2),
+        }
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.over_budget = 0
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_ms = Histogram(MS_BUCKETS)
+        self.wall_ms = Histogram(MS_BUCKETS)
+
+    def add(self, queries, db_ms, wall_ms, over_budget):
+        self.requests += 1
+        self.over_budget += bool(over_budget)
+        self.queries.add(queries)
+        self.db_ms.add(db_ms)
+        self.wall_ms.add(wall_ms)
+
+    def summary(self):
+        return {
+            'requests': self.requests,
+            'over_budget': self.over_budget,
+            'queries': self.queries.summary(self.requests),
+            'db_ms': self.db_ms.summary(self.requests),
+            'wall_ms': self.wall_ms.summary(self.requests),
+        }
+
+
+class PerfStats:
+    """Per-process request statistics keyed by URL name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            self.since = timezone.now()
+
+    def add(self, endpoint, queries, db_ms, wall_ms, over_budget=()):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.add(queries, db_ms, wall_ms, over_budget)
+
+    def report(self):
+        """Summaries of every endpoint, the most total wall time first"""
+        with self._lock:
+            ranked = sorted(self._endpoints.items(), key=lambda item: item[1].wall_ms.total, reverse=True)
+            return [{'endpoint': endpoint, **stats.summary()} for endpoint, stats in ranked]
+
+
+perf_stats = PerfStats()
+
+
+def get_budget(endpoint):
+    """{'queries', 'db_ms', 'wall_ms'} limits for an endpoint, with its overrides applied"""
+    return {**settings.PERF_BUDGET, **settings.PERF_ENDPOINT_BUDGETS.get(endpoint, {})}
+
+
+class QueryRecorder:
+    """Database execute wrapper counting queries and the time spent in them.
+
+    Views that fan out to worker threads install the same recorder there (see
+    record_queries), so the counters are updated under a lock and database
+    time is summed across threads.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.queries += 1
+                self.db_seconds += elapsed
+
+
+@contextmanager
+def record_queries(recorder):
+    """Send the queries this thread runs, on every database, to recorder"""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+class PerfBudgetMiddleware:
+    """Record query count, database time and wall time of every request, keyed by URL name.
+
+    Requests over budget (PERF_BUDGET, overridden per URL name by
+    PERF_ENDPOINT_BUDGETS) are logged as warnings. For streaming responses
+    only the work done before the first byte is measured. The recorder is
+    left on request.perf_recorder for views that query from other threads.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PERF_MONITORING:
+            return self.get_response(request)
+
+        recorder = request.perf_recorder = QueryRecorder()
+        started = time.perf_counter()
+        with record_queries(recorder):
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - started) * 1000
+        db_ms = recorder.db_seconds * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = match.view_name if match else 'unresolved'
+        budget = get_budget(endpoint)
+        measured = {'queries': recorder.queries, 'db_ms': db_ms, 'wall_ms': wall_ms}
+        over_budget = [name for name, limit in budget.items() if limit is not None and measured[name] > limit]
+        if over_budget:
+            logger.warning(
+                '%s %s (%s) over budget: %d queries, %.1f ms in database, %.1f ms total',
+                request.method, request.path, endpoint, recorder.queries, db_ms, wall_ms
+            )
+        perf_stats.add(endpoint, recorder.queries, db_ms, wall_ms, over_budget)
+        return response
@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .face_index import get_face_index
+from .models import User
+
+
+@receiver(post_delete, sender=User)
+def remove_deleted_face(sender, instance, **kwargs):
+    """Drop a deleted member from the face index once the delete is committed"""
+    # A deferred face_encoding is unknown, so remove to be safe
+    if 'face_encoding' in instance.__dict__ and not instance.face_encoding:
+        return
+    user_id = instance.id
+    transaction.on_commit(lambda: get_face_index().remove(user_id))
@@ -0,0 +1,60 @@
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+STREAM_MODES = ('json', 'ndjson')
+
+
+def get_stream_mode(request):
+    """'json' or 'ndjson' from ?stream=, None for a regular response.
+
+    A query parameter rather than ?format= or Accept, which DRF already uses
+    for renderer negotiation.
+    """
+    mode = request.GET.get('stream') or None
+    if mode is not None and mode not in STREAM_MODES:
+        raise ValueError(f"stream must be one of: {', '.join(STREAM_MODES)}")
+    return mode
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _json_array(rows, prefix, suffix, size):
+    yield prefix + '['
+    first = True
+    for batch in _batches(rows, size):
+        # One dumps per batch: a list's encoding minus its brackets
+        body = json.dumps(batch, cls=DjangoJSONEncoder)[1:-1]
+        yield body if first else ',' + body
+        first = False
+    yield ']' + suffix
+
+
+def _ndjson(rows, size):
+    for batch in _batches(rows, size):
+        yield ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in batch)
+
+
+def streaming_response(rows, mode, key=None):
+    """Stream rows as a JSON array (wrapped in {key: [...]} when key is given)
+    or as newline-delimited JSON, holding only one batch in memory.
+
+    rows should be a lazy iterable such as queryset.iterator(chunk_size=...).
+    """
+    size = settings.STREAM_CHUNK_SIZE
+    if mode == 'ndjson':
+        return StreamingHttpResponse(_ndjson(rows, size), content_type='application/x-ndjson')
+
+    prefix, suffix = ('{' + json.dumps(key) + ':', '}') if key else ('', '')
+    return StreamingHttpResponse(_json_array(rows, prefix, suffix, size), content_type='application/json')
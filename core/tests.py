@@ -1,3 +1,306 @@
-from django.test import TestCase
+import base64
+import json
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DataError
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import face_index as face_index_module
+from .face_encoding import FaceEncodingBusy, FaceEncodingService
+from .face_index import FaceIndex, get_face_index
+from .models import User
+from .pagination import PaginationError, decode_cursor, encode_cursor, keyset_page
+from .streaming import get_stream_mode, streaming_response
+from .views import FaceLoginView
+
+
+def _encoding(seed):
+    return np.random.default_rng(seed).normal(size=128).astype(np.float32)
+
+
+class FaceIndexTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        settings_override = override_settings(FACE_INDEX_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # The process-wide index remembers its directory
+        face_index_module._face_index = None
+        self.addCleanup(setattr, face_index_module, '_face_index', None)
+
+    def register(self, username, seed):
+        user = User.objects.create(username=username, email=f'{username}@tennis.com')
+        user.set_face_encoding(_encoding(seed))
+        user.save()
+        return user
+
+
+class FaceIndexTests(FaceIndexTestCase):
+    def test_writers_in_two_processes_keep_each_others_rows(self):
+        # Two workers that loaded the index before either registration
+        first, second = FaceIndex(self.directory), FaceIndex(self.directory)
+        len(first), len(second)
+
+        first.add(1, _encoding(1))
+        second.add(2, _encoding(2))
+
+        reloaded = FaceIndex(self.directory)
+        self.assertEqual(len(reloaded), 2)
+        self.assertEqual(reloaded.identify(_encoding(1), k=1)[0][0], 1)
+        self.assertEqual(first.identify(_encoding(2), k=1)[0][0], 2)
+
+    def test_add_replaces_and_remove_drops(self):
+        index = FaceIndex(self.directory)
+        index.add(1, _encoding(1))
+        index.add(1, _encoding(3))
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.identify(_encoding(3), k=1), [(1, 0.0)])
+
+        index.remove(1)
+        self.assertEqual(len(FaceIndex(self.directory)), 0)
+
+    def test_deleted_user_leaves_the_index(self):
+        user = self.register('player', 1)
+        get_face_index().rebuild()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+
+        self.assertEqual(len(FaceIndex(self.directory)), 0)
+
+
+class FaceIdentifyTests(FaceIndexTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.register('player', 1)
+        self.register('other', 4)
+        get_face_index().rebuild()
+        self.staff = User.objects.create(username='desk', email='desk@tennis.com', role='admin')
+        self.service = mock.Mock()
+
+    def identify(self, encoding, caller=None, **data):
+        self.service.encode.return_value = ([encoding], {'decode': 1.0})
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(caller)}'} if caller else {}
+        with mock.patch('core.views.get_face_encoding_service', return_value=self.service):
+            return self.client.post(reverse('face-login'), {
+                'face_image': SimpleUploadedFile('face.jpg', b'jpeg bytes', content_type='image/jpeg'), **data
+            }, **headers)
+
+    def test_staff_get_the_member_and_candidates_but_no_tokens(self):
+        response = self.identify(_encoding(1), self.staff, top_k=2)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertNotIn('access', data)
+        self.assertNotIn('refresh', data)
+        self.assertEqual(data['user']['id'], self.user.id)
+        self.assertEqual([row['user_id'] for row in data['candidates']][0], self.user.id)
+        self.assertEqual(len(data['candidates']), 2)
+
+    def test_no_match_lists_candidates(self):
+        response = self.identify(_encoding(2), self.staff)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['error'], 'Face not recognized')
+        self.assertEqual(len(response.json()['candidates']), 2)
+
+    def test_anonymous_and_member_callers_are_refused_before_encoding(self):
+        self.assertEqual(self.identify(_encoding(1)).status_code, 401)
+        self.assertEqual(self.identify(_encoding(1), self.user).status_code, 403)
+        self.service.encode.assert_not_called()
+
+    def test_inactive_member_is_not_identified(self):
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.identify(_encoding(1), self.staff).status_code, 404)
+
+    def test_top_k_must_be_an_integer(self):
+        self.assertEqual(self.identify(_encoding(1), self.staff, top_k='many').status_code, 400)
+
+
+class FaceEncodingServiceTests(TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        self.service = FaceEncodingService(workers=2, max_pending=1, timeout=0.05, max_image_side=1024)
+        self.service._get_executor = lambda: executor
+
+    def slow_encode(self, image_bytes, max_side):
+        self.release.wait(5)
+        return [], {'decode': 1.0}
+
+    def test_timed_out_job_keeps_its_slot_until_it_finishes(self):
+        with mock.patch('core.face_encoding._encode_image_bytes', self.slow_encode):
+            with self.assertRaisesMessage(FaceEncodingBusy, 'timed out'):
+                self.service.encode(b'image')
+            # Still running in the pool, so nothing new is admitted
+            with self.assertRaisesMessage(FaceEncodingBusy, 'busy'):
+                self.service.encode(b'image')
+
+            self.release.set()
+            for _ in range(100):
+                if self.service._slots.acquire(timeout=0.05):
+                    self.service._slots.release()
+                    break
+            self.assertEqual(self.service.encode(b'image'), ([], {'decode': 1.0}))
+
+
+@override_settings(FACE_IMAGE_MAX_BYTES=1024)
+class FaceUploadSizeTests(TestCase):
+    def test_oversized_upload_is_refused_before_encoding(self):
+        service = mock.Mock()
+        with mock.patch('core.views.get_face_encoding_service', return_value=service):
+            for name in ('face-login', 'face-register'):
+                response = self.client.post(reverse(name), {
+                    'email': 'player@tennis.com', 'password': 'secret',
+                    'face_image': SimpleUploadedFile('face.jpg', b'x' * 2048, content_type='image/jpeg'),
+                })
+                self.assertEqual(response.status_code, 413)
+        service.encode.assert_not_called()
+
+    def test_oversized_body_is_not_parsed(self):
+        request = RequestFactory().post(reverse('face-login'), {
+            'face_image': SimpleUploadedFile('face.jpg', b'x' * 2048, content_type='image/jpeg'),
+        })
+        with mock.patch('rest_framework.request.Request._load_data_and_files') as parse:
+            response = FaceLoginView.as_view()(request)
+
+        self.assertEqual(response.status_code, 413)
+        parse.assert_not_called()
+
+
+class FaceEncodingStorageTests(FaceIndexTestCase):
+    def test_blob_round_trip(self):
+        encoding = _encoding(1)
+        user = self.register('player', 1)
+
+        stored = User.objects.get(id=user.id)
+        self.assertEqual(len(bytes(stored.face_encoding)), 512)
+        self.assertEqual(stored.face_encoding_array.dtype, np.float32)
+        np.testing.assert_array_equal(stored.face_encoding_array, encoding)
+
+    def test_missing_and_empty_encodings_are_not_indexed(self):
+        self.register('player', 1)
+        User.objects.create(username='no_face', email='no_face@tennis.com')
+        empty = User.objects.create(username='empty', email='empty@tennis.com', face_encoding=b'')
+        User.objects.create(username='short', email='short@tennis.com', face_encoding=b'\0' * 8)
+
+        self.assertIsNone(User.objects.get(id=empty.id).face_encoding_array)
+        self.assertEqual(get_face_index().rebuild(), 1)
+
+
+class KeysetPaginationTests(TestCase):
+    ORDERING = ('-date_joined', 'id')
+
+    def setUp(self):
+        # Pairs share a timestamp so the id tie-break decides the order
+        joined = [datetime(2025, 1, 1, 12, 0, 0, micro, tzinfo=timezone.utc) for micro in (5, 5, 3, 3, 1)]
+        self.users = [
+            User.objects.create(username=f'player_{i}', email=f'player_{i}@tennis.com', date_joined=when)
+            for i, when in enumerate(joined)
+        ]
+
+    def walk(self, limit):
+        pages, cursor = [], None
+        while True:
+            rows, position = keyset_page(
+                User.objects.values('id', 'date_joined'), self.ORDERING, limit, decode_cursor(cursor)
+            )
+            pages.append([row['id'] for row in rows])
+            if position is None:
+                return pages
+            cursor = encode_cursor(position)
+
+    def test_cursor_round_trip_keeps_microseconds(self):
+        position = [datetime(2025, 1, 1, 12, 0, 0, 5, tzinfo=timezone.utc), 7]
+        self.assertEqual(decode_cursor(encode_cursor(position)), ['2025-01-01T12:00:00.000005+00:00', 7])
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = [user.id for user in self.users]
+        for limit in (1, 2, 3, 5, 10):
+            pages = self.walk(limit)
+            self.assertEqual(sum(pages, []), expected)
+            self.assertTrue(all(pages), f'empty page with limit={limit}')
+
+    def test_exact_last_page_has_no_cursor(self):
+        User.objects.filter(id=self.users[-1].id).delete()
+
+        self.assertEqual(self.walk(2), [[self.users[0].id, self.users[1].id], [self.users[2].id, self.users[3].id]])
+
+    def test_tampered_cursors_are_rejected(self):
+        queryset = User.objects.values('id', 'date_joined')
+        tampered = [
+            'not base64!',
+            base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+            encode_cursor(['2025-01-01T12:00:00+00:00']),
+            encode_cursor(['not a date', 1]),
+            encode_cursor(['2025-01-01T12:00:00+00:00', {'id': 1}]),
+            encode_cursor(['2025-01-01T12:00:00+00:00', 2 ** 80]),
+        ]
+        for cursor in tampered:
+            with self.subTest(cursor=cursor), self.assertRaisesMessage(PaginationError, 'Invalid cursor'):
+                keyset_page(queryset, self.ORDERING, 2, decode_cursor(cursor))
+
+    def test_cursor_rejected_by_the_database_is_a_pagination_error(self):
+        queryset = User.objects.values('id', 'date_joined')
+        with mock.patch('django.db.models.query.QuerySet._fetch_all', side_effect=DataError('out of range')):
+            with self.assertRaisesMessage(PaginationError, 'Invalid cursor'):
+                keyset_page(queryset, self.ORDERING, 2, ['2025-01-01T12:00:00+00:00', 1])
+            # Without a cursor the error is not the client's
+            with self.assertRaises(DataError):
+                keyset_page(queryset, self.ORDERING, 2)
+
+
+@override_settings(STREAM_CHUNK_SIZE=2)
+class StreamingResponseTests(TestCase):
+    rows = [{'id': i, 'joined': datetime(2025, 1, i + 1, tzinfo=timezone.utc)} for i in range(5)]
+
+    def body(self, rows, mode, key=None):
+        response = streaming_response(iter(rows), mode, key)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        return response['Content-Type'], chunks
+
+    def test_json_array_matches_a_regular_dump(self):
+        for count in (0, 1, 2, 5):
+            content_type, chunks = self.body(self.rows[:count], 'json')
+            self.assertEqual(content_type, 'application/json')
+            self.assertEqual(json.loads(''.join(chunks)), [
+                {'id': row['id'], 'joined': row['joined'].isoformat().replace('+00:00', 'Z')}
+                for row in self.rows[:count]
+            ])
+
+    def test_keyed_json_wraps_the_array(self):
+        _, chunks = self.body(self.rows, 'json', key='reservations')
+
+        self.assertEqual([row['id'] for row in json.loads(''.join(chunks))['reservations']], [0, 1, 2, 3, 4])
+        # Opening, one chunk per batch of two, closing
+        self.assertEqual(len(chunks), 5)
+
+    def test_ndjson_is_one_object_per_line(self):
+        content_type, chunks = self.body(self.rows, 'ndjson')
+
+        self.assertEqual(content_type, 'application/x-ndjson')
+        lines = ''.join(chunks).splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [0, 1, 2, 3, 4])
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(self.body([], 'ndjson')[1], [])
+
+    def test_stream_mode_comes_from_the_query_string(self):
+        factory = RequestFactory()
+        self.assertIsNone(get_stream_mode(factory.get('/')))
+        self.assertEqual(get_stream_mode(factory.get('/', {'stream': 'ndjson'})), 'ndjson')
+        with self.assertRaisesMessage(ValueError, 'stream must be one of: json, ndjson'):
+            get_stream_mode(factory.get('/', {'stream': 'csv'}))
@@ -1,5 +1,4 @@
-import json
-import os
+import time
 from django.conf import settings
 from rest_framework import generics
 from .serializers import RegisterSerializer
@@ -13,8 +12,9 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from .models import User
+from .face_encoding import FaceEncodingBusy, get_face_encoding_service, with_server_timing
+from .face_index import FACE_MATCH_TOLERANCE, get_face_index
 import face_recognition
-from django.core.files.storage import default_storage
 from django.shortcuts import render
 
 # JWT imports
@@ -44,6 +44,23 @@ def abonne_dashboard_view(request):
     return render(request, 'html/abonne_dashboard.html')
 
 User = get_user_model()
+
+
+def _face_upload_too_large(request, face_image=None):
+    """413 response for face uploads over FACE_IMAGE_MAX_BYTES, else None.
+
+    Called before request.data is touched, so an oversized body is refused
+    from its Content-Length without being parsed (or spooled to a temp file);
+    the file size is checked again once parsed, for bodies without one.
+    """
+    size = face_image.size if face_image is not None else int(request.META.get('CONTENT_LENGTH') or 0)
+    if size > settings.FACE_IMAGE_MAX_BYTES:
+        return Response(
+            {"error": f"Image too large, the limit is {settings.FACE_IMAGE_MAX_BYTES // 1024} KB"},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    return None
+
 #nrml login and register function
 @method_decorator(csrf_exempt, name='dispatch')
 class RegisterView(generics.CreateAPIView):
@@ -54,30 +71,48 @@ class FaceLoginView(APIView):
     parser_classes = [MultiPartParser, FormParser]  # This allows file uploads
 
     def post(self, request, *args, **kwargs):
+        too_large = _face_upload_too_large(request)
+        if too_large:
+            return too_large
+
         email = request.data.get('email')
         password = request.data.get('password')
         face_image = request.FILES.get('face_image')  # Get the image from the request
 
-        if not email or not password or not face_image:
+        # Without an email the face alone identifies the member (kiosk check-in)
+        if not face_image or (email and not password):
             return Response({"error": "Missing required fields"}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Initialize image path variable
-        image_path = None
-        absolute_image_path = None
-
+        too_large = _face_upload_too_large(request, face_image)
+        if too_large:
+            return too_large
+        if not email:
+            # Checked before the image is encoded, so anonymous callers cost nothing
+            if not request.user.is_authenticated:
+                return Response({"error": "Authentication required to identify a face"},
+                                status=status.HTTP_401_UNAUTHORIZED)
+            if request.user.role not in settings.FACE_IDENTIFY_ROLES:
+                return Response({"error": "Staff access required to identify a face"},
+                                status=status.HTTP_403_FORBIDDEN)
+
+        timings = {}
         try:
-            # Save the uploaded image temporarily using the default storage system
-            image_path = default_storage.save('temp_image.jpg', face_image)
-            absolute_image_path = os.path.join(settings.MEDIA_ROOT, image_path)
-
-            uploaded_image = face_recognition.load_image_file(absolute_image_path)
-            uploaded_face_encoding = face_recognition.face_encodings(uploaded_image)
+            # Decode straight from the in-memory upload (size capped above), nothing is written to disk
+            uploaded_face_encoding, timings = get_face_encoding_service().encode(face_image.read())
 
             if len(uploaded_face_encoding) == 0:
-                return Response({"error": "No face found in the image"}, status=status.HTTP_400_BAD_REQUEST)
+                return with_server_timing(
+                    Response({"error": "No face found in the image"}, status=status.HTTP_400_BAD_REQUEST),
+                    timings
+                )
 
             uploaded_face_encoding = uploaded_face_encoding[0]  # Use the first face encoding found
 
+            started = time.perf_counter()
+            if not email:
+                response = self.identify(uploaded_face_encoding, request.data.get('top_k', 5))
+                timings['compare'] = (time.perf_counter() - started) * 1000
+                return with_server_timing(response, timings)
+
             # Get user by email
             user = User.objects.get(email=email)
 
@@ -85,47 +120,86 @@ class FaceLoginView(APIView):
             if not user.check_password(password):
                 return Response({"error": "Invalid password"}, status=status.HTTP_401_UNAUTHORIZED)
 
-            # Deserialize the saved face encoding
-            saved_face_encoding = json.loads(user.face_encoding)
+            # Zero-copy float32 view over the stored encoding
+            saved_face_encoding = user.face_encoding_array
+            if saved_face_encoding is None:
+                return Response({"error": "No face registered for this user"}, status=status.HTTP_400_BAD_REQUEST)
 
             # Compare the face encoding (use a matching threshold if necessary)
-            if face_recognition.compare_faces([saved_face_encoding], uploaded_face_encoding)[0]:
+            matched = face_recognition.compare_faces([saved_face_encoding], uploaded_face_encoding)[0]
+            timings['compare'] = (time.perf_counter() - started) * 1000
+            if matched:
                 # If face matches, authenticate user
-                return Response({"message": "Login successful"}, status=status.HTTP_200_OK)
+                response = Response({"message": "Login successful"}, status=status.HTTP_200_OK)
             else:
-                return Response({"error": "Face not recognized"}, status=status.HTTP_401_UNAUTHORIZED)
+                response = Response({"error": "Face not recognized"}, status=status.HTTP_401_UNAUTHORIZED)
+            return with_server_timing(response, timings)
 
         except User.DoesNotExist:
             return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+        except FaceEncodingBusy as e:
+            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        finally:
-            # Clean up the temporary image if it was saved
-            if absolute_image_path and os.path.exists(absolute_image_path):
-                os.remove(absolute_image_path)
+
+    def identify(self, face_encoding, top_k):
+        """1:N lookup of a face against every registered member, for staff callers.
+
+        Returns the matched member and the top_k nearest candidates with their
+        distances. It never issues tokens: a face alone does not log anyone in.
+        """
+        try:
+            top_k = max(1, min(int(top_k), 20))
+        except (TypeError, ValueError):
+            return Response({"error": "top_k must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        candidates = get_face_index().identify(face_encoding, k=top_k)
+        candidates_data = [{"user_id": user_id, "distance": distance} for user_id, distance in candidates]
+
+        user = None
+        if candidates and candidates[0][1] <= FACE_MATCH_TOLERANCE:
+            user_id = candidates[0][0]
+            user = User.objects.filter(id=user_id).first()
+            if user is None:
+                # Deleted since it was indexed
+                get_face_index().remove(user_id)
+        if user is None or not user.is_active:
+            return Response({"error": "Face not recognized", "candidates": candidates_data},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "message": "Face identified",
+            "user": {"id": user.id, "username": user.username, "email": user.email, "role": user.role},
+            "candidates": candidates_data,
+        }, status=status.HTTP_200_OK)
 
 class RegisterFaceLoginView(APIView):
     parser_classes = [MultiPartParser, FormParser]  # This allows file uploads
 
     def post(self, request, *args, **kwargs):
+        too_large = _face_upload_too_large(request)
+        if too_large:
+            return too_large
+
         email = request.data.get('email')
         password = request.data.get('password')
         face_image = request.FILES.get('face_image')  # Get the image from the request
 
         if not email or not password or not face_image:
             return Response({"error": "Missing required fields"}, status=status.HTTP_400_BAD_REQUEST)
+        too_large = _face_upload_too_large(request, face_image)
+        if too_large:
+            return too_large
 
         try:
-            # Save the uploaded image temporarily
-            image_path = default_storage.save('temp_image.jpg', face_image)
-            full_image_path = default_storage.path(image_path)
-
-            # Load the image and get the face encoding
-            image = face_recognition.load_image_file(full_image_path)
-            face_encoding = face_recognition.face_encodings(image)
+            # Get the face encoding from the worker pool, decoded from the upload buffer
+            face_encoding, timings = get_face_encoding_service().encode(face_image.read())
 
             if len(face_encoding) == 0:
-                return Response({"error": "No face found in the image"}, status=status.HTTP_400_BAD_REQUEST)
+                return with_server_timing(
+                    Response({"error": "No face found in the image"}, status=status.HTTP_400_BAD_REQUEST),
+                    timings
+                )
 
             face_encoding = face_encoding[0]  # Use the first face encoding found
 
@@ -134,21 +208,22 @@ class RegisterFaceLoginView(APIView):
 
             # Create the user and store the face encoding
             user = User.objects.create_user(username=username, email=email, password=password,role='joueur')  # Now including username
-            user.face_encoding = json.dumps(face_encoding.tolist())  # Save face encoding as JSON string
+            user.set_face_encoding(face_encoding)  # Stored as 512 bytes of float32
             user.save()
 
-            # Clean up the temporary image
-            if os.path.exists(full_image_path):
-                os.remove(full_image_path)
+            # Make the new face identifiable without rebuilding the whole index
+            get_face_index().add(user.id, face_encoding)
 
-            return Response({"message": "Registration successful"}, status=status.HTTP_201_CREATED)
+            return with_server_timing(
+                Response({"message": "Registration successful"}, status=status.HTTP_201_CREATED),
+                timings
+            )
 
+        except FaceEncodingBusy as e:
+            return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
-            # Clean up the temporary image if an error occurs
-            if os.path.exists(full_image_path):
-                os.remove(full_image_path)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
+
 
 class CoachListView(APIView):
     def get(self, request, *args, **kwargs):
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.pagination import select_fields
 from .models import Match
 
 class MatchSerializer(serializers.ModelSerializer):
@@ -14,3 +15,13 @@ class MatchSerializer(serializers.ModelSerializer):
             'notes', 'is_confirmed', 'created_at'
         ]
         read_only_fields = ['created_by', 'is_confirmed', 'created_at']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # ?fields= trims list responses; writes always see every field
+        request = self.context.get('request')
+        if request is not None and request.method == 'GET':
+            keep = select_fields(request, list(self.fields))
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
@@ -3,6 +3,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.db.models import Q
 from django.contrib.auth import get_user_model
+from core.pagination import KeysetPagination, PaginationError
 from .models import Match
 from .serializers import MatchSerializer
 
@@ -15,9 +16,11 @@ User = get_user_model()
 class MatchListCreateView(generics.ListCreateAPIView):
     serializer_class = MatchSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
-        queryset = Match.objects.all().order_by('-created_at')
+        queryset = Match.objects.select_related('created_by', 'opponent').order_by(*self.keyset_ordering)
 
         match_type = self.request.query_params.get('type')
         location = self.request.query_params.get('location')
@@ -29,6 +32,12 @@ class MatchListCreateView(generics.ListCreateAPIView):
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        try:
+            return super().list(request, *args, **kwargs)
+        except PaginationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
     def perform_create(self, serializer):
         # Automatically sets the match creator to the logged-in user
         serializer.save(created_by=self.request.user)
@@ -2,7 +2,8 @@ from django.contrib import admin
 from .models import (
     Coach, ReservationCoach, Schedule, Terrain, Reservation,
     Equipment, EquipmentOrder, Subscription, Tournament,
-    TournamentRegistration, Notification, Payment
+    TournamentRegistration, Notification, Payment, DashboardCounter,
+    DailyCourtStats, DailyCoachStats
 )
 
 # Register your models here.
@@ -17,4 +18,7 @@ admin.site.register(Subscription)
 admin.site.register(Tournament)
 admin.site.register(TournamentRegistration)
 admin.site.register(Notification)
-admin.site.register(Payment)
\ No newline at end of file
+admin.site.register(Payment)
+admin.site.register(DashboardCounter)
+admin.site.register(DailyCourtStats)
+admin.site.register(DailyCoachStats)
@@ -1,21 +1,59 @@
+from asgiref.sync import sync_to_async
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.http import JsonResponse
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Count, Sum
+from django.db.models import Q, Count
 from django.utils import timezone
+from django.views.decorators.http import require_GET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime, timedelta, date
+from functools import partial
+import asyncio
 import json
+import logging
 
 from .models import (
     Terrain, Reservation, Coach, ReservationCoach, Schedule, ScheduleSlot,
     Equipment, EquipmentOrder, Subscription, Tournament,
     TournamentRegistration, Notification, Payment
 )
+from .availability import availability_grid, encode_bitmap, grid_shape, is_coach_free, is_court_free
+from .booking import BookingError, book_court
+from .caching import (
+    cached_endpoint, conditional_endpoint, endpoint_cache_stats, get_cached_coach_dashboard,
+    invalidate_coach_dashboard, set_cached_coach_dashboard
+)
+from .exports import filter_payments, payment_csv_lines
+from .facts import coach_report, court_report
+from .player_dashboard import (
+    NOTIFICATION_FIELDS, NOTIFICATION_ORDERING, latest_notifications, notifications_for,
+    todays_coach_schedules, upcoming_reservations, weekly_spending
+)
+from .queries import (
+    ORDER_ORDERING, PAYMENT_ORDERING, TOURNAMENT_ORDERING, active_schedules, coach_day_schedule,
+    coach_session_totals, coach_sessions, coach_slots, open_tournaments, player_court_reservations,
+    player_orders, player_payments, schedule_slots, tournament_registrations
+)
+from .rollups import get_rollups
+from .slots import generate_schedule_slots_for_coach
+from .timeline import player_timeline, timeline_entry
 from core.models import User
+from core.perf import perf_stats, record_queries
+from core.pagination import (
+    PaginationError, decode_cursor, encode_cursor, get_limit, is_paginated, list_response, project,
+    select_fields, values_page
+)
+from core.streaming import get_stream_mode, streaming_response
+
+logger = logging.getLogger(__name__)
 
 
 # ==================== TERRAIN MANAGEMENT ====================
@@ -23,6 +61,7 @@ from core.models import User
 @api_view(['GET', 'POST'])
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
+@conditional_endpoint('terrains')
 def terrain_management(request):
     if request.method == 'GET':
         terrains = Terrain.objects.all().values(
@@ -71,6 +110,57 @@ def terrain_detail(request, terrain_id):
         return JsonResponse({'message': 'Terrain deleted successfully'})
 
 
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def availability_grid_view(request):
+    """Busy slots of every court for ?from=YYYY-MM-DD and ?days= (default 7), optionally ?terrain=1,2.
+
+    Each day is a bitmap of the slots between opening and closing, bit i set
+    when slot i is booked; ?encoding=base64 (default) or array.
+    """
+    try:
+        start_date = request.GET.get('from')
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else timezone.now().date()
+        days = int(request.GET.get('days', 7))
+        terrain_ids = request.GET.get('terrain')
+        terrain_ids = [int(value) for value in terrain_ids.split(',')] if terrain_ids else None
+    except ValueError:
+        return JsonResponse({'error': 'from must be a YYYY-MM-DD date, days and terrain integers'}, status=400)
+    if not 1 <= days <= settings.AVAILABILITY_GRID_MAX_DAYS:
+        return JsonResponse({'error': f'days must be between 1 and {settings.AVAILABILITY_GRID_MAX_DAYS}'}, status=400)
+    encoding = request.GET.get('encoding', 'base64')
+    if encoding not in ('base64', 'array'):
+        return JsonResponse({'error': 'encoding must be base64 or array'}, status=400)
+
+    terrains = Terrain.objects.order_by('id')
+    if terrain_ids is not None:
+        terrains = terrains.filter(id__in=terrain_ids)
+    terrains = list(terrains.values('id', 'name', 'available'))
+
+    end_date = start_date + timedelta(days=days - 1)
+    opening, slot_minutes, slots = grid_shape()
+    grid = availability_grid([terrain['id'] for terrain in terrains], start_date, end_date)
+    dates = [start_date + timedelta(days=offset) for offset in range(days)]
+
+    return JsonResponse({
+        'from': start_date.strftime('%Y-%m-%d'),
+        'to': end_date.strftime('%Y-%m-%d'),
+        'opening': f'{opening // 60:02d}:{opening % 60:02d}',
+        'slot_minutes': slot_minutes,
+        'slots_per_day': slots,
+        'encoding': encoding,
+        'dates': [day.strftime('%Y-%m-%d') for day in dates],
+        'terrains': [
+            {
+                **terrain,
+                'busy': [encode_bitmap(grid[(terrain['id'], day)], slots, encoding) for day in dates]
+            }
+            for terrain in terrains
+        ]
+    })
+
+
 # ==================== RESERVATION MANAGEMENT ====================
 
 @api_view(['GET', 'POST'])
@@ -78,20 +168,33 @@ def terrain_detail(request, terrain_id):
 @permission_classes([IsAuthenticated])
 def court_reservations(request):
     if request.method == 'GET':
+        try:
+            stream = get_stream_mode(request)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
         # Get user's reservations
-        reservations = Reservation.objects.filter(user=request.user).select_related('terrain')
-        reservation_list = []
-        for res in reservations:
-            reservation_list.append({
-                'id': res.id,
-                'terrain_name': res.terrain.name,
-                'terrain_location': res.terrain.location,
-                'date': res.date,
-                'start_time': res.start_time,
-                'end_time': res.end_time,
-                'price': float(res.calculate_price())
-            })
-        return JsonResponse({'reservations': reservation_list})
+        rows = player_court_reservations(request.user).values_list(
+            'id', 'terrain__name', 'terrain__location', 'date', 'start_time', 'end_time', 'price'
+        )
+        if stream:
+            rows = rows.iterator(chunk_size=settings.STREAM_CHUNK_SIZE)
+        reservation_list = (
+            {
+                'id': reservation_id,
+                'terrain_name': terrain_name,
+                'terrain_location': terrain_location,
+                'date': reservation_date,
+                'start_time': start_time,
+                'end_time': end_time,
+                'price': float(price)
+            }
+            for reservation_id, terrain_name, terrain_location, reservation_date, start_time, end_time, price in rows
+        )
+
+        if stream:
+            return streaming_response(reservation_list, stream, key='reservations')
+        return JsonResponse({'reservations': list(reservation_list)})
     
     elif request.method == 'POST':
         try:
@@ -103,16 +206,6 @@ def court_reservations(request):
                 if field not in data or not data[field]:
                     return JsonResponse({'error': f'Missing required field: {field}'}, status=400)
 
-            # Get terrain
-            try:
-                terrain = Terrain.objects.get(id=data['terrain_id'])
-            except Terrain.DoesNotExist:
-                return JsonResponse({'error': 'Court not found'}, status=400)
-
-            # Check if terrain is available
-            if not terrain.available:
-                return JsonResponse({'error': 'Court is not available'}, status=400)
-
             # Parse date and time
             from datetime import datetime, date, time
             try:
@@ -130,44 +223,15 @@ def court_reservations(request):
             if reservation_date < date.today():
                 return JsonResponse({'error': 'Cannot make reservations for past dates'}, status=400)
 
-            # Check for conflicts
-            existing = Reservation.objects.filter(
-                terrain=terrain,
-                date=reservation_date,
-                start_time__lt=end_time,
-                end_time__gt=start_time
-            ).exists()
-
-            if existing:
-                return JsonResponse({'error': 'Time slot is already booked'}, status=400)
-
-            # Create reservation
-            reservation = Reservation.objects.create(
-                user=request.user,
-                terrain=terrain,
-                date=reservation_date,
-                start_time=start_time,
-                end_time=end_time
-            )
-
-            # Create payment record
-            price = reservation.calculate_price()
-            Payment.objects.create(
-                user=request.user,
-                payment_type='court_reservation',
-                amount=price,
-                status='completed',
-                transaction_id=f'COURT_{reservation.id}_{int(timezone.now().timestamp())}',
-                description=f'Court reservation: {terrain.name} on {reservation_date}'
-            )
-
-            # Create notification
-            Notification.objects.create(
-                user=request.user,
-                title='Court Reservation Confirmed',
-                message=f'Your reservation for {terrain.name} on {reservation_date} from {start_time} to {end_time} has been confirmed.',
-                notification_type='reservation'
-            )
+            # Lock the court, check for conflicts and write reservation, payment
+            # and notification in one transaction
+            try:
+                reservation, price = book_court(
+                    request.user, data['terrain_id'], reservation_date, start_time, end_time
+                )
+            except BookingError as e:
+                return JsonResponse({'error': e.message}, status=e.status)
+            terrain = reservation.terrain
 
             return JsonResponse({
                 'message': 'Reservation created successfully',
@@ -239,20 +303,12 @@ def update_court_reservation(request, reservation_id):
             return JsonResponse({'error': 'End time must be after start time'}, status=400)
 
         # Check for conflicts (excluding current reservation)
-        existing = Reservation.objects.filter(
-            terrain=reservation.terrain,
-            date=reservation_date,
-            start_time__lt=end_time,
-            end_time__gt=start_time
-        ).exclude(id=reservation_id).exists()
-
-        if existing:
+        if not is_court_free(reservation.terrain_id, reservation_date, start_time, end_time,
+                             exclude_id=reservation_id):
             return JsonResponse({'error': 'Time slot is already booked'}, status=400)
 
         # Update the reservation
-        reservation.date = reservation_date
-        reservation.start_time = start_time
-        reservation.end_time = end_time
+        reservation.reschedule(reservation.terrain, reservation_date, start_time, end_time)
         reservation.save()
 
         return JsonResponse({
@@ -263,7 +319,7 @@ def update_court_reservation(request, reservation_id):
                 'date': reservation.date.strftime('%Y-%m-%d'),
                 'start_time': reservation.start_time.strftime('%H:%M'),
                 'end_time': reservation.end_time.strftime('%H:%M'),
-                'price': float(reservation.calculate_price())
+                'price': float(reservation.price)
             }
         })
 
@@ -336,18 +392,14 @@ def update_coach_reservation(request, reservation_id):
                 return JsonResponse({'error': 'Selected coach not found'}, status=400)
 
         # Check for conflicts with target coach's schedule (excluding current reservation)
-        existing = ReservationCoach.objects.filter(
-            coach=target_coach,
-            date=reservation_date,
-            start_time__lt=end_time,
-            end_time__gt=start_time
-        ).exclude(id=reservation_id).exists()
-
-        if existing:
+        if not is_coach_free(target_coach, reservation_date, start_time, end_time, exclude_id=reservation_id):
             coach_name = target_coach.name
             return JsonResponse({'error': f'Coach {coach_name} is not available at this time'}, status=400)
 
         # Update the reservation
+        if target_coach.id != reservation.coach_id:
+            # The previous coach's dashboard loses this session
+            invalidate_coach_dashboard(reservation.coach_id)
         reservation.coach = target_coach
         reservation.date = reservation_date
         reservation.start_time = start_time
@@ -383,14 +435,24 @@ def update_coach_reservation(request, reservation_id):
 @api_view(['GET'])
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
+@cached_endpoint('equipment')
 def equipment_list(request):
-    equipment = Equipment.objects.filter(available=True).values(
-        'id', 'name', 'type', 'brand', 'price', 'stock_quantity', 'description', 'image'
-    )
-    return JsonResponse({
-        'equipment': list(equipment),
+    try:
+        equipment, next_cursor = values_page(
+            request, Equipment.objects.filter(available=True),
+            ('id', 'name', 'type', 'brand', 'price', 'stock_quantity', 'description', 'image'),
+            ordering=('id',)
+        )
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    data = {
+        'equipment': equipment,
         'count': len(equipment)
-    })
+    }
+    if is_paginated(request):
+        data['next_cursor'] = next_cursor
+    return JsonResponse(data)
 
 
 @api_view(['POST'])
@@ -427,20 +489,24 @@ def order_equipment(request):
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
 def user_orders(request):
-    orders = EquipmentOrder.objects.filter(user=request.user).select_related('equipment')
-    order_list = []
-    for order in orders:
-        order_list.append({
-            'id': order.id,
-            'equipment_name': order.equipment.name,
-            'equipment_brand': order.equipment.brand,
-            'quantity': order.quantity,
-            'total_price': float(order.total_price),
-            'status': order.status,
-            'order_date': order.order_date,
-            'delivery_address': order.delivery_address
-        })
-    return JsonResponse({'orders': order_list})
+    try:
+        order_list, next_cursor = values_page(
+            request, player_orders(request.user),
+            ('id', 'equipment_name', 'equipment_brand', 'quantity', 'total_price',
+             'status', 'order_date', 'delivery_address'),
+            ordering=ORDER_ORDERING
+        )
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    for order in order_list:
+        if 'total_price' in order:
+            order['total_price'] = float(order['total_price'])
+
+    data = {'orders': order_list}
+    if is_paginated(request):
+        data['next_cursor'] = next_cursor
+    return JsonResponse(data)
 
 
 # ==================== TOURNAMENT MANAGEMENT ====================
@@ -448,12 +514,18 @@ def user_orders(request):
 @api_view(['GET'])
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
+@cached_endpoint('tournaments')
 def tournament_list(request):
-    tournaments = Tournament.objects.filter(status__in=['upcoming', 'ongoing']).values(
-        'id', 'name', 'description', 'tournament_type', 'start_date', 'end_date',
-        'registration_deadline', 'max_participants', 'entry_fee', 'prize_money', 'status'
-    )
-    return JsonResponse(list(tournaments), safe=False)
+    try:
+        tournaments, next_cursor = values_page(
+            request, open_tournaments(),
+            ('id', 'name', 'description', 'tournament_type', 'start_date', 'end_date',
+             'registration_deadline', 'max_participants', 'entry_fee', 'prize_money', 'status'),
+            ordering=TOURNAMENT_ORDERING
+        )
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return list_response(request, tournaments, next_cursor)
 
 
 @api_view(['POST'])
@@ -467,7 +539,7 @@ def register_tournament(request, tournament_id):
         return JsonResponse({'error': 'Registration deadline has passed'}, status=400)
     
     # Check if already registered
-    if TournamentRegistration.objects.filter(tournament=tournament, player=request.user).exists():
+    if tournament_registrations(tournament, request.user).exists():
         return JsonResponse({'error': 'Already registered for this tournament'}, status=400)
     
     # Check if tournament is full
@@ -493,19 +565,14 @@ def register_tournament(request, tournament_id):
 @permission_classes([IsAuthenticated])
 def dashboard_stats(request):
     if request.user.role == 'admin':
-        # Admin statistics
-        total_users = User.objects.count()
-        total_terrains = Terrain.objects.count()
-        total_coaches = Coach.objects.count()
-        total_reservations = Reservation.objects.count()
-        total_revenue = Payment.objects.filter(status='completed').aggregate(Sum('amount'))['amount__sum'] or 0
-        
+        # Admin statistics, from the precomputed counters
+        rollups = get_rollups()
         return JsonResponse({
-            'total_users': total_users,
-            'total_terrains': total_terrains,
-            'total_coaches': total_coaches,
-            'total_reservations': total_reservations,
-            'total_revenue': float(total_revenue)
+            'total_users': int(rollups.get('users', 0)),
+            'total_terrains': int(rollups.get('terrains', 0)),
+            'total_coaches': int(rollups.get('coaches', 0)),
+            'total_reservations': int(rollups.get('reservations', 0)),
+            'total_revenue': float(rollups.get('payments:amount:status:completed', 0))
         })
     
     elif request.user.role == 'coach':
@@ -547,6 +614,93 @@ def dashboard_stats(request):
             })
 
 
+def _report_range(request):
+    """(start, end) dates from ?from=&to=, defaulting to the last 30 days"""
+    try:
+        end_date = request.GET.get('to')
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else timezone.now().date()
+        start_date = request.GET.get('from')
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else end_date - timedelta(days=29)
+    except ValueError:
+        raise ValueError('from and to must be dates in YYYY-MM-DD format')
+    if start_date > end_date:
+        raise ValueError('from must not be after to')
+    if (end_date - start_date).days >= settings.STATS_MAX_RANGE_DAYS:
+        raise ValueError(f'Range cannot exceed {settings.STATS_MAX_RANGE_DAYS} days')
+    return start_date, end_date
+
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def court_stats(request):
+    """Daily bookings, utilization and revenue per court over ?from=&to=, optionally for one ?terrain="""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Only admins can view court statistics'}, status=403)
+
+    try:
+        start_date, end_date = _report_range(request)
+        terrain_id = int(request.GET['terrain']) if request.GET.get('terrain') else None
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'from': start_date.strftime('%Y-%m-%d'),
+        'to': end_date.strftime('%Y-%m-%d'),
+        'courts': court_report(start_date, end_date, terrain_id)
+    })
+
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def coach_stats(request):
+    """Daily sessions, utilization and revenue per coach over ?from=&to=, optionally for one ?coach="""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Only admins can view coach statistics'}, status=403)
+
+    try:
+        start_date, end_date = _report_range(request)
+        coach_id = int(request.GET['coach']) if request.GET.get('coach') else None
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'from': start_date.strftime('%Y-%m-%d'),
+        'to': end_date.strftime('%Y-%m-%d'),
+        'coaches': coach_report(start_date, end_date, coach_id)
+    })
+
+
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def cache_stats(request):
+    """Hit and miss counts of the cached read endpoints"""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Only admins can view cache statistics'}, status=403)
+    return JsonResponse({'backend': settings.CACHES['default']['BACKEND'], 'endpoints': endpoint_cache_stats()})
+
+
+@api_view(['GET', 'DELETE'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def perf_report(request):
+    """Query count, database time and wall time per endpoint for this process; DELETE resets them"""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Only admins can view performance statistics'}, status=403)
+
+    if request.method == 'DELETE':
+        perf_stats.reset()
+        return JsonResponse({'message': 'Performance statistics reset'})
+
+    return JsonResponse({
+        'since': perf_stats.since,
+        'budget': settings.PERF_BUDGET,
+        'endpoints': perf_stats.report()
+    })
+
 # ==================== USER MANAGEMENT ====================
 
 @api_view(['GET'])
@@ -556,10 +710,21 @@ def user_list(request):
     if request.user.role != 'admin':
         return JsonResponse({'error': 'Only admins can view user list'}, status=403)
 
-    users = User.objects.all().values(
-        'id', 'username', 'email', 'role', 'date_joined', 'is_active'
-    )
-    return JsonResponse(list(users), safe=False)
+    try:
+        stream = get_stream_mode(request)
+        if stream:
+            fields = select_fields(request, ('id', 'username', 'email', 'role', 'date_joined', 'is_active'))
+            users = User.objects.order_by('id').values(*fields)
+            return streaming_response(users.iterator(chunk_size=settings.STREAM_CHUNK_SIZE), stream)
+
+        users, next_cursor = values_page(
+            request, User.objects.all(),
+            ('id', 'username', 'email', 'role', 'date_joined', 'is_active'),
+            ordering=('id',)
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return list_response(request, users, next_cursor)
 
 
 @api_view(['PUT'])
@@ -599,10 +764,13 @@ def delete_user(request, user_id):
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
 def user_notifications(request):
-    notifications = Notification.objects.filter(user=request.user).values(
-        'id', 'title', 'message', 'notification_type', 'is_read', 'created_at'
-    )
-    return JsonResponse(list(notifications), safe=False)
+    try:
+        notifications, next_cursor = values_page(
+            request, notifications_for(request.user), NOTIFICATION_FIELDS, ordering=NOTIFICATION_ORDERING
+        )
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return list_response(request, notifications, next_cursor)
 
 
 @api_view(['PUT'])
@@ -618,10 +786,11 @@ def mark_notification_read(request, notification_id):
 # ==================== COACH MANAGEMENT ====================
 
 @api_view(['GET'])
+@cached_endpoint('coaches')
 def coaches_list(request):
     """Get all coaches with their user information"""
     try:
-        coaches = Coach.objects.all().order_by('name')
+        coaches = Coach.objects.select_related('user').order_by('name')
         coaches_data = []
 
         for coach in coaches:
@@ -678,7 +847,7 @@ def admin_coach_schedule_management(request):
         if coach_id:
             try:
                 coach = Coach.objects.get(id=coach_id)
-                schedules = Schedule.objects.filter(coach=coach, is_active=True).values(
+                schedules = active_schedules(coach).values(
                     'id', 'day_of_week', 'start_time', 'end_time', 'is_active'
                 )
                 return JsonResponse({
@@ -696,7 +865,7 @@ def admin_coach_schedule_management(request):
             coaches = Coach.objects.all()
             coaches_data = []
             for coach in coaches:
-                schedule_count = Schedule.objects.filter(coach=coach, is_active=True).count()
+                schedule_count = active_schedules(coach).count()
                 coaches_data.append({
                     'id': coach.id,
                     'name': coach.name,
@@ -768,18 +937,14 @@ def coach_schedule(request):
             coach = Coach.objects.get(email=request.user.email)
 
         # Get weekly schedule
-        schedules = Schedule.objects.filter(coach=coach, is_active=True).values(
+        schedules = active_schedules(coach).values(
             'id', 'day_of_week', 'start_time', 'end_time'
         )
 
         # Get upcoming slots for next 7 days
         from datetime import date, timedelta
         today = date.today()
-        upcoming_slots = ScheduleSlot.objects.filter(
-            coach=coach,
-            date__gte=today,
-            date__lte=today + timedelta(days=7)
-        ).order_by('date', 'start_time').values(
+        upcoming_slots = coach_slots(coach, today, today + timedelta(days=7)).values(
             'id', 'date', 'start_time', 'end_time', 'is_booked', 'booked_by__username'
         )
 
@@ -819,12 +984,7 @@ def coach_availability(request, coach_id):
                 return JsonResponse({'error': 'Invalid end_date format. Use YYYY-MM-DD'}, status=400)
 
         # Get available slots (not booked)
-        available_slots = ScheduleSlot.objects.filter(
-            coach=coach,
-            date__gte=start_date,
-            date__lte=end_date,
-            is_booked=False
-        ).order_by('date', 'start_time')
+        available_slots = coach_slots(coach, start_date, end_date, is_booked=False)
 
         # Format slots data
         slots_data = []
@@ -871,10 +1031,7 @@ def delete_schedule(request, schedule_id):
         schedule = get_object_or_404(Schedule, id=schedule_id)
 
         # Check if there are any booked slots for this schedule
-        booked_slots = ScheduleSlot.objects.filter(
-            created_from_schedule=schedule,
-            is_booked=True
-        ).count()
+        booked_slots = schedule_slots(schedule, is_booked=True).count()
 
         if booked_slots > 0:
             return JsonResponse({
@@ -882,10 +1039,8 @@ def delete_schedule(request, schedule_id):
             }, status=400)
 
         # Delete related unbooked slots
-        ScheduleSlot.objects.filter(
-            created_from_schedule=schedule,
-            is_booked=False
-        ).delete()
+        schedule_slots(schedule, is_booked=False).delete()
+        invalidate_coach_dashboard(schedule.coach_id)
 
         # Mark schedule as inactive instead of deleting
         schedule.is_active = False
@@ -897,46 +1052,6 @@ def delete_schedule(request, schedule_id):
         return JsonResponse({'error': str(e)}, status=500)
 
 
-def generate_schedule_slots_for_coach(coach):
-    """Generate schedule slots for a coach based on their weekly schedule"""
-    from datetime import date, timedelta
-    import calendar
-
-    # Get coach's active schedules
-    schedules = Schedule.objects.filter(coach=coach, is_active=True)
-
-    # Generate slots for next 30 days
-    start_date = date.today()
-    end_date = start_date + timedelta(days=30)
-
-    current_date = start_date
-    while current_date <= end_date:
-        day_name = calendar.day_name[current_date.weekday()].lower()
-
-        # Find schedules for this day
-        day_schedules = schedules.filter(day_of_week=day_name)
-
-        for schedule in day_schedules:
-            # Check if slot already exists
-            existing_slot = ScheduleSlot.objects.filter(
-                coach=coach,
-                date=current_date,
-                start_time=schedule.start_time,
-                end_time=schedule.end_time
-            ).first()
-
-            if not existing_slot:
-                ScheduleSlot.objects.create(
-                    coach=coach,
-                    date=current_date,
-                    start_time=schedule.start_time,
-                    end_time=schedule.end_time,
-                    created_from_schedule=schedule
-                )
-
-        current_date += timedelta(days=1)
-
-
 @api_view(['POST'])
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
@@ -1028,14 +1143,7 @@ def book_coach_session(request):
             return JsonResponse({'error': 'End time must be after start time'}, status=400)
 
         # Check if coach is available (no existing reservations at this time)
-        existing_reservation = ReservationCoach.objects.filter(
-            coach=coach,
-            date=reservation_date,
-            start_time__lt=end_time,
-            end_time__gt=start_time
-        ).exists()
-
-        if existing_reservation:
+        if not is_coach_free(coach, reservation_date, start_time, end_time):
             return JsonResponse({'error': 'Coach is not available at this time'}, status=400)
 
         # Calculate duration and price
@@ -1233,11 +1341,7 @@ def get_coach_schedule(request, coach_id):
                 start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
                 end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
 
-                schedule_slots = ScheduleSlot.objects.filter(
-                    coach=coach,
-                    date__gte=start_date,
-                    date__lte=end_date
-                ).order_by('date', 'start_time')
+                slots = coach_slots(coach, start_date, end_date)
             except ValueError:
                 return JsonResponse({'error': 'Invalid date format'}, status=400)
         else:
@@ -1245,14 +1349,10 @@ def get_coach_schedule(request, coach_id):
             today = timezone.now().date()
             end_date = today + timedelta(days=30)
 
-            schedule_slots = ScheduleSlot.objects.filter(
-                coach=coach,
-                date__gte=today,
-                date__lte=end_date
-            ).order_by('date', 'start_time')
+            slots = coach_slots(coach, today, end_date)
 
         slots_data = []
-        for slot in schedule_slots:
+        for slot in slots:
             slots_data.append({
                 'id': slot.id,
                 'date': slot.date.strftime('%Y-%m-%d'),
@@ -1447,7 +1547,7 @@ def get_coach_reservations(request):
             return JsonResponse({'error': 'User is not a coach'}, status=403)
 
         # Get all reservations for this coach
-        reservations = ReservationCoach.objects.filter(coach=coach).select_related('user').order_by('-date', '-start_time')
+        reservations = coach_sessions(coach)
 
         reservations_data = []
         for reservation in reservations:
@@ -1495,66 +1595,43 @@ def get_coach_dashboard_stats(request):
         except Coach.DoesNotExist:
             return JsonResponse({'error': 'User is not a coach'}, status=403)
 
+        cached = get_cached_coach_dashboard(coach.id)
+        if cached is not None:
+            return JsonResponse(cached)
+
         from django.utils import timezone
-        from datetime import timedelta
 
         today = timezone.now().date()
-        start_of_week = today - timedelta(days=today.weekday())
-        start_of_month = today.replace(day=1)
-
-        # Get all reservations for this coach
-        all_reservations = ReservationCoach.objects.filter(coach=coach)
-
-        # Today's reservations
-        today_reservations = all_reservations.filter(date=today)
-
-        # This week's reservations
-        week_reservations = all_reservations.filter(
-            date__gte=start_of_week,
-            date__lte=today + timedelta(days=6-today.weekday())
-        )
-
-        # This month's reservations
-        month_reservations = all_reservations.filter(date__gte=start_of_month)
 
-        # Calculate earnings
-        today_earnings = sum([float(r.total_price) for r in today_reservations])
-        week_earnings = sum([float(r.total_price) for r in week_reservations])
-        month_earnings = sum([float(r.total_price) for r in month_reservations])
-        total_earnings = sum([float(r.total_price) for r in all_reservations])
+        # Session counts and earnings for every period in one query; no row
+        # when the coach has no sessions yet
+        totals = coach_session_totals(coach, today).first() or {}
 
-        # Get today's schedule
-        today_schedule = ScheduleSlot.objects.filter(coach=coach, date=today).order_by('start_time')
+        # Today's schedule with the booking for each slot joined in the same query
+        today_schedule = coach_day_schedule(coach, today)
 
         schedule_data = []
+        booked_slots = 0
         for slot in today_schedule:
-            # Check if this slot is booked
-            is_booked = today_reservations.filter(
-                start_time=slot.start_time,
-                end_time=slot.end_time
-            ).exists()
+            is_booked = slot['booking_price'] is not None
 
             booking_details = None
             if is_booked:
-                reservation = today_reservations.filter(
-                    start_time=slot.start_time,
-                    end_time=slot.end_time
-                ).first()
-                if reservation:
-                    booking_details = {
-                        'player_name': reservation.user.username,
-                        'player_email': reservation.user.email,
-                        'price': float(reservation.total_price)
-                    }
+                booked_slots += 1
+                booking_details = {
+                    'player_name': slot['booking_player_name'],
+                    'player_email': slot['booking_player_email'],
+                    'price': float(slot['booking_price'])
+                }
 
             schedule_data.append({
-                'start_time': slot.start_time.strftime('%H:%M'),
-                'end_time': slot.end_time.strftime('%H:%M'),
+                'start_time': slot['start_time'].strftime('%H:%M'),
+                'end_time': slot['end_time'].strftime('%H:%M'),
                 'is_booked': is_booked,
                 'booking_details': booking_details
             })
 
-        return JsonResponse({
+        data = {
             'coach_info': {
                 'name': coach.name,
                 'email': coach.email,
@@ -1562,24 +1639,27 @@ def get_coach_dashboard_stats(request):
                 'specialization': coach.specialization or 'General'
             },
             'stats': {
-                'total_reservations': len(all_reservations),
-                'today_sessions': len(today_reservations),
-                'week_sessions': len(week_reservations),
-                'month_sessions': len(month_reservations)
+                'total_reservations': totals.get('total_reservations', 0),
+                'today_sessions': totals.get('today_sessions', 0),
+                'week_sessions': totals.get('week_sessions', 0),
+                'month_sessions': totals.get('month_sessions', 0)
             },
             'earnings': {
-                'today': today_earnings,
-                'week': week_earnings,
-                'month': month_earnings,
-                'total': total_earnings
+                'today': float(totals.get('today_earnings') or 0),
+                'week': float(totals.get('week_earnings') or 0),
+                'month': float(totals.get('month_earnings') or 0),
+                'total': float(totals.get('total_earnings') or 0)
             },
             'today_schedule': schedule_data,
             'schedule_stats': {
                 'total_slots': len(schedule_data),
-                'booked_slots': len([s for s in schedule_data if s['is_booked']]),
-                'available_slots': len([s for s in schedule_data if not s['is_booked']])
+                'booked_slots': booked_slots,
+                'available_slots': len(schedule_data) - booked_slots
             }
-        })
+        }
+        set_cached_coach_dashboard(coach.id, data)
+
+        return JsonResponse(data)
 
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
@@ -1591,105 +1671,7 @@ def get_coach_dashboard_stats(request):
 def get_todays_coach_schedules(request):
     """Get today's schedules for all coaches"""
     try:
-        from django.utils import timezone
-        from datetime import date
-
-        today = timezone.now().date()
-
-        # Get all coaches
-        coaches = Coach.objects.filter(is_active=True)
-
-        coaches_schedules = []
-
-        for coach in coaches:
-            # Get today's schedule slots for this coach
-            today_slots = ScheduleSlot.objects.filter(
-                coach=coach,
-                date=today
-            ).order_by('start_time')
-
-            # Get coach reservations for today
-            coach_reservations = ReservationCoach.objects.filter(
-                coach=coach,
-                date=today
-            ).order_by('start_time')
-
-            # Prepare slots data
-            slots_data = []
-            for slot in today_slots:
-                # Check if this slot is booked
-                is_booked = coach_reservations.filter(
-                    start_time=slot.start_time,
-                    end_time=slot.end_time
-                ).exists()
-
-                # Get booking details if booked
-                booking_details = None
-                if is_booked:
-                    reservation = coach_reservations.filter(
-                        start_time=slot.start_time,
-                        end_time=slot.end_time
-                    ).first()
-                    if reservation:
-                        booking_details = {
-                            'player_name': reservation.user.username,
-                            'total_price': float(reservation.total_price)
-                        }
-
-                slots_data.append({
-                    'id': slot.id,
-                    'start_time': slot.start_time.strftime('%H:%M'),
-                    'end_time': slot.end_time.strftime('%H:%M'),
-                    'is_booked': is_booked,
-                    'booking_details': booking_details
-                })
-
-            # Calculate stats for this coach
-            total_slots = len(slots_data)
-            booked_slots = len([slot for slot in slots_data if slot['is_booked']])
-            available_slots = total_slots - booked_slots
-
-            # Calculate today's earnings for this coach
-            todays_earnings = sum([
-                float(reservation.total_price)
-                for reservation in coach_reservations
-            ])
-
-            coaches_schedules.append({
-                'coach': {
-                    'id': coach.id,
-                    'name': coach.name,
-                    'email': coach.email,
-                    'price_per_hour': float(coach.price_per_hour),
-                    'specialization': coach.specialization or 'General'
-                },
-                'schedule': {
-                    'total_slots': total_slots,
-                    'booked_slots': booked_slots,
-                    'available_slots': available_slots,
-                    'todays_earnings': todays_earnings,
-                    'slots': slots_data
-                }
-            })
-
-        # Calculate overall stats
-        total_coaches = len(coaches_schedules)
-        total_slots_all = sum([cs['schedule']['total_slots'] for cs in coaches_schedules])
-        total_booked_all = sum([cs['schedule']['booked_slots'] for cs in coaches_schedules])
-        total_earnings_all = sum([cs['schedule']['todays_earnings'] for cs in coaches_schedules])
-
-        return JsonResponse({
-            'date': today.strftime('%Y-%m-%d'),
-            'summary': {
-                'total_coaches': total_coaches,
-                'total_slots': total_slots_all,
-                'total_booked': total_booked_all,
-                'total_available': total_slots_all - total_booked_all,
-                'total_earnings': total_earnings_all
-            },
-            'coaches_schedules': coaches_schedules
-        })
-
+        return JsonResponse(todays_coach_schedules(timezone.now().date()))
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -1700,83 +1682,7 @@ def get_todays_coach_schedules(request):
 def get_user_weekly_spending(request):
     """Get user's spending for this week"""
     try:
-        from django.utils import timezone
-        from datetime import timedelta
-
-        # Get start of current week (Monday)
-        today = timezone.now().date()
-        start_of_week = today - timedelta(days=today.weekday())
-        end_of_week = start_of_week + timedelta(days=6)
-
-        user = request.user
-
-        # Get court reservations for this week
-        court_reservations = Reservation.objects.filter(
-            user=user,
-            date__gte=start_of_week,
-            date__lte=end_of_week
-        )
-
-        # Get coach reservations for this week
-        coach_reservations = ReservationCoach.objects.filter(
-            user=user,
-            date__gte=start_of_week,
-            date__lte=end_of_week
-        )
-
-        # Calculate total spending
-        court_spending = sum([float(res.calculate_price()) for res in court_reservations])
-        coach_spending = sum([float(res.total_price) for res in coach_reservations if res.total_price])
-
-        total_spending = court_spending + coach_spending
-
-        # Get user's sessions for today
-        today_court_sessions = court_reservations.filter(date=today)
-        today_coach_sessions = coach_reservations.filter(date=today)
-
-        todays_sessions = []
-
-        # Add court sessions
-        for session in today_court_sessions:
-            todays_sessions.append({
-                'type': 'court',
-                'title': f'Court: {session.terrain.name}',
-                'time': f"{session.start_time.strftime('%H:%M')} - {session.end_time.strftime('%H:%M')}",
-                'price': float(session.calculate_price()),
-                'status': 'confirmed'
-            })
-
-        # Add coach sessions
-        for session in today_coach_sessions:
-            todays_sessions.append({
-                'type': 'coach',
-                'title': f'Coach: {session.coach.name}',
-                'time': f"{session.start_time.strftime('%H:%M')} - {session.end_time.strftime('%H:%M')}",
-                'price': float(session.total_price) if session.total_price else 0,
-                'status': 'confirmed'
-            })
-
-        # Sort sessions by time
-        todays_sessions.sort(key=lambda x: x['time'])
-
-        return JsonResponse({
-            'week_period': {
-                'start_date': start_of_week.strftime('%Y-%m-%d'),
-                'end_date': end_of_week.strftime('%Y-%m-%d')
-            },
-            'spending': {
-                'court_spending': court_spending,
-                'coach_spending': coach_spending,
-                'total_spending': total_spending
-            },
-            'sessions_count': {
-                'court_sessions': len(today_court_sessions),
-                'coach_sessions': len(today_coach_sessions),
-                'total_sessions': len(todays_sessions)
-            },
-            'todays_sessions': todays_sessions
-        })
-
+        return JsonResponse(weekly_spending(request.user, timezone.now().date()))
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -1787,10 +1693,38 @@ def get_user_weekly_spending(request):
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
 def user_payments(request):
-    payments = Payment.objects.filter(user=request.user).values(
-        'id', 'payment_type', 'amount', 'status', 'payment_date', 'description'
-    )
-    return JsonResponse(list(payments), safe=False)
+    try:
+        payments, next_cursor = values_page(
+            request, player_payments(request.user),
+            ('id', 'payment_type', 'amount', 'status', 'payment_date', 'description'),
+            ordering=PAYMENT_ORDERING
+        )
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return list_response(request, payments, next_cursor)
+
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def export_payments(request):
+    """Stream payments as CSV, filtered by ?from=&to= (YYYY-MM-DD), ?type= and ?status="""
+    if request.user.role != 'admin':
+        return JsonResponse({'error': 'Only admins can export payments'}, status=403)
+
+    try:
+        payments = filter_payments(
+            date_from=request.GET.get('from'),
+            date_to=request.GET.get('to'),
+            payment_type=request.GET.get('type'),
+            status=request.GET.get('status')
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    response = StreamingHttpResponse(payment_csv_lines(payments), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="payments_{date.today():%Y%m%d}.csv"'
+    return response
 
 
 @api_view(['POST'])
@@ -2039,6 +1973,7 @@ def cancel_subscription(request):
 @api_view(['GET'])
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
+@cached_endpoint('subscription_plans')
 def subscription_plans(request):
     """Get available subscription plans"""
     try:
@@ -2098,58 +2033,52 @@ def subscription_plans(request):
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
 def player_reservations(request):
-    """Get player's own reservations (both court and coach)"""
+    """Get player's own reservations (both court and coach), newest first"""
     try:
-        # Get court reservations
-        court_reservations = Reservation.objects.filter(user=request.user).order_by('-date', '-start_time')
-
-        court_data = []
-        for reservation in court_reservations:
-            court_data.append({
-                'id': reservation.id,
-                'type': 'court',
-                'court_name': reservation.terrain.name,
-                'location': reservation.terrain.location,
-                'date': reservation.date.strftime('%Y-%m-%d'),
-                'start_time': reservation.start_time.strftime('%H:%M'),
-                'end_time': reservation.end_time.strftime('%H:%M'),
-                'price': float(reservation.calculate_price()),
-                'status': 'upcoming' if reservation.date >= timezone.now().date() else 'completed'
-            })
-
-        # Get coach reservations
-        coach_reservations = ReservationCoach.objects.filter(user=request.user).order_by('-date', '-start_time')
+        today = timezone.now().date()
+        start_date = request.GET.get('from')
+        end_date = request.GET.get('to')
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    except ValueError:
+        return JsonResponse({'error': 'from and to must be dates in YYYY-MM-DD format'}, status=400)
 
-        coach_data = []
-        for reservation in coach_reservations:
-            coach_data.append({
-                'id': reservation.id,
-                'type': 'coach',
-                'coach_name': reservation.coach.name,
-                'coach_email': reservation.coach.email,
-                'date': reservation.date.strftime('%Y-%m-%d'),
-                'start_time': reservation.start_time.strftime('%H:%M'),
-                'end_time': reservation.end_time.strftime('%H:%M'),
-                'price': float(reservation.total_price),
-                'status': 'upcoming' if reservation.date >= timezone.now().date() else 'completed'
-            })
+    try:
+        fields = select_fields(request, (
+            'id', 'type', 'court_name', 'location', 'coach_name', 'coach_email',
+            'date', 'start_time', 'end_time', 'price', 'status'
+        ))
+        limit = position = None
+        if is_paginated(request):
+            limit = get_limit(request)
+            position = decode_cursor(request.GET.get('cursor'))
+        rows, next_position = player_timeline(
+            request.user, start_date, end_date, descending=True, limit=limit, position=position
+        )
 
-        # Combine and sort all reservations by date
-        all_reservations = court_data + coach_data
-        all_reservations.sort(key=lambda x: (x['date'], x['start_time']), reverse=True)
+        all_reservations = []
+        for row in rows:
+            entry = timeline_entry(row)
+            entry['status'] = 'upcoming' if row['date'] >= today else 'completed'
+            all_reservations.append(entry)
 
         # Separate upcoming and past reservations
-        upcoming_reservations = [r for r in all_reservations if r['status'] == 'upcoming']
-        past_reservations = [r for r in all_reservations if r['status'] == 'completed']
+        upcoming_reservations = project([r for r in all_reservations if r['status'] == 'upcoming'], fields)
+        past_reservations = project([r for r in all_reservations if r['status'] == 'completed'], fields)
 
-        return JsonResponse({
+        data = {
             'upcoming_reservations': upcoming_reservations,
             'past_reservations': past_reservations,
             'total_reservations': len(all_reservations),
             'upcoming_count': len(upcoming_reservations),
             'past_count': len(past_reservations)
-        })
+        }
+        if is_paginated(request):
+            data['next_cursor'] = encode_cursor(next_position) if next_position else None
+        return JsonResponse(data)
 
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -2160,59 +2089,98 @@ def player_reservations(request):
 def player_upcoming_reservations(request):
     """Get player's upcoming reservations only"""
     try:
-        from datetime import date
-        today = date.today()
+        today = timezone.now().date()
+        limit = position = None
+        if is_paginated(request):
+            limit = get_limit(request)
+            position = decode_cursor(request.GET.get('cursor'))
+        upcoming, next_position = upcoming_reservations(request.user, today, limit=limit, position=position)
+
+        data = {
+            'upcoming_reservations': upcoming,
+            'count': len(upcoming)
+        }
+        if is_paginated(request):
+            data['next_cursor'] = encode_cursor(next_position) if next_position else None
+        return JsonResponse(data)
+
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
 
-        # Get upcoming court reservations
-        upcoming_court = Reservation.objects.filter(
-            user=request.user,
-            date__gte=today
-        ).order_by('date', 'start_time')
 
-        court_data = []
-        for reservation in upcoming_court:
-            court_data.append({
-                'id': reservation.id,
-                'type': 'court',
-                'title': f"Court: {reservation.terrain.name}",
-                'court_name': reservation.terrain.name,
-                'location': reservation.terrain.location,
-                'date': reservation.date.strftime('%Y-%m-%d'),
-                'start_time': reservation.start_time.strftime('%H:%M'),
-                'end_time': reservation.end_time.strftime('%H:%M'),
-                'price': float(reservation.calculate_price()),
-                'icon': '🏟️'
-            })
+# ==================== PLAYER DASHBOARD ====================
 
-        # Get upcoming coach reservations
-        upcoming_coach = ReservationCoach.objects.filter(
-            user=request.user,
-            date__gte=today
-        ).order_by('date', 'start_time')
+async def _jwt_user(request):
+    """The user of the request's bearer token, or None when it is missing or invalid"""
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
 
-        coach_data = []
-        for reservation in upcoming_coach:
-            coach_data.append({
-                'id': reservation.id,
-                'type': 'coach',
-                'title': f"Coach: {reservation.coach.name}",
-                'coach_name': reservation.coach.name,
-                'coach_email': reservation.coach.email,
-                'date': reservation.date.strftime('%Y-%m-%d'),
-                'start_time': reservation.start_time.strftime('%H:%M'),
-                'end_time': reservation.end_time.strftime('%H:%M'),
-                'price': float(reservation.total_price),
-                'icon': '🎾'
-            })
 
-        # Combine and sort by date/time
-        upcoming_reservations = court_data + coach_data
-        upcoming_reservations.sort(key=lambda x: (x['date'], x['start_time']))
+# Long-lived, so each worker thread keeps its database connection between requests
+_dashboard_executor = ThreadPoolExecutor(
+    max_workers=settings.DASHBOARD_SECTION_WORKERS, thread_name_prefix='dashboard-section'
+)
 
-        return JsonResponse({
-            'upcoming_reservations': upcoming_reservations,
-            'count': len(upcoming_reservations)
-        })
 
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+def _run_dashboard_section(recorder, builder, *args, **kwargs):
+    """Build one section on a dashboard worker thread.
+
+    Like a request, each job starts and ends with close_old_connections, so
+    the thread's connection is reused until CONN_MAX_AGE and replaced when
+    broken. Its queries count toward the request's budget.
+    """
+    close_old_connections()
+    try:
+        with record_queries(recorder) if recorder else nullcontext():
+            return builder(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def _dashboard_section(request, builder, *args, **kwargs):
+    job = partial(_run_dashboard_section, getattr(request, 'perf_recorder', None), builder, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_dashboard_executor, job)
+
+
+@require_GET
+async def player_dashboard(request):
+    """Upcoming reservations, weekly spending, notifications and today's coach schedules in one response.
+
+    The four sections are independent reads and are fetched concurrently on
+    the dashboard worker threads, so the response takes about as long as the
+    slowest of them. Upcoming reservations and notifications are capped at
+    API_PAGE_SIZE; their next_cursor continues on
+    /api/player/upcoming-reservations/ and /api/notifications/.
+    """
+    user = await _jwt_user(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided or are invalid'}, status=401)
+
+    today = timezone.now().date()
+    limit = settings.API_PAGE_SIZE
+    try:
+        (upcoming, next_position), spending, notifications, coach_schedules = await asyncio.gather(
+            _dashboard_section(request, upcoming_reservations, user, today, limit=limit),
+            _dashboard_section(request, weekly_spending, user, today),
+            _dashboard_section(request, latest_notifications, user, limit),
+            _dashboard_section(request, todays_coach_schedules, today),
+        )
+    except Exception:
+        logger.exception('Player dashboard failed for user %s', user.id)
+        return JsonResponse({'error': 'Could not load the dashboard'}, status=500)
+
+    return JsonResponse({
+        'upcoming_reservations': {
+            'results': upcoming,
+            'count': len(upcoming),
+            'next_cursor': encode_cursor(next_position) if next_position else None,
+        },
+        'weekly_spending': spending,
+        'notifications': notifications,
+        'todays_coach_schedules': coach_schedules,
+    })
@@ -0,0 +1,182 @@
+import base64
+import threading
+from collections import OrderedDict
+from datetime import time, timedelta
+
+from django.conf import settings
+
+from .caching import terrain_booking_versions
+from .models import Reservation, ReservationCoach
+
+
+def overlapping_bookings(terrain, date, start_time, end_time):
+    """Bookings of the terrain on that date overlapping [start_time, end_time)"""
+    return Reservation.objects.filter(
+        terrain_id=getattr(terrain, 'pk', terrain), date=date, start_time__lt=end_time, end_time__gt=start_time
+    )
+
+
+def is_court_free(terrain, date, start_time, end_time, exclude_id=None):
+    """Return True if [start_time, end_time) overlaps no booking of the terrain on that date.
+
+    A single EXISTS query, answered from the (terrain, date, start_time,
+    end_time) index behind Reservation's unique_together.
+    """
+    bookings = overlapping_bookings(terrain, date, start_time, end_time)
+    if exclude_id is not None:
+        bookings = bookings.exclude(id=exclude_id)
+    return not bookings.exists()
+
+
+def free_gaps(terrain, date):
+    """[(start_time, end_time)] of the terrain's free periods on that date within opening hours.
+
+    One query over the same (terrain, date, start_time, end_time) index,
+    read in start order and swept once. A gap that runs to midnight ends at
+    00:00.
+    """
+    opening = settings.COURT_OPENING_HOUR * 60
+    closing = settings.COURT_CLOSING_HOUR * 60
+    bookings = Reservation.objects.filter(
+        terrain_id=getattr(terrain, 'pk', terrain), date=date
+    ).order_by('start_time').values_list('start_time', 'end_time')
+
+    gaps = []
+    free_from = opening
+    for start_time, end_time in bookings:
+        start, end = _minutes(start_time), _minutes(end_time, is_end=True)
+        if min(start, closing) > free_from:
+            gaps.append((free_from, min(start, closing)))
+        free_from = max(free_from, end)
+    if closing > free_from:
+        gaps.append((free_from, closing))
+    return [(_time(start), _time(end)) for start, end in gaps]
+
+
+def _minutes(value, is_end=False):
+    minutes = value.hour * 60 + value.minute
+    # A booking that ends at 00:00 runs to the end of the day
+    return 24 * 60 if is_end and minutes == 0 else minutes
+
+
+def _time(minutes):
+    return time(minutes // 60 % 24, minutes % 60)
+
+
+def overlapping_coach_sessions(coach, date, start_time, end_time):
+    """Sessions of the coach on that date overlapping [start_time, end_time)"""
+    return ReservationCoach.objects.filter(
+        coach_id=getattr(coach, 'pk', coach), date=date, start_time__lt=end_time, end_time__gt=start_time
+    )
+
+
+def is_coach_free(coach, date, start_time, end_time, exclude_id=None):
+    """Return True if [start_time, end_time) overlaps no session of the coach on that date"""
+    sessions = overlapping_coach_sessions(coach, date, start_time, end_time)
+    if exclude_id is not None:
+        sessions = sessions.exclude(id=exclude_id)
+    return not sessions.exists()
+
+
+# ==================== AVAILABILITY GRID ====================
+
+def grid_shape():
+    """(opening minute, slot minutes, slots per day) of the availability grid"""
+    opening = settings.COURT_OPENING_HOUR * 60
+    slot_minutes = settings.AVAILABILITY_GRID_SLOT_MINUTES
+    slots = (settings.COURT_CLOSING_HOUR * 60 - opening) // slot_minutes
+    return opening, slot_minutes, slots
+
+
+def busy_bitmap(intervals, opening, slot_minutes, slots):
+    """Bitmap of the slots overlapped by any (start_time, end_time) interval; bit i is slot i"""
+    bitmap = 0
+    for start_time, end_time in intervals:
+        start = _minutes(start_time) - opening
+        end = _minutes(end_time, is_end=True) - opening
+        first = max(0, start // slot_minutes)
+        last = min(slots, -(-end // slot_minutes))
+        if first < last:
+            bitmap |= ((1 << (last - first)) - 1) << first
+    return bitmap
+
+
+class _GridCache:
+    """Per-process LRU of day bitmaps keyed by (terrain_id, date, terrain bookings version).
+
+    A booking bumps its terrain's version in the database, which every worker
+    reads, so stale entries are simply never asked for again and age out of
+    the LRU.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        with self._lock:
+            found = {}
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+            return found
+
+    def set_many(self, entries):
+        with self._lock:
+            self._entries.update(entries)
+            for key in entries:
+                self._entries.move_to_end(key)
+            while len(self._entries) > settings.AVAILABILITY_GRID_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+grid_cache = _GridCache()
+
+
+def grid_bookings(terrain_ids, start_date, end_date):
+    return Reservation.objects.filter(
+        terrain_id__in=terrain_ids, date__range=(start_date, end_date)
+    ).values_list('terrain_id', 'date', 'start_time', 'end_time')
+
+
+def availability_grid(terrain_ids, start_date, end_date):
+    """{(terrain_id, date): busy bitmap} for every terrain and day in [start_date, end_date].
+
+    Days missing from the in-process cache are computed from a single range
+    query over Reservation.
+    """
+    shape = opening, slot_minutes, slots = grid_shape()
+    days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    versions = terrain_booking_versions(terrain_ids)
+    keys = {
+        (terrain_id, day): (terrain_id, day, versions[terrain_id], shape)
+        for terrain_id in terrain_ids for day in days
+    }
+
+    cached = grid_cache.get_many(keys.values())
+    grid = {cell: cached[key] for cell, key in keys.items() if key in cached}
+    missing = {terrain_id for (terrain_id, day) in keys.keys() - grid.keys()}
+    if missing:
+        intervals = {}
+        for terrain_id, day, start_time, end_time in grid_bookings(missing, start_date, end_date):
+            intervals.setdefault((terrain_id, day), []).append((start_time, end_time))
+
+        computed = {
+            keys[(terrain_id, day)]: busy_bitmap(intervals.get((terrain_id, day), ()), opening, slot_minutes, slots)
+            for terrain_id in missing for day in days
+        }
+        grid_cache.set_many(computed)
+        grid.update({(terrain_id, day): computed[keys[(terrain_id, day)]] for terrain_id in missing for day in days})
+    return grid
+
+
+def encode_bitmap(bitmap, slots, encoding):
+    """'base64' packs the slots little-endian, bit i of byte i // 8 being slot i; 'array' lists 0/1 per slot"""
+    if encoding == 'array':
+        return [(bitmap >> slot) & 1 for slot in range(slots)]
+    return base64.b64encode(bitmap.to_bytes((slots + 7) // 8, 'little')).decode()
@@ -0,0 +1,99 @@
+import random
+import time as time_module
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.utils import timezone
+
+from .availability import is_court_free
+from .models import Notification, Payment, Reservation, Terrain
+
+# Number of attempts when the terrain lock is contended, and base backoff in seconds
+BOOKING_MAX_ATTEMPTS = 5
+BOOKING_RETRY_BACKOFF = 0.02
+
+# What lock contention looks like: SQLite's messages, and the SQLSTATEs other
+# backends use for serialization failures and deadlocks
+LOCK_ERROR_MESSAGES = ('database is locked', 'database table is locked')
+LOCK_ERROR_SQLSTATES = ('40001', '40P01')
+
+
+class BookingError(Exception):
+    """Raised when a booking can't be made; carries the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def book_court(user, terrain_id, reservation_date, start_time, end_time):
+    """Create a court reservation with its payment and notification atomically.
+
+    The terrain row is locked for the duration of the transaction so that two
+    concurrent requests for the same court are serialized and the overlap
+    check always sees the other booking. Lock contention is retried with a
+    jittered backoff.
+    """
+    for attempt in range(1, BOOKING_MAX_ATTEMPTS + 1):
+        try:
+            return _book_court_once(user, terrain_id, reservation_date, start_time, end_time)
+        except IntegrityError:
+            # Exact duplicate slipped past the check, unique_together caught it
+            raise BookingError('Time slot is already booked')
+        except OperationalError as e:
+            if not _is_lock_error(e):
+                raise
+            if attempt == BOOKING_MAX_ATTEMPTS:
+                raise BookingError('Court is busy, please try again', status=503)
+            time_module.sleep(BOOKING_RETRY_BACKOFF * attempt * (1 + random.random()))
+
+
+def _is_lock_error(error):
+    """Whether an OperationalError is lock contention worth retrying rather than a real failure"""
+    cause = error.__cause__
+    sqlstate = getattr(cause, 'sqlstate', None) or getattr(cause, 'pgcode', None)
+    if sqlstate in LOCK_ERROR_SQLSTATES:
+        return True
+    message = str(error).lower()
+    return any(text in message for text in LOCK_ERROR_MESSAGES)
+
+
+def _book_court_once(user, terrain_id, reservation_date, start_time, end_time):
+    with transaction.atomic():
+        try:
+            terrain = Terrain.objects.select_for_update().get(id=terrain_id)
+        except Terrain.DoesNotExist:
+            raise BookingError('Court not found')
+
+        if not terrain.available:
+            raise BookingError('Court is not available')
+
+        if not is_court_free(terrain, reservation_date, start_time, end_time):
+            raise BookingError('Time slot is already booked')
+
+        reservation = Reservation.objects.create(
+            user=user,
+            terrain=terrain,
+            date=reservation_date,
+            start_time=start_time,
+            end_time=end_time
+        )
+
+        price = reservation.price
+        Payment.objects.create(
+            user=user,
+            payment_type='court_reservation',
+            amount=price,
+            status='completed',
+            transaction_id=f'COURT_{reservation.id}_{int(timezone.now().timestamp())}',
+            description=f'Court reservation: {terrain.name} on {reservation_date}'
+        )
+
+        Notification.objects.create(
+            user=user,
+            title='Court Reservation Confirmed',
+            message=f'Your reservation for {terrain.name} on {reservation_date} from {start_time} to {end_time} has been confirmed.',
+            notification_type='reservation'
+        )
+
+    return reservation, price
@@ -0,0 +1,223 @@
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from core.models import User
+
+from .models import CacheVersion, Coach, Equipment, Terrain, Tournament
+
+
+def coach_dashboard_cache_key(coach_id):
+    return f'coach_dashboard_stats:{coach_id}'
+
+
+def get_cached_coach_dashboard(coach_id):
+    if not settings.COACH_DASHBOARD_CACHE_TTL:
+        return None
+    return cache.get(coach_dashboard_cache_key(coach_id))
+
+
+def set_cached_coach_dashboard(coach_id, data):
+    if settings.COACH_DASHBOARD_CACHE_TTL:
+        cache.set(coach_dashboard_cache_key(coach_id), data, settings.COACH_DASHBOARD_CACHE_TTL)
+
+
+def invalidate_coach_dashboard(coach_id):
+    cache.delete(coach_dashboard_cache_key(coach_id))
+
+
+# ==================== CACHED READ ENDPOINTS ====================
+
+# Models whose writes make a cached endpoint stale
+ENDPOINT_DEPENDENCIES = {
+    'terrains': (Terrain,),
+    'equipment': (Equipment,),
+    # The coach list embeds the linked account
+    'coaches': (Coach, User),
+    'tournaments': (Tournament,),
+    'subscription_plans': (),
+}
+
+# The only fields of these models the endpoints show; a save whose
+# update_fields names none of them (a login stamping last_login) keeps the
+# cached responses
+ENDPOINT_DEPENDENCY_FIELDS = {
+    User: ('username', 'first_name', 'last_name', 'role', 'is_active', 'date_joined'),
+}
+
+
+# Versions live in the CacheVersion table rather than the cache: with the
+# per-process locmem cache each worker would keep its own counter and go on
+# answering 304 and serving responses another worker's write made stale.
+
+def _versions(keys):
+    """{key: version}; 0 for a key that was never bumped"""
+    versions = dict(CacheVersion.objects.filter(key__in=keys).values_list('key', 'version'))
+    return {key: versions.get(key, 0) for key in keys}
+
+
+def _write_version(key):
+    # One upsert, so concurrent bumps of a new key never collide
+    CacheVersion.objects.bulk_create(
+        [CacheVersion(key=key, version=time.time_ns())],
+        update_conflicts=True, unique_fields=['key'], update_fields=['version']
+    )
+
+
+def _bump(key):
+    # After commit, so the writer's transaction holds no lock on the row and a
+    # reader between the write and the bump caches the new rows, never the old
+    transaction.on_commit(lambda: _write_version(key))
+
+
+def _version_key(model):
+    return f'model_version:{model._meta.label_lower}'
+
+
+def model_versions(models):
+    """{model: version} for each model; the version changes on every save or delete of its rows"""
+    keys = {_version_key(model): model for model in models}
+    versions = _versions(list(keys))
+    return {model: versions[key] for key, model in keys.items()}
+
+
+def bump_model_version(model):
+    _bump(_version_key(model))
+
+
+def _terrain_bookings_key(terrain_id):
+    return f'terrain_bookings_version:{terrain_id}'
+
+
+def terrain_booking_versions(terrain_ids):
+    """{terrain_id: version}; the version changes whenever a booking on the terrain is made, moved or cancelled"""
+    keys = {_terrain_bookings_key(terrain_id): terrain_id for terrain_id in terrain_ids}
+    versions = _versions(list(keys))
+    return {terrain_id: versions[key] for key, terrain_id in keys.items()}
+
+
+def bump_terrain_bookings(terrain_id):
+    _bump(_terrain_bookings_key(terrain_id))
+
+
+def endpoint_version(endpoint, request):
+    """Identifies one response of an endpoint: its models' versions plus the query string"""
+    versions = model_versions(ENDPOINT_DEPENDENCIES[endpoint])
+    # Every query string variant (pagination cursor, field selection) is its own response
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    return ':'.join([endpoint] + [str(version) for version in versions.values()] + [query])
+
+
+def endpoint_etag(version):
+    return '"%s"' % hashlib.sha1(version.encode()).hexdigest()
+
+
+def _not_modified(request, etag):
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    client_etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    return any(tag == '*' or tag.removeprefix('W/') == etag for tag in client_etags)
+
+
+def _count(endpoint, outcome):
+    key = f'endpoint_cache:{endpoint}:{outcome}'
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr; losing one sample is fine
+        pass
+
+
+def endpoint_cache_stats():
+    """{endpoint: {'hits', 'misses', 'hit_rate'}} since the counters were last reset"""
+    stats = {}
+    for endpoint in settings.ENDPOINT_CACHE_TTLS:
+        hits = cache.get(f'endpoint_cache:{endpoint}:hits', 0)
+        misses = cache.get(f'endpoint_cache:{endpoint}:misses', 0)
+        stats[endpoint] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+        }
+    return stats
+
+
+def reset_endpoint_cache_stats():
+    cache.delete_many([
+        f'endpoint_cache:{endpoint}:{outcome}'
+        for endpoint in settings.ENDPOINT_CACHE_TTLS for outcome in ('hits', 'misses')
+    ])
+
+
+def conditional_endpoint(endpoint):
+    """Tag successful GET responses of a view with a strong ETag and answer a matching If-None-Match with 304.
+
+    Goes below the authentication decorators so a 304 is never given unauthenticated.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            # Taken before the view reads anything, so a write racing the
+            # response leaves the client with an ETag that is already stale
+            etag = endpoint_etag(endpoint_version(endpoint, request))
+            if _not_modified(request, etag):
+                response = HttpResponseNotModified()
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
+
+
+def cached_endpoint(endpoint):
+    """Serve successful GET responses of a view from the cache for ENDPOINT_CACHE_TTLS[endpoint] seconds.
+
+    Responses also carry an ETag, as with conditional_endpoint. Only for views
+    whose response is the same for every caller; goes below the authentication
+    decorators so the cache is never reached unauthenticated.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            version = endpoint_version(endpoint, request)
+            etag = endpoint_etag(version)
+            if _not_modified(request, etag):
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                return response
+
+            ttl = settings.ENDPOINT_CACHE_TTLS.get(endpoint, 0)
+            key = f'endpoint_cache:{version}'
+            cached = cache.get(key) if ttl else None
+            if cached is not None:
+                _count(endpoint, 'hits')
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                if ttl:
+                    _count(endpoint, 'misses')
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                if ttl and not response.streaming:
+                    cache.set(key, (response.content, response['Content-Type']), ttl)
+            response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
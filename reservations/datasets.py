@@ -0,0 +1,229 @@
+import calendar
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import User
+
+from .facts import rebuild_daily_stats
+from .models import (
+    Coach, Notification, Payment, Reservation, ReservationCoach, Schedule, ScheduleSlot, Terrain
+)
+from .rollups import reconcile_rollups
+
+BATCH_SIZE = 5000
+
+# Password every generated account shares, hashed once rather than per user
+DATASET_PASSWORD = 'dataset-password'
+
+SESSION_HOURS = (9, 10, 11, 14, 15, 16, 17, 18, 19)
+WORKING_DAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday')
+OPENING_MINUTE = 8 * 60
+CLOSING_MINUTE = 22 * 60
+
+# Share of the peak demand at each hour: weekdays fill up at lunch and after
+# work, weekends from mid-morning on
+WEEKDAY_DEMAND = {
+    8: 0.35, 9: 0.4, 10: 0.45, 11: 0.5, 12: 0.7, 13: 0.6, 14: 0.4,
+    15: 0.4, 16: 0.55, 17: 0.85, 18: 1.0, 19: 1.0, 20: 0.9, 21: 0.6,
+}
+WEEKEND_DEMAND = {
+    8: 0.5, 9: 0.8, 10: 0.95, 11: 1.0, 12: 0.9, 13: 0.8, 14: 0.85,
+    15: 0.9, 16: 0.9, 17: 0.85, 18: 0.75, 19: 0.6, 20: 0.45, 21: 0.3,
+}
+
+# Booking lengths in minutes and how often each is picked
+BOOKING_LENGTHS = (60, 90, 120)
+BOOKING_LENGTH_WEIGHTS = (6, 3, 1)
+
+
+class _BulkWriter:
+    """Buffer unsaved rows per model and bulk_create them batch_size at a time.
+
+    bulk_create stamps auto_now_add fields with the current time; for the
+    models in BACKDATED the value set on the row is written back afterwards,
+    one UPDATE per distinct value in the batch.
+    """
+
+    BACKDATED = {Payment: 'payment_date', Notification: 'created_at'}
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.pending = {}
+        self.written = {}
+
+    def add(self, row):
+        batch = self.pending.setdefault(type(row), [])
+        batch.append(row)
+        if len(batch) >= self.batch_size:
+            self.flush(type(row))
+
+    def flush(self, model=None):
+        for batch_model in [model] if model else list(self.pending):
+            batch = self.pending.pop(batch_model, [])
+            if not batch:
+                continue
+            field = self.BACKDATED.get(batch_model)
+            wanted = [getattr(row, field) for row in batch] if field else ()
+            batch_model.objects.bulk_create(batch)
+            self.written[batch_model.__name__] = self.written.get(batch_model.__name__, 0) + len(batch)
+
+            by_value = {}
+            for row, value in zip(batch, wanted):
+                by_value.setdefault(value, []).append(row.pk)
+            for value, pks in by_value.items():
+                batch_model.objects.filter(pk__in=pks).update(**{field: value})
+
+
+def _hours(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+def _demand(day, hour):
+    return (WEEKEND_DEMAND if day.weekday() >= 5 else WEEKDAY_DEMAND).get(hour, 0)
+
+
+def generate_dataset(users=2000, courts=12, coaches=20, days=90, future_days=14, seed=42,
+                     occupancy=0.85, batch_size=BATCH_SIZE, prefix='dataset'):
+    """Bulk-insert a reproducible club: players, courts, coaches with weekly schedules
+    and slots, and court and coach bookings from `days` ago to `future_days` ahead.
+
+    `occupancy` is the chance a court or coach is booked at the busiest hour;
+    other hours scale it by WEEKDAY_DEMAND / WEEKEND_DEMAND, and days further
+    ahead are booked more thinly. A few players book much more than the rest.
+    Court bookings come with their payment and notification, as in booking.py.
+
+    bulk_create bypasses save() and signals, so prices are set explicitly here
+    and the dashboard counters and daily stats are recomputed at the end.
+    Returns {model name: rows written}.
+    """
+    rng = random.Random(seed)
+    today = timezone.now().date()
+    dates = [today + timedelta(days=offset) for offset in range(-days, future_days + 1)]
+    password = make_password(DATASET_PASSWORD)
+    writer = _BulkWriter(batch_size)
+
+    def lead(day):
+        """Share of the eventual bookings of a day already made today"""
+        return max(0.15, 1 - (day - today).days / (future_days + 1)) if day > today else 1
+
+    def noon(day):
+        return timezone.make_aware(datetime.combine(day, time(12)))
+
+    with transaction.atomic():
+        # Only ids are kept, so a million players does not mean a million instances in memory
+        player_ids = []
+        for start in range(0, users, batch_size):
+            player_ids.extend(user.pk for user in User.objects.bulk_create([
+                User(username=f'{prefix}_player_{i}', email=f'{prefix}_player_{i}@tennis.com', password=password,
+                     role='abonnée' if rng.random() < 0.3 else 'joueur')
+                for i in range(start, min(start + batch_size, users))
+            ]))
+        coach_users = User.objects.bulk_create([
+            User(username=f'{prefix}_coach_{i}', email=f'{prefix}_coach_{i}@tennis.com', password=password,
+                 role='coach')
+            for i in range(coaches)
+        ], batch_size=batch_size)
+        writer.written['User'] = len(player_ids) + len(coach_users)
+
+        # Heavy-tailed activity: most players book now and then, a few every week
+        player_weights = list(accumulate(rng.paretovariate(1.2) for _ in player_ids))
+
+        def player():
+            return rng.choices(player_ids, cum_weights=player_weights)[0]
+
+        terrains = Terrain.objects.bulk_create([
+            Terrain(name=f'{prefix.title()} Court {i + 1}', location=f'Block {i // 4 + 1}',
+                    price_per_hour=Decimal(rng.choice([25, 30, 35, 40, 50])))
+            for i in range(courts)
+        ])
+        writer.written['Terrain'] = len(terrains)
+
+        coach_profiles = Coach.objects.bulk_create([
+            Coach(user=user, name=user.username, email=user.email,
+                  price_per_hour=Decimal(rng.choice([50, 60, 70, 80])), experience=rng.randint(1, 20),
+                  specialization='General Tennis Coaching')
+            for user in coach_users
+        ])
+        writer.written['Coach'] = len(coach_profiles)
+
+        # Weekly schedule: one-hour sessions on a random subset of working days
+        schedules = Schedule.objects.bulk_create([
+            Schedule(coach=coach, day_of_week=day, start_time=time(hour), end_time=time(hour + 1),
+                     created_by=coach.user)
+            for coach in coach_profiles
+            for day in rng.sample(WORKING_DAYS, rng.randint(3, len(WORKING_DAYS)))
+            for hour in SESSION_HOURS
+        ], batch_size=batch_size)
+        writer.written['Schedule'] = len(schedules)
+
+        schedules_by_day = {}
+        for schedule in schedules:
+            schedules_by_day.setdefault((schedule.coach_id, schedule.day_of_week), []).append(schedule)
+
+        # Court bookings: walk each court's day from opening, booking or skipping half an hour
+        booking = 0
+        for terrain in terrains:
+            prices = {length: round(terrain.price_per_hour * length / 60, 2) for length in BOOKING_LENGTHS}
+            for day in dates:
+                day_lead = lead(day)
+                minute = OPENING_MINUTE
+                while minute < CLOSING_MINUTE - 60:
+                    length = rng.choices(BOOKING_LENGTHS, weights=BOOKING_LENGTH_WEIGHTS)[0]
+                    chance = occupancy * _demand(day, minute // 60) * day_lead
+                    if minute + length > CLOSING_MINUTE or rng.random() >= chance:
+                        minute += 30
+                        continue
+
+                    user_id = player()
+                    start_time, end_time = _hours(minute), _hours(minute + length)
+                    # Booked up to a week ahead, never after the day itself or in the future
+                    booked_at = noon(min(day - timedelta(days=rng.randint(0, 7)), today))
+                    booking += 1
+                    writer.add(Reservation(
+                        user_id=user_id, terrain=terrain, date=day, start_time=start_time, end_time=end_time,
+                        price=prices[length]
+                    ))
+                    writer.add(Payment(
+                        user_id=user_id, payment_type='court_reservation', amount=prices[length],
+                        status='completed', transaction_id=f'{prefix.upper()}_COURT_{booking}',
+                        description=f'Court reservation: {terrain.name} on {day}', payment_date=booked_at
+                    ))
+                    writer.add(Notification(
+                        user_id=user_id, title='Court Reservation Confirmed',
+                        message=f'Your reservation for {terrain.name} on {day} from {start_time} to {end_time} '
+                                f'has been confirmed.',
+                        notification_type='reservation', is_read=day < today, created_at=booked_at
+                    ))
+                    minute += length
+
+        # Coach slots for every scheduled hour, booked with the same demand curve
+        for coach in coach_profiles:
+            for day in dates:
+                day_name = calendar.day_name[day.weekday()].lower()
+                for schedule in schedules_by_day.get((coach.id, day_name), ()):
+                    chance = occupancy * 0.8 * _demand(day, schedule.start_time.hour) * lead(day)
+                    booked_by = player() if rng.random() < chance else None
+                    if booked_by is not None:
+                        writer.add(ReservationCoach(
+                            user_id=booked_by, coach=coach, date=day,
+                            start_time=schedule.start_time, end_time=schedule.end_time,
+                            total_price=coach.price_per_hour
+                        ))
+                    writer.add(ScheduleSlot(
+                        coach=coach, date=day, start_time=schedule.start_time, end_time=schedule.end_time,
+                        is_booked=booked_by is not None, booked_by_id=booked_by,
+                        created_from_schedule=schedule
+                    ))
+
+        writer.flush()
+
+    # Signals never fired for any of the rows above
+    reconcile_rollups()
+    rebuild_daily_stats()
+    return writer.written
@@ -0,0 +1,88 @@
+import csv
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Payment
+
+PAYMENT_EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('transaction_id', 'transaction_id'),
+    ('payment_date', 'payment_date'),
+    ('payment_type', 'payment_type'),
+    ('status', 'status'),
+    ('amount', 'amount'),
+    ('username', 'user__username'),
+    ('email', 'user__email'),
+    ('description', 'description'),
+)
+
+# A text cell starting with one of these is run as a formula by spreadsheet apps
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'{name} must be a date in YYYY-MM-DD format')
+
+
+def filter_payments(date_from=None, date_to=None, payment_type=None, status=None):
+    """Payments in [date_from, date_to] (inclusive, YYYY-MM-DD), oldest first.
+
+    Dates become half-open datetime bounds so the filter stays a plain range
+    on payment_date rather than a per-row date cast.
+    """
+    payments = Payment.objects.all()
+    if date_from:
+        start = _parse_date(date_from, 'from')
+        payments = payments.filter(payment_date__gte=timezone.make_aware(datetime.combine(start, time.min)))
+    if date_to:
+        end = _parse_date(date_to, 'to') + timedelta(days=1)
+        payments = payments.filter(payment_date__lt=timezone.make_aware(datetime.combine(end, time.min)))
+    if payment_type:
+        if payment_type not in dict(Payment.PAYMENT_TYPES):
+            raise ValueError(f'Unknown payment type: {payment_type}')
+        payments = payments.filter(payment_type=payment_type)
+    if status:
+        if status not in dict(Payment.STATUS_CHOICES):
+            raise ValueError(f'Unknown payment status: {status}')
+        payments = payments.filter(status=status)
+    return payments.order_by('payment_date', 'id')
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted line straight back"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    """Quote text that a spreadsheet would evaluate, so it opens as plain text"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def payment_csv_lines(payments, chunk_size=None):
+    """Yield the CSV export of payments one batch of lines at a time.
+
+    Text cells are escaped against formula injection; numbers and dates are
+    written as they are.
+    """
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+    writer = csv.writer(_Echo())
+    yield writer.writerow([header for header, _ in PAYMENT_EXPORT_COLUMNS])
+
+    rows = payments.values_list(*[field for _, field in PAYMENT_EXPORT_COLUMNS])
+    batch = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        batch.append(writer.writerow([_csv_cell(value) for value in row]))
+        if len(batch) >= chunk_size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
@@ -0,0 +1,241 @@
+import calendar
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+
+from .models import (
+    Coach, DailyCoachStats, DailyCourtStats, Reservation, ReservationCoach, Schedule, Terrain
+)
+
+# Booking model -> (fact model, owner field, count column, amount field)
+FACT_SOURCES = {
+    Reservation: (DailyCourtStats, 'terrain', 'bookings', 'price'),
+    ReservationCoach: (DailyCoachStats, 'coach', 'sessions', 'total_price'),
+}
+
+# Fact model -> the count column that says whether a row still holds any booking
+COUNT_COLUMNS = {fact_model: count_column for fact_model, _, count_column, _ in FACT_SOURCES.values()}
+
+BATCH_SIZE = 2000
+
+
+def _minutes(start_time, end_time):
+    # A booking that ends at 00:00 runs to the end of the day, as on the grid
+    end = end_time.hour * 60 + end_time.minute or 24 * 60
+    return max(0, end - (start_time.hour * 60 + start_time.minute))
+
+
+def fact_fields(model):
+    """Columns of a booking model that its daily stats contribution is computed from"""
+    fact_model, owner, count_column, amount_field = FACT_SOURCES[model]
+    return (f'{owner}_id', 'date', 'start_time', 'end_time', amount_field)
+
+
+def fact_of(instance):
+    """(fact model, row key, measures) a booking contributes, or None if they cannot be read"""
+    # __dict__ rather than getattr so a deferred field never triggers a query
+    if any(name not in instance.__dict__ for name in fact_fields(type(instance))):
+        return None
+    return fact_of_values(type(instance), instance.__dict__)
+
+
+def fact_of_values(model, stored):
+    """fact_of() for a booking given as {column: value}"""
+    fact_model, owner, count_column, amount_field = FACT_SOURCES[model]
+
+    # Views sometimes assign raw strings before saving, and an unsaved
+    # instance still holds the False placeholders some fields default to
+    try:
+        values = {
+            name: model._meta.get_field(name).to_python(stored[name])
+            for name in ('date', 'start_time', 'end_time', amount_field)
+        }
+    except (TypeError, ValidationError):
+        return None
+    if not all(values[name] for name in ('date', 'start_time', 'end_time')):
+        return None
+
+    key = {f'{owner}_id': stored[f'{owner}_id'], 'date': values['date']}
+    measures = {
+        count_column: 1,
+        'booked_minutes': _minutes(values['start_time'], values['end_time']),
+        'revenue': values[amount_field] or Decimal(0),
+    }
+    return fact_model, key, measures
+
+
+def _apply(fact, sign):
+    fact_model, key, measures = fact
+    if fact_model.objects.filter(**key).update(**{
+        name: F(name) + sign * value for name, value in measures.items()
+    }):
+        if sign < 0:
+            # Drop days with nothing left so the table matches a rebuild
+            fact_model.objects.filter(**key, **{f'{COUNT_COLUMNS[fact_model]}__lte': 0}).delete()
+        return
+    if sign < 0:
+        # No row to subtract from: the booking predates the table or its last
+        # rebuild, and a negative row would only be wrong
+        return
+    row, created = fact_model.objects.get_or_create(**key, defaults={
+        name: sign * value for name, value in measures.items()
+    })
+    if not created:
+        fact_model.objects.filter(**key).update(**{
+            name: F(name) + sign * value for name, value in measures.items()
+        })
+
+
+def apply_fact_change(old, new):
+    """Move a booking's contribution from its old day/owner to its new one"""
+    if old == new:
+        return
+    if old is not None:
+        _apply(old, -1)
+    if new is not None:
+        _apply(new, 1)
+
+
+def remove_bookings(bookings):
+    """Subtract a queryset of bookings about to be deleted together from the daily stats.
+
+    Rows are read as values, a few columns at a time, and each day they touch
+    is updated once.
+    """
+    fact_model, owner, count_column, amount_field = FACT_SOURCES[bookings.model]
+    totals = {}
+    for stored in bookings.values(*fact_fields(bookings.model)).iterator(chunk_size=BATCH_SIZE):
+        fact = fact_of_values(bookings.model, stored)
+        if fact is None:
+            continue
+        key, measures = fact[1], fact[2]
+        total = totals.setdefault((key[f'{owner}_id'], key['date']), dict.fromkeys(measures, 0))
+        for name, value in measures.items():
+            total[name] += value
+
+    for (owner_id, day), measures in totals.items():
+        _apply((fact_model, {f'{owner}_id': owner_id, 'date': day}, measures), -1)
+
+
+def rebuild_daily_stats(start_date=None, end_date=None):
+    """Recompute both fact tables, optionally only for [start_date, end_date].
+
+    Returns {fact model: rows written}.
+    """
+    written = {}
+    with transaction.atomic():
+        for source, (fact_model, owner, count_column, amount_field) in FACT_SOURCES.items():
+            bookings = source.objects.all()
+            facts = fact_model.objects.all()
+            if start_date:
+                bookings = bookings.filter(date__gte=start_date)
+                facts = facts.filter(date__gte=start_date)
+            if end_date:
+                bookings = bookings.filter(date__lte=end_date)
+                facts = facts.filter(date__lte=end_date)
+            facts.delete()
+
+            totals = {}
+            rows = bookings.values_list(f'{owner}_id', 'date', 'start_time', 'end_time', amount_field)
+            for owner_id, day, start_time, end_time, amount in rows.iterator(chunk_size=BATCH_SIZE):
+                total = totals.setdefault((owner_id, day), [0, 0, Decimal(0)])
+                total[0] += 1
+                total[1] += _minutes(start_time, end_time)
+                total[2] += amount or 0
+
+            fact_model.objects.bulk_create([
+                fact_model(**{
+                    f'{owner}_id': owner_id, 'date': day,
+                    count_column: count, 'booked_minutes': minutes, 'revenue': revenue,
+                })
+                for (owner_id, day), (count, minutes, revenue) in totals.items()
+            ], batch_size=BATCH_SIZE)
+            written[fact_model] = len(totals)
+    return written
+
+
+def _days(start_date, end_date):
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+def _series(owners, facts, start_date, end_date, count_column, available_minutes):
+    """Per-owner day series with zero-filled gaps and range totals"""
+    by_key = {(row['owner_id'], row['date']): row for row in facts}
+    report = []
+    for owner_id, name in owners:
+        series = []
+        totals = {count_column: 0, 'booked_minutes': 0, 'available_minutes': 0, 'revenue': Decimal(0)}
+        for day in _days(start_date, end_date):
+            row = by_key.get((owner_id, day), {})
+            available = available_minutes(owner_id, day)
+            booked = row.get('booked_minutes', 0)
+            series.append({
+                'date': day.strftime('%Y-%m-%d'),
+                count_column: row.get(count_column, 0),
+                'booked_minutes': booked,
+                'utilization': round(100 * booked / available, 1) if available else None,
+                'revenue': float(row.get('revenue', 0)),
+            })
+            totals[count_column] += row.get(count_column, 0)
+            totals['booked_minutes'] += booked
+            totals['available_minutes'] += available
+            totals['revenue'] += row.get('revenue', 0)
+
+        available = totals.pop('available_minutes')
+        totals['utilization'] = round(100 * totals['booked_minutes'] / available, 1) if available else None
+        totals['revenue'] = float(totals['revenue'])
+        report.append({'id': owner_id, 'name': name, 'totals': totals, 'series': series})
+    return report
+
+
+def stats_in_range(stats_model, start_date, end_date):
+    """Rows of a daily stats table dated in [start_date, end_date]"""
+    return stats_model.objects.filter(date__range=(start_date, end_date))
+
+
+def court_report(start_date, end_date, terrain_id=None):
+    """Daily bookings, utilization (% of opening hours) and revenue per court"""
+    terrains = Terrain.objects.order_by('id')
+    facts = stats_in_range(DailyCourtStats, start_date, end_date)
+    if terrain_id:
+        terrains = terrains.filter(id=terrain_id)
+        facts = facts.filter(terrain_id=terrain_id)
+
+    open_minutes = (settings.COURT_CLOSING_HOUR - settings.COURT_OPENING_HOUR) * 60
+    return _series(
+        terrains.values_list('id', 'name'),
+        facts.values('date', 'bookings', 'booked_minutes', 'revenue', owner_id=F('terrain_id')),
+        start_date, end_date, 'bookings',
+        lambda terrain_id, day: open_minutes,
+    )
+
+
+def coach_report(start_date, end_date, coach_id=None):
+    """Daily sessions, utilization (% of scheduled hours) and revenue per coach"""
+    coaches = Coach.objects.filter(is_active=True).order_by('id')
+    facts = stats_in_range(DailyCoachStats, start_date, end_date)
+    schedules = Schedule.objects.filter(is_active=True)
+    if coach_id:
+        coaches = Coach.objects.filter(id=coach_id)
+        facts = facts.filter(coach_id=coach_id)
+        schedules = schedules.filter(coach_id=coach_id)
+
+    # Weekly schedule minutes per (coach, weekday), the denominator for utilization
+    weekdays = {name.lower(): index for index, name in enumerate(calendar.day_name)}
+    scheduled = {}
+    for owner_id, day_name, start_time, end_time in schedules.values_list(
+        'coach_id', 'day_of_week', 'start_time', 'end_time'
+    ):
+        key = (owner_id, weekdays[day_name])
+        scheduled[key] = scheduled.get(key, 0) + _minutes(start_time, end_time)
+
+    return _series(
+        coaches.values_list('id', 'name'),
+        facts.values('date', 'sessions', 'booked_minutes', 'revenue', owner_id=F('coach_id')),
+        start_date, end_date, 'sessions',
+        lambda owner_id, day: scheduled.get((owner_id, day.weekday()), 0),
+    )
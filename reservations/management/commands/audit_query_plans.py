@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from reservations.query_audit import audit_queries
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN every hot query of the reservation API and fail if any reads a whole table. '
+        'Run against a migrated database before deploying to catch index regressions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', action='store_true', help='Print every query plan, not only failing ones')
+
+    def handle(self, *args, **options):
+        results = audit_queries()
+        failures = [name for name, plan, scans in results if scans]
+
+        for name, plan, scans in results:
+            if scans:
+                self.stdout.write(self.style.ERROR(f"FULL SCAN  {name}: {', '.join(scans)}"))
+            else:
+                self.stdout.write(f'ok         {name}')
+            if scans or options['plans']:
+                for line in plan.splitlines():
+                    self.stdout.write(f'             {line}')
+
+        if failures:
+            raise CommandError(f'{len(failures)} of {len(results)} hot queries scan a whole table on {connection.vendor}')
+        self.stdout.write(self.style.SUCCESS(f'All {len(results)} hot queries use an index on {connection.vendor}'))
@@ -0,0 +1,107 @@
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from datetime import time as dt_time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from reservations.booking import BookingError, book_court
+from reservations.models import Reservation, Terrain
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Fire concurrent bookings at a single court and check for overlaps and tail latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=300, help='Number of booking attempts')
+        parser.add_argument('--workers', type=int, default=32, help='Number of parallel threads')
+        parser.add_argument('--p99-budget-ms', type=float, default=2000.0,
+                            help='Fail if the p99 booking latency exceeds this many milliseconds')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        # Run against a throwaway database so the dev data is never touched
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = f'{tempfile.gettempdir()}/tennis_bench_booking.sqlite3'
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.run(options)
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        booking_date = date.today() + timedelta(days=1)
+
+        terrain = Terrain.objects.create(
+            name='Benchmark Court', location='Benchmark', price_per_hour=40.00
+        )
+        users = [
+            User.objects.create(username=f'bench_booking_{i}', email=f'bench_booking_{i}@tennis.com')
+            for i in range(options['workers'])
+        ]
+
+        # Half-hour starts with 1h or 1h30 durations so most attempts overlap
+        attempts = []
+        for i in range(options['bookings']):
+            start_minutes = 6 * 60 + 30 * rng.randrange(0, 28)
+            end_minutes = start_minutes + rng.choice([60, 90])
+            attempts.append((
+                users[i % len(users)],
+                dt_time(start_minutes // 60, start_minutes % 60),
+                dt_time(end_minutes // 60, end_minutes % 60),
+            ))
+
+        def attempt_booking(args):
+            user, start_time, end_time = args
+            began = time.perf_counter()
+            try:
+                book_court(user, terrain.id, booking_date, start_time, end_time)
+                outcome = 'booked'
+            except BookingError as e:
+                outcome = 'busy' if e.status == 503 else 'conflict'
+            finally:
+                connection.close()
+            return outcome, (time.perf_counter() - began) * 1000
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = list(pool.map(attempt_booking, attempts))
+        elapsed = time.perf_counter() - began
+
+        bookings = list(
+            Reservation.objects.filter(terrain=terrain, date=booking_date)
+            .order_by('start_time').values_list('start_time', 'end_time')
+        )
+        overlaps = sum(
+            1 for previous, current in zip(bookings, bookings[1:]) if current[0] < previous[1]
+        )
+
+        latencies = sorted(latency for _, latency in results)
+        percentiles = statistics.quantiles(latencies, n=100)
+        p99 = percentiles[98]
+        outcomes = [outcome for outcome, _ in results]
+
+        self.stdout.write(f"Attempts: {len(results)} in {elapsed:.2f}s ({len(results) / elapsed:.1f}/s)")
+        self.stdout.write(
+            f"Booked: {outcomes.count('booked')}, conflicts: {outcomes.count('conflict')}, "
+            f"gave up: {outcomes.count('busy')}"
+        )
+        self.stdout.write(
+            f"Latency ms: p50={percentiles[49]:.1f} p95={percentiles[94]:.1f} p99={p99:.1f}"
+        )
+        self.stdout.write(f"Overlapping reservations: {overlaps}")
+
+        if overlaps:
+            raise CommandError(f'{overlaps} overlapping reservations were created')
+        if p99 > options['p99_budget_ms']:
+            raise CommandError(f"p99 latency {p99:.1f}ms exceeds budget of {options['p99_budget_ms']}ms")
+        self.stdout.write(self.style.SUCCESS('No overlaps, latency within budget'))
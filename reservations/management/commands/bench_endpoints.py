@@ -0,0 +1,264 @@
+import io
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import django
+import numpy as np
+from PIL import Image
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import face_index as face_index_module
+from core.models import User
+from reservations.datasets import SESSION_HOURS, generate_dataset
+from reservations.models import Coach, Terrain
+
+SCENARIOS = (
+    'court_reservations', 'book_court', 'book_coach_session', 'todays_coach_schedules',
+    'dashboard_stats_admin', 'dashboard_stats_player', 'player_reservations', 'face_login',
+)
+
+
+def _percentiles(latencies):
+    if len(latencies) < 2:
+        value = latencies[0] if latencies else 0
+        return {'p50': value, 'p95': value, 'p99': value}
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {'p50': round(cuts[49], 2), 'p95': round(cuts[94], 2), 'p99': round(cuts[98], 2)}
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database with a generated club and drive the booking and dashboard endpoints '
+        'through the test client with concurrent workers; prints throughput and latency percentiles as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--courts', type=int, default=12)
+        parser.add_argument('--coaches', type=int, default=20)
+        parser.add_argument('--days', type=int, default=90, help='Days of booking history to generate')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=8, help='Parallel client threads')
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+        parser.add_argument('--face-image', help='Photo to log in with; defaults to generated noise, '
+                                                 'which measures decoding and detection only')
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+
+    def handle(self, *args, **options):
+        scenarios = [name for name in options['scenarios'].split(',') if name]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        # A fresh database per run keeps results comparable between releases
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = f'{tempfile.gettempdir()}/tennis_bench.sqlite3'
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        # The face index sidecar follows the throwaway database, not the real one
+        face_index_dir = tempfile.mkdtemp(prefix='tennis_bench_faces_')
+        face_index_module._face_index = None
+        try:
+            # What a production server runs with; 'testserver' is the test client's host
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                                   FACE_INDEX_DIR=face_index_dir):
+                report = self.run(scenarios, options)
+        finally:
+            face_index_module._face_index = None
+            shutil.rmtree(face_index_dir, ignore_errors=True)
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def run(self, scenarios, options):
+        self.stderr.write('Generating dataset...')
+        started = time.perf_counter()
+        dataset = generate_dataset(
+            users=options['users'], courts=options['courts'], coaches=options['coaches'],
+            days=options['days'], seed=options['seed'], prefix='bench'
+        )
+        seed_seconds = time.perf_counter() - started
+        self.stderr.write(f'  {sum(dataset.values())} rows in {seed_seconds:.1f}s')
+
+        rng = random.Random(options['seed'])
+        self.context = self.build_context(options)
+
+        results = {}
+        for name in scenarios:
+            self.stderr.write(f'Running {name}...')
+            make_request = getattr(self, f'request_{name}')
+            requests = [make_request(rng) for _ in range(options['warmup'] + options['requests'])]
+            self.drive(requests[:options['warmup']], options['concurrency'])
+            results[name] = self.summarize(*self.drive(requests[options['warmup']:], options['concurrency']))
+
+        return {
+            'environment': {
+                'revision': _git_revision(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'cache': settings.CACHES['default']['BACKEND'],
+            },
+            'config': {name: options[name] for name in (
+                'users', 'courts', 'coaches', 'days', 'seed', 'requests', 'warmup', 'concurrency'
+            )},
+            'dataset': {'rows': dataset, 'seconds': round(seed_seconds, 2)},
+            'scenarios': results,
+        }
+
+    def build_context(self, options):
+        players = list(User.objects.filter(username__startswith='bench_player_').order_by('id')[:200])
+        admin = User.objects.create(username='bench_admin', email='bench_admin@tennis.com', role='admin')
+
+        if options['face_image']:
+            with open(options['face_image'], 'rb') as f:
+                face_image = f.read()
+        else:
+            pixels = np.random.default_rng(options['seed']).integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+            buffer = io.BytesIO()
+            Image.fromarray(pixels).save(buffer, format='JPEG')
+            face_image = buffer.getvalue()
+
+        return {
+            'player_tokens': [f'Bearer {AccessToken.for_user(player)}' for player in players],
+            'admin_token': f'Bearer {AccessToken.for_user(admin)}',
+            'terrain_ids': list(Terrain.objects.values_list('id', flat=True)),
+            'coach_ids': list(Coach.objects.values_list('id', flat=True)),
+            'face_image': face_image,
+            'today': timezone.now().date(),
+        }
+
+    # Each request_* returns (method, path, client kwargs) for one randomized request
+
+    def _player(self, rng):
+        return {'HTTP_AUTHORIZATION': rng.choice(self.context['player_tokens'])}
+
+    def request_court_reservations(self, rng):
+        return 'get', reverse('court_reservations'), self._player(rng)
+
+    def request_book_court(self, rng):
+        hour = rng.randrange(8, 21)
+        body = {
+            'terrain_id': rng.choice(self.context['terrain_ids']),
+            'date': str(self.context['today'] + timedelta(days=rng.randint(1, 30))),
+            'start_time': f'{hour:02d}:00',
+            'end_time': f'{hour + 1:02d}:00',
+        }
+        return 'post', reverse('court_reservations'), {
+            'data': json.dumps(body), 'content_type': 'application/json', **self._player(rng)
+        }
+
+    def request_book_coach_session(self, rng):
+        hour = rng.choice(SESSION_HOURS)
+        body = {
+            'coach_id': rng.choice(self.context['coach_ids']),
+            'date': str(self.context['today'] + timedelta(days=rng.randint(1, 30))),
+            'start_time': f'{hour:02d}:00',
+            'end_time': f'{hour + 1:02d}:00',
+        }
+        return 'post', reverse('book_coach_session'), {
+            'data': json.dumps(body), 'content_type': 'application/json', **self._player(rng)
+        }
+
+    def request_todays_coach_schedules(self, rng):
+        return 'get', reverse('get_todays_coach_schedules'), self._player(rng)
+
+    def request_dashboard_stats_admin(self, rng):
+        return 'get', reverse('dashboard_stats'), {'HTTP_AUTHORIZATION': self.context['admin_token']}
+
+    def request_dashboard_stats_player(self, rng):
+        return 'get', reverse('dashboard_stats'), self._player(rng)
+
+    def request_player_reservations(self, rng):
+        return 'get', reverse('player_reservations'), self._player(rng)
+
+    def request_face_login(self, rng):
+        upload = io.BytesIO(self.context['face_image'])
+        upload.name = 'face.jpg'
+        # Identification without an email is for staff, so the front desk calls it
+        return 'post', reverse('face-login'), {
+            'data': {'face_image': upload}, 'HTTP_AUTHORIZATION': self.context['admin_token']
+        }
+
+    def drive(self, requests, concurrency):
+        """Send requests from `concurrency` threads; returns ([(status, ms)], wall seconds)"""
+        local = threading.local()
+
+        def send(request):
+            method, path, kwargs = request
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client(raise_request_exception=False)
+            started = time.perf_counter()
+            response = getattr(client, method)(path, **kwargs)
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+            return response.status_code, (time.perf_counter() - started) * 1000
+
+        # Connections belong to the thread that opened them, so each worker
+        # closes its own once the run is over; between requests they are
+        # kept or dropped by CONN_MAX_AGE, as on a real server
+        all_workers = threading.Barrier(concurrency)
+
+        def close_connections(_):
+            # Waiting for the others makes every worker take exactly one of these
+            all_workers.wait()
+            connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(send, requests))
+            elapsed = time.perf_counter() - started
+            list(pool.map(close_connections, range(concurrency)))
+        return samples, elapsed
+
+    def summarize(self, samples, seconds):
+        latencies = [ms for _, ms in samples]
+        statuses = {}
+        for status, _ in samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        return {
+            'requests': len(samples),
+            'seconds': round(seconds, 3),
+            'throughput_rps': round(len(samples) / seconds, 1) if seconds else None,
+            'status_codes': statuses,
+            'errors': sum(count for status, count in statuses.items() if status.startswith('5')),
+            'latency_ms': {
+                **_percentiles(latencies),
+                'mean': round(statistics.fmean(latencies), 2) if latencies else 0,
+                'max': round(max(latencies), 2) if latencies else 0,
+            },
+        }
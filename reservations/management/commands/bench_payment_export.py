@@ -0,0 +1,92 @@
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reservations.exports import filter_payments, payment_csv_lines
+from reservations.models import Payment
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Export generated payments to CSV and check that peak memory does not grow with row count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Payments to generate')
+        parser.add_argument('--checkpoints', type=int, default=3,
+                            help='Export this many growing prefixes of the table')
+        parser.add_argument('--growth-budget', type=float, default=2.0,
+                            help='Fail if peak memory on the largest export exceeds the smallest by this factor')
+
+    def handle(self, *args, **options):
+        try:
+            # Everything generated here is rolled back at the end
+            with transaction.atomic():
+                self.run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run(self, options):
+        rows = options['rows']
+        user = User.objects.create(username='bench_payment_export', email='bench_payment_export@tennis.com')
+
+        self.stdout.write(f'Generating {rows} payments...')
+        started = time.perf_counter()
+        types = [code for code, _ in Payment.PAYMENT_TYPES]
+        batch = []
+        for i in range(rows):
+            batch.append(Payment(
+                user=user,
+                payment_type=types[i % len(types)],
+                amount=Decimal(10 + i % 90),
+                status='completed',
+                transaction_id=f'BENCH_{i}',
+                description=f'Benchmark payment {i}',
+            ))
+            if len(batch) == 10000:
+                Payment.objects.bulk_create(batch)
+                batch = []
+        Payment.objects.bulk_create(batch)
+        self.stdout.write(f'  done in {time.perf_counter() - started:.1f}s')
+
+        first_id = Payment.objects.filter(user=user).order_by('id').values_list('id', flat=True).first()
+        # Exports smaller than a few chunks never reach steady state, so they make a poor baseline
+        sizes = [rows // 10 ** step for step in reversed(range(options['checkpoints']))]
+        sizes = [size for size in sizes if size >= 5 * settings.STREAM_CHUNK_SIZE] or [rows]
+
+        self.stdout.write(f"{'rows':>10}{'seconds':>10}{'rows/s':>12}{'peak MB':>10}{'CSV MB':>10}")
+        peaks = []
+        for size in sizes:
+            payments = filter_payments().filter(user=user, id__lt=first_id + size)
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            written = 0
+            for chunk in payment_csv_lines(payments):
+                # Stand-in for a socket or file: the chunk is dropped once counted
+                written += len(chunk)
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            peaks.append(peak)
+            self.stdout.write(
+                f'{size:>10}{elapsed:>10.2f}{size / elapsed:>12.0f}{peak / 2 ** 20:>10.1f}{written / 2 ** 20:>10.1f}'
+            )
+
+        growth = peaks[-1] / peaks[0]
+        if growth > options['growth_budget']:
+            raise CommandError(f'Peak memory grew {growth:.1f}x from {sizes[0]} to {sizes[-1]} rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'Peak memory grew {growth:.2f}x while rows grew {sizes[-1] / sizes[0]:.0f}x'
+        ))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reservations.exports import filter_payments, payment_csv_lines
+
+
+class Command(BaseCommand):
+    help = 'Export payments as CSV, streamed in chunks so memory stays flat for any row count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='First payment date (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Last payment date (YYYY-MM-DD)')
+        parser.add_argument('--type', dest='payment_type', help='Only this payment type')
+        parser.add_argument('--status', help='Only this payment status')
+        parser.add_argument('--output', '-o', help='File to write (defaults to stdout)')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows fetched per round trip')
+
+    def handle(self, *args, **options):
+        try:
+            payments = filter_payments(
+                date_from=options['date_from'],
+                date_to=options['date_to'],
+                payment_type=options['payment_type'],
+                status=options['status'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        chunks = payment_csv_lines(payments, options['chunk_size'])
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(options['output'], 'w', newline='') as output:
+            for chunk in chunks:
+                output.write(chunk)
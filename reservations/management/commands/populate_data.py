@@ -9,7 +9,7 @@ from decimal import Decimal
 User = get_user_model()
 
 class Command(BaseCommand):
-    help = 'Populate database with sample data'
+    help = 'Populate database with a few fixed sample rows; use generate_dataset for benchmark-scale data'
 
     def handle(self, *args, **kwargs):
         self.stdout.write('Creating sample data...')
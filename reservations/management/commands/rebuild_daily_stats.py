@@ -0,0 +1,38 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reservations.facts import rebuild_daily_stats
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date {value!r}, expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the daily court and coach stats from the booking tables. '
+        'Run once after deploying to seed history; afterwards bookings keep them current.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Last day to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        start_date = _date(options['date_from']) if options['date_from'] else None
+        end_date = _date(options['date_to']) if options['date_to'] else None
+        if start_date and end_date and start_date > end_date:
+            raise CommandError('--from must not be after --to')
+
+        started = time.perf_counter()
+        written = rebuild_daily_stats(start_date, end_date)
+        elapsed = time.perf_counter() - started
+
+        for fact_model, rows in written.items():
+            self.stdout.write(f'  {fact_model.__name__}: {rows} rows')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt daily stats in {elapsed:.2f}s'))
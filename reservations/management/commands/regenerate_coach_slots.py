@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from reservations.models import Coach
+from reservations.slots import generate_schedule_slots_for_coach
+
+
+class Command(BaseCommand):
+    help = 'Materialize schedule slots for every active coach from their weekly schedules'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Days ahead to materialize (defaults to COACH_SLOT_HORIZON_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=50, help='Coaches per batch')
+        parser.add_argument('--workers', type=int, default=4, help='Batches processed in parallel')
+
+    def handle(self, *args, **options):
+        coach_ids = list(Coach.objects.filter(is_active=True).values_list('id', flat=True))
+        batch_size = options['batch_size']
+        batches = [coach_ids[i:i + batch_size] for i in range(0, len(coach_ids), batch_size)]
+
+        self.stdout.write(f'Regenerating slots for {len(coach_ids)} coaches in {len(batches)} batches...')
+        started = time.perf_counter()
+
+        def run_batch(batch):
+            try:
+                created = 0
+                for coach in Coach.objects.filter(id__in=batch):
+                    created += generate_schedule_slots_for_coach(coach, days=options['days'])
+                return len(batch), created
+            finally:
+                connection.close()
+
+        coaches_done = 0
+        slots_created = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            futures = [pool.submit(run_batch, batch) for batch in batches]
+            for future in as_completed(futures):
+                batch_coaches, batch_created = future.result()
+                coaches_done += batch_coaches
+                slots_created += batch_created
+                self.stdout.write(
+                    f'  {coaches_done}/{len(coach_ids)} coaches, {slots_created} slots created '
+                    f'({time.perf_counter() - started:.2f}s)'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {slots_created} slots for {len(coach_ids)} coaches in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,96 @@
+import os
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reservations.models import Coach
+from reservations.slots import generate_schedule_slots_for_coach, prune_stale_slots
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class Command(BaseCommand):
+    help = (
+        'Extend every active coach\'s slot horizon and prune stale unbooked slots. '
+        'Safe to run from cron: overlapping runs exit immediately.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Days ahead to materialize (defaults to COACH_SLOT_HORIZON_DAYS)')
+        parser.add_argument('--retention-days', type=int, default=None,
+                            help='Unbooked slots older than this are deleted (defaults to COACH_SLOT_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Slots deleted per statement')
+        parser.add_argument('--lock-file', default=os.path.join(settings.BASE_DIR, 'roll_coach_slots.lock'))
+
+    def handle(self, *args, **options):
+        lock_file = options['lock_file']
+        with self.lock(lock_file) as acquired:
+            if not acquired:
+                self.stdout.write(self.style.WARNING(f'Another run holds {lock_file}, skipping'))
+                return
+            self.roll(options)
+
+    @contextmanager
+    def lock(self, lock_file):
+        """Yield whether this run holds an exclusive lock on lock_file.
+
+        The lock lives on the open descriptor, so the OS drops it when a run
+        exits or crashes and there is never a stale lock to take over. The
+        file itself stays in place: deleting it would let a later run lock a
+        fresh file while an earlier one still holds the old one.
+        """
+        try:
+            f = open(lock_file, 'a+b')
+        except OSError as e:
+            raise CommandError(f'Could not open lock file {lock_file}: {e}')
+        with f:
+            try:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def roll(self, options):
+        today = date.today()
+        retention_days = options['retention_days']
+        if retention_days is None:
+            retention_days = settings.COACH_SLOT_RETENTION_DAYS
+
+        started = time.perf_counter()
+        coaches = Coach.objects.filter(is_active=True).only('id')
+        coach_count = 0
+        created = 0
+        for coach in coaches.iterator(chunk_size=200):
+            created += generate_schedule_slots_for_coach(coach, start_date=today, days=options['days'])
+            coach_count += 1
+        self.stdout.write(
+            f'Created {created} slots for {coach_count} coaches ({time.perf_counter() - started:.2f}s)'
+        )
+
+        started = time.perf_counter()
+        deleted = prune_stale_slots(today - timedelta(days=retention_days), options['batch_size'])
+        self.stdout.write(
+            f'Deleted {deleted} unbooked slots older than {retention_days} days '
+            f'({time.perf_counter() - started:.2f}s)'
+        )
+        self.stdout.write(self.style.SUCCESS('Coach slots rolled forward'))
@@ -0,0 +1,265 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:03
+
+import calendar
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_schedule_columns(apps, schema_editor):
+    """Existing schedules predate created_by and day_of_week.
+
+    Each is credited to its coach's account, or else to the first superuser
+    or admin, and takes its weekday from the date column removed below.
+    """
+    Schedule = apps.get_model('reservations', 'Schedule')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    schedules = Schedule.objects.select_related('coach').order_by('id')
+    if not schedules.exists():
+        return
+
+    fallback = (
+        User.objects.filter(is_superuser=True).order_by('id').values_list('id', flat=True).first()
+        or User.objects.filter(role='admin').order_by('id').values_list('id', flat=True).first()
+    )
+    for schedule in schedules.iterator(chunk_size=2000):
+        schedule.created_by_id = schedule.coach.user_id or fallback
+        if schedule.created_by_id is None:
+            raise RuntimeError(
+                f'Schedule {schedule.id} has no coach account to credit as its creator; '
+                f'create a superuser and run the migration again'
+            )
+        schedule.day_of_week = calendar.day_name[schedule.date.weekday()].lower()
+        schedule.save(update_fields=['created_by', 'day_of_week'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Equipment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('type', models.CharField(choices=[('racket', 'Tennis Racket'), ('balls', 'Tennis Balls'), ('shoes', 'Tennis Shoes'), ('bag', 'Tennis Bag'), ('strings', 'Racket Strings'), ('grip', 'Racket Grip')], max_length=20)),
+                ('brand', models.CharField(max_length=50)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('stock_quantity', models.IntegerField(default=0)),
+                ('description', models.TextField(blank=True)),
+                ('image', models.ImageField(blank=True, null=True, upload_to='equipment/')),
+                ('available', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='schedule',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='coach',
+            name='bio',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='coach',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='coach',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='coach',
+            name='specialization',
+            field=models.CharField(blank=True, max_length=200, null=True),
+        ),
+        migrations.AddField(
+            model_name='coach',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='coach_profile', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='created_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='created_schedules', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='day_of_week',
+            field=models.CharField(choices=[('monday', 'Monday'), ('tuesday', 'Tuesday'), ('wednesday', 'Wednesday'), ('thursday', 'Thursday'), ('friday', 'Friday'), ('saturday', 'Saturday'), ('sunday', 'Sunday')], default='monday', max_length=10),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='coach',
+            name='experience',
+            field=models.IntegerField(default=1, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coach',
+            name='price_per_hour',
+            field=models.DecimalField(decimal_places=2, default=50.0, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='schedule',
+            name='end_time',
+            field=models.TimeField(),
+        ),
+        migrations.AlterField(
+            model_name='schedule',
+            name='start_time',
+            field=models.TimeField(),
+        ),
+        migrations.RunPython(fill_schedule_columns, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='schedule',
+            name='created_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='created_schedules', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='EquipmentOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=1)),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], default='pending', max_length=20)),
+                ('order_date', models.DateTimeField(auto_now_add=True)),
+                ('delivery_address', models.TextField()),
+                ('notes', models.TextField(blank=True)),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reservations.equipment')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=100)),
+                ('message', models.TextField()),
+                ('notification_type', models.CharField(choices=[('reservation', 'Reservation'), ('tournament', 'Tournament'), ('equipment', 'Equipment'), ('subscription', 'Subscription'), ('general', 'General')], max_length=20)),
+                ('is_read', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_type', models.CharField(choices=[('reservation', 'Court Reservation'), ('coach', 'Coach Session'), ('equipment', 'Equipment Purchase'), ('subscription', 'Subscription'), ('tournament', 'Tournament Entry')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed'), ('refunded', 'Refunded')], default='pending', max_length=20)),
+                ('payment_date', models.DateTimeField(auto_now_add=True)),
+                ('transaction_id', models.CharField(max_length=100, unique=True)),
+                ('description', models.TextField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Subscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plan_type', models.CharField(choices=[('basic', 'Basic Plan'), ('premium', 'Premium Plan'), ('vip', 'VIP Plan')], max_length=20)),
+                ('start_date', models.DateTimeField(auto_now_add=True)),
+                ('end_date', models.DateTimeField()),
+                ('status', models.CharField(choices=[('active', 'Active'), ('expired', 'Expired'), ('cancelled', 'Cancelled')], default='active', max_length=20)),
+                ('monthly_price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('auto_renew', models.BooleanField(default=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tournament',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField()),
+                ('tournament_type', models.CharField(choices=[('singles', 'Singles'), ('doubles', 'Doubles'), ('mixed', 'Mixed Doubles')], max_length=20)),
+                ('start_date', models.DateTimeField()),
+                ('end_date', models.DateTimeField()),
+                ('registration_deadline', models.DateTimeField()),
+                ('max_participants', models.IntegerField()),
+                ('entry_fee', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('prize_money', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('upcoming', 'Upcoming'), ('ongoing', 'Ongoing'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='upcoming', max_length=20)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='created_tournaments', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name='schedule',
+            name='date',
+        ),
+        migrations.RemoveField(
+            model_name='schedule',
+            name='is_booked',
+        ),
+        migrations.CreateModel(
+            name='ScheduleSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('is_booked', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booked_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='booked_slots', to=settings.AUTH_USER_MODEL)),
+                ('coach', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_slots', to='reservations.coach')),
+                ('created_from_schedule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='reservations.schedule')),
+            ],
+            options={
+                'db_table': 'coach_schedule_slots',
+                'unique_together': {('coach', 'date', 'start_time', 'end_time')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TournamentRegistration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('registration_date', models.DateTimeField(auto_now_add=True)),
+                ('paid', models.BooleanField(default=False)),
+                ('partner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tournament_partnerships', to=settings.AUTH_USER_MODEL)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reservations.tournament')),
+            ],
+            options={
+                'unique_together': {('tournament', 'player')},
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='schedule',
+            unique_together={('coach', 'day_of_week', 'start_time', 'end_time')},
+        ),
+    ]
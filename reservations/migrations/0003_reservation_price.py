@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:04
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_prices(apps, schema_editor):
+    # Same arithmetic as Reservation.calculate_price at the time of writing
+    Reservation = apps.get_model('reservations', 'Reservation')
+    rows = Reservation.objects.filter(price__isnull=True).values_list(
+        'id', 'start_time', 'end_time', 'terrain__price_per_hour'
+    )
+    batch = []
+    for reservation_id, start_time, end_time, price_per_hour in rows.iterator(chunk_size=2000):
+        start = timedelta(hours=start_time.hour, minutes=start_time.minute)
+        end = timedelta(hours=end_time.hour, minutes=end_time.minute)
+        duration = max((end - start).seconds / 3600, 1)
+        price = round(Decimal(duration * float(price_per_hour)), 2)
+        batch.append(Reservation(id=reservation_id, price=price))
+        if len(batch) >= 2000:
+            Reservation.objects.bulk_update(batch, ['price'])
+            batch = []
+    Reservation.objects.bulk_update(batch, ['price'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0002_sync_models'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.RunPython(backfill_prices, migrations.RunPython.noop),
+    ]
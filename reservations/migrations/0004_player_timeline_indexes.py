@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0003_reservation_price'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'date', 'start_time'], name='reservation_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservationcoach',
+            index=models.Index(fields=['user', 'date', 'start_time'], name='coach_res_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0005_dashboard_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCoachStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('sessions', models.IntegerField(default=0)),
+                ('booked_minutes', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('coach', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='reservations.coach')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='daily_coach_stats_date_idx')],
+                'unique_together': {('coach', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCourtStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('bookings', models.IntegerField(default=0)),
+                ('booked_minutes', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('terrain', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='reservations.terrain')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='daily_court_stats_date_idx')],
+                'unique_together': {('terrain', 'date')},
+            },
+        ),
+    ]
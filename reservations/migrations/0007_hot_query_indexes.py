@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0006_daily_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipmentorder',
+            index=models.Index(fields=['user', 'order_date'], name='order_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at'], name='notification_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', 'payment_date'], name='payment_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_date'], name='payment_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservationcoach',
+            index=models.Index(fields=['coach', 'date', 'start_time'], name='coach_res_coach_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservationcoach',
+            index=models.Index(fields=['date', 'start_time'], name='coach_res_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['coach', 'is_active'], name='schedule_coach_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduleslot',
+            index=models.Index(fields=['coach', 'is_booked', 'date'], name='slot_coach_booked_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduleslot',
+            index=models.Index(fields=['date', 'start_time'], name='slot_date_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['status', 'start_date'], name='tournament_status_start_idx'),
+        ),
+    ]
@@ -1,9 +1,24 @@
 from datetime import timedelta, datetime
 from decimal import Decimal
 from django.db import models
+from django.dispatch import Signal
 from django.utils import timezone
 from core.models import User
 
+# Sent after instance.delete() on the models using DirectDeleteSignalMixin,
+# but not when their rows go with a cascade or a queryset delete. Unlike
+# post_delete, listening to it leaves those cascades free to remove the rows
+# in one query; the pre_delete receivers of the parents account for them.
+instance_deleted = Signal()
+
+
+class DirectDeleteSignalMixin:
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        instance_deleted.send(sender=type(self), instance=self)
+        return result
+
+
 # Terrain Model
 class Terrain(models.Model):
     name = models.CharField(max_length=100)
@@ -14,22 +29,48 @@ class Terrain(models.Model):
     def __str__(self):
         return self.name
 
-class Reservation(models.Model):
+class Reservation(DirectDeleteSignalMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     terrain = models.ForeignKey(Terrain, on_delete=models.CASCADE)
     date = models.DateField()
     start_time = models.TimeField()
     end_time = models.TimeField()
+    # Fixed when the reservation is made, so listings never recompute it
+    price = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
 
     class Meta:
         unique_together = ('terrain', 'date', 'start_time', 'end_time')
+        indexes = [
+            # Player timeline: one player's bookings by date
+            models.Index(fields=['user', 'date', 'start_time'], name='reservation_user_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # A new booking is priced at the court's current rate
+        if self.price is None:
+            self.price = round(Decimal(self.calculate_price()), 2)
+        super().save(*args, **kwargs)
+
+    def reschedule(self, terrain, date, start_time, end_time):
+        """Move the booking without saving it.
+
+        On the same court the price scales with the new duration at the rate
+        it was booked at; on another court it is priced at that court's
+        current rate.
+        """
+        booked_hours = self.billed_hours() if self.price is not None and terrain.pk == self.terrain_id else None
+        self.terrain, self.date, self.start_time, self.end_time = terrain, date, start_time, end_time
+        if booked_hours is None:
+            self.price = round(Decimal(self.calculate_price()), 2)
+        else:
+            self.price = round(self.price * Decimal(self.billed_hours()) / Decimal(booked_hours), 2)
 
     def __str__(self):
         username = self.user.username if self.user else "Anonymous"
         return f"{username} - {self.terrain.name} ({self.date} {self.start_time}-{self.end_time})"
 
-    def calculate_price(self):
-        """Calculate the total price for the reservation"""
+    def billed_hours(self):
+        """Length of the booking in hours, charged for at least one"""
         # Handle both time objects and string inputs
         if isinstance(self.start_time, str):
             start_time = datetime.strptime(self.start_time, '%H:%M').time()
@@ -48,9 +89,12 @@ class Reservation(models.Model):
 
         if duration < 1:
             duration = 1
+        return duration
 
+    def calculate_price(self):
+        """Calculate the total price for the reservation"""
         # Convert Decimal to float for calculation
-        total_price = duration * float(self.terrain.price_per_hour)
+        total_price = self.billed_hours() * float(self.terrain.price_per_hour)
 
         return total_price
     
@@ -85,7 +129,7 @@ class Coach(models.Model):
 
 
     
-class ReservationCoach(models.Model):
+class ReservationCoach(DirectDeleteSignalMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     coach = models.ForeignKey(Coach, on_delete=models.CASCADE)  # This should be directly referencing Coach
     date = models.DateField(default=False)
@@ -95,6 +139,13 @@ class ReservationCoach(models.Model):
 
     class Meta:
         db_table = 'reservations_coach'  # Use the actual table name from migration
+        indexes = [
+            models.Index(fields=['user', 'date', 'start_time'], name='coach_res_user_date_idx'),
+            # Overlap checks and the coach dashboard: one coach's sessions by date
+            models.Index(fields=['coach', 'date', 'start_time'], name='coach_res_coach_date_idx'),
+            # Today's sessions across all coaches
+            models.Index(fields=['date', 'start_time'], name='coach_res_date_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         duration = (self.end_time.hour + self.end_time.minute / 60) - (self.start_time.hour + self.start_time.minute / 60)
@@ -132,9 +183,12 @@ class Schedule(models.Model):
     class Meta:
         db_table = 'reservations_coach_model'  # Use the actual table name from migration
         unique_together = ['coach', 'day_of_week', 'start_time', 'end_time']
+        indexes = [
+            models.Index(fields=['coach', 'is_active'], name='schedule_coach_active_idx'),
+        ]
 
 
-class ScheduleSlot(models.Model):
+class ScheduleSlot(DirectDeleteSignalMixin, models.Model):
     """Individual time slots for specific dates based on coach schedules"""
     coach = models.ForeignKey(Coach, on_delete=models.CASCADE, related_name="schedule_slots")
     date = models.DateField()
@@ -152,6 +206,12 @@ class ScheduleSlot(models.Model):
     class Meta:
         db_table = 'coach_schedule_slots'
         unique_together = ['coach', 'date', 'start_time', 'end_time']
+        indexes = [
+            # A coach's free (or booked) slots over a date range
+            models.Index(fields=['coach', 'is_booked', 'date'], name='slot_coach_booked_date_idx'),
+            # Today's slots across all coaches, and pruning of past slots
+            models.Index(fields=['date', 'start_time'], name='slot_date_start_idx'),
+        ]
 
 
 # Equipment Model
@@ -180,7 +240,7 @@ class Equipment(models.Model):
 
 
 # Equipment Order Model
-class EquipmentOrder(models.Model):
+class EquipmentOrder(DirectDeleteSignalMixin, models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('confirmed', 'Confirmed'),
@@ -198,6 +258,11 @@ class EquipmentOrder(models.Model):
     delivery_address = models.TextField()
     notes = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'order_date'], name='order_user_date_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         self.total_price = self.quantity * self.equipment.price
         super().save(*args, **kwargs)
@@ -263,12 +328,18 @@ class Tournament(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='upcoming')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_tournaments')
 
+    class Meta:
+        indexes = [
+            # Open tournaments in start order
+            models.Index(fields=['status', 'start_date'], name='tournament_status_start_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.tournament_type})"
 
 
 # Tournament Registration Model
-class TournamentRegistration(models.Model):
+class TournamentRegistration(DirectDeleteSignalMixin, models.Model):
     tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE)
     player = models.ForeignKey(User, on_delete=models.CASCADE)
     partner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='tournament_partnerships')
@@ -301,13 +372,16 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='notification_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title}"
 
 
 # Payment Model
-class Payment(models.Model):
+class Payment(DirectDeleteSignalMixin, models.Model):
     PAYMENT_TYPES = [
         ('reservation', 'Court Reservation'),
         ('coach', 'Coach Session'),
@@ -331,5 +405,67 @@ class Payment(models.Model):
     transaction_id = models.CharField(max_length=100, unique=True)
     description = models.TextField()
 
+    class Meta:
+        indexes = [
+            # A user's payment history, newest first
+            models.Index(fields=['user', 'payment_date'], name='payment_user_date_idx'),
+            # Date-range exports across all users
+            models.Index(fields=['payment_date'], name='payment_date_idx'),
+        ]
+
     def __str__(self):
         return f"Payment #{self.id} - {self.user.username} - ${self.amount}"
+
+
+# Dashboard Counter Model
+class DashboardCounter(models.Model):
+    """One precomputed dashboard figure, kept current by reservations.rollups"""
+    key = models.CharField(max_length=100, unique=True)
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+# Cache Version Model
+class CacheVersion(models.Model):
+    """Version of a group of cached responses, kept in the database so every worker sees the same one"""
+    key = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} @ {self.version}"
+
+
+# Daily fact tables for utilization and revenue reports
+class DailyCourtStats(models.Model):
+    """Bookings on one court on one day, kept current by reservations.facts"""
+    terrain = models.ForeignKey(Terrain, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    bookings = models.IntegerField(default=0)
+    booked_minutes = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('terrain', 'date')
+        indexes = [models.Index(fields=['date'], name='daily_court_stats_date_idx')]
+
+    def __str__(self):
+        return f"{self.terrain_id} on {self.date}: {self.bookings} bookings"
+
+
+class DailyCoachStats(models.Model):
+    """Sessions with one coach on one day, kept current by reservations.facts"""
+    coach = models.ForeignKey(Coach, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    sessions = models.IntegerField(default=0)
+    booked_minutes = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('coach', 'date')
+        indexes = [models.Index(fields=['date'], name='daily_coach_stats_date_idx')]
+
+    def __str__(self):
+        return f"{self.coach_id} on {self.date}: {self.sessions} sessions"
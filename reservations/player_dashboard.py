@@ -0,0 +1,200 @@
+from datetime import timedelta
+
+from django.db.models import Sum
+
+from core.pagination import encode_cursor, keyset_page
+
+from .models import Coach, Notification, Reservation, ReservationCoach, ScheduleSlot
+from .timeline import player_timeline, timeline_entry
+
+NOTIFICATION_FIELDS = ('id', 'title', 'message', 'notification_type', 'is_read', 'created_at')
+NOTIFICATION_ORDERING = ('-created_at', '-id')
+
+
+def upcoming_reservations(user, today, limit=None, position=None):
+    """A player's court and coach bookings from today on; returns (entries, next_position)"""
+    rows, next_position = player_timeline(user, start_date=today, limit=limit, position=position)
+
+    entries = []
+    for row in rows:
+        entry = timeline_entry(row)
+        if row['kind'] == 'court':
+            entry['title'] = f"Court: {row['name']}"
+            entry['icon'] = '🏟️'
+        else:
+            entry['title'] = f"Coach: {row['name']}"
+            entry['icon'] = '🎾'
+        entries.append(entry)
+    return entries, next_position
+
+
+def week_bookings(user, start_of_week, end_of_week):
+    """(court bookings, coach bookings) of a player dated in [start_of_week, end_of_week]"""
+    return (
+        Reservation.objects.filter(user=user, date__gte=start_of_week, date__lte=end_of_week),
+        ReservationCoach.objects.filter(user=user, date__gte=start_of_week, date__lte=end_of_week),
+    )
+
+
+def weekly_spending(user, today):
+    """A player's court and coach spending this week (Monday to Sunday) and today's sessions"""
+    start_of_week = today - timedelta(days=today.weekday())
+    end_of_week = start_of_week + timedelta(days=6)
+
+    court_reservations, coach_reservations = week_bookings(user, start_of_week, end_of_week)
+
+    court_spending = float(court_reservations.aggregate(total=Sum('price'))['total'] or 0)
+    coach_spending = float(coach_reservations.aggregate(total=Sum('total_price'))['total'] or 0)
+
+    today_court_sessions = court_reservations.filter(date=today).select_related('terrain')
+    today_coach_sessions = coach_reservations.filter(date=today).select_related('coach')
+
+    todays_sessions = []
+    for session in today_court_sessions:
+        todays_sessions.append({
+            'type': 'court',
+            'title': f'Court: {session.terrain.name}',
+            'time': f"{session.start_time.strftime('%H:%M')} - {session.end_time.strftime('%H:%M')}",
+            'price': float(session.price),
+            'status': 'confirmed'
+        })
+    for session in today_coach_sessions:
+        todays_sessions.append({
+            'type': 'coach',
+            'title': f'Coach: {session.coach.name}',
+            'time': f"{session.start_time.strftime('%H:%M')} - {session.end_time.strftime('%H:%M')}",
+            'price': float(session.total_price) if session.total_price else 0,
+            'status': 'confirmed'
+        })
+    todays_sessions.sort(key=lambda x: x['time'])
+
+    return {
+        'week_period': {
+            'start_date': start_of_week.strftime('%Y-%m-%d'),
+            'end_date': end_of_week.strftime('%Y-%m-%d')
+        },
+        'spending': {
+            'court_spending': court_spending,
+            'coach_spending': coach_spending,
+            'total_spending': court_spending + coach_spending
+        },
+        'sessions_count': {
+            'court_sessions': len(today_court_sessions),
+            'coach_sessions': len(today_coach_sessions),
+            'total_sessions': len(todays_sessions)
+        },
+        'todays_sessions': todays_sessions
+    }
+
+
+def notifications_for(user):
+    return Notification.objects.filter(user=user)
+
+
+def latest_notifications(user, limit):
+    """A player's newest notifications, a cursor for /api/notifications/ to continue from, and the unread count"""
+    rows, position = keyset_page(
+        notifications_for(user).values(*NOTIFICATION_FIELDS), NOTIFICATION_ORDERING, limit
+    )
+    return {
+        'results': rows,
+        'next_cursor': encode_cursor(position) if position else None,
+        'unread_count': Notification.objects.filter(user=user, is_read=False).count(),
+    }
+
+
+def day_slots(day):
+    """Slots of every active coach on a day, earliest first"""
+    return ScheduleSlot.objects.filter(date=day, coach__is_active=True).order_by('start_time').values(
+        'id', 'coach_id', 'start_time', 'end_time'
+    )
+
+
+def day_sessions(day):
+    """Sessions of every active coach on a day with the player, earliest first"""
+    return ReservationCoach.objects.filter(date=day, coach__is_active=True).order_by('start_time').values(
+        'coach_id', 'start_time', 'end_time', 'total_price', 'user__username'
+    )
+
+
+def todays_coach_schedules(today):
+    """Every active coach's slots for today with who booked them, and totals across coaches"""
+    # Get all coaches, today's slots and today's bookings in three queries
+    coaches = Coach.objects.filter(is_active=True)
+
+    slots_by_coach = {}
+    for slot in day_slots(today):
+        slots_by_coach.setdefault(slot['coach_id'], []).append(slot)
+
+    # First booking per (coach, start, end) describes the slot; every booking counts toward earnings
+    bookings = {}
+    earnings_by_coach = {}
+    for reservation in day_sessions(today):
+        key = (reservation['coach_id'], reservation['start_time'], reservation['end_time'])
+        bookings.setdefault(key, reservation)
+        earnings_by_coach[reservation['coach_id']] = (
+            earnings_by_coach.get(reservation['coach_id'], 0) + float(reservation['total_price'])
+        )
+
+    coaches_schedules = []
+    total_slots_all = 0
+    total_booked_all = 0
+    total_earnings_all = 0
+
+    for coach in coaches:
+        slots_data = []
+        booked_slots = 0
+        for slot in slots_by_coach.get(coach.id, []):
+            reservation = bookings.get((coach.id, slot['start_time'], slot['end_time']))
+
+            booking_details = None
+            if reservation:
+                booked_slots += 1
+                booking_details = {
+                    'player_name': reservation['user__username'],
+                    'total_price': float(reservation['total_price'])
+                }
+
+            slots_data.append({
+                'id': slot['id'],
+                'start_time': slot['start_time'].strftime('%H:%M'),
+                'end_time': slot['end_time'].strftime('%H:%M'),
+                'is_booked': reservation is not None,
+                'booking_details': booking_details
+            })
+
+        total_slots = len(slots_data)
+        todays_earnings = earnings_by_coach.get(coach.id, 0)
+
+        total_slots_all += total_slots
+        total_booked_all += booked_slots
+        total_earnings_all += todays_earnings
+
+        coaches_schedules.append({
+            'coach': {
+                'id': coach.id,
+                'name': coach.name,
+                'email': coach.email,
+                'price_per_hour': float(coach.price_per_hour),
+                'specialization': coach.specialization or 'General'
+            },
+            'schedule': {
+                'total_slots': total_slots,
+                'booked_slots': booked_slots,
+                'available_slots': total_slots - booked_slots,
+                'todays_earnings': todays_earnings,
+                'slots': slots_data
+            }
+        })
+
+    return {
+        'date': today.strftime('%Y-%m-%d'),
+        'summary': {
+            'total_coaches': len(coaches_schedules),
+            'total_slots': total_slots_all,
+            'total_booked': total_booked_all,
+            'total_available': total_slots_all - total_booked_all,
+            'total_earnings': total_earnings_all
+        },
+        'coaches_schedules': coaches_schedules
+    }
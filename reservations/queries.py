@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+
+from .models import (
+    EquipmentOrder, Payment, Reservation, ReservationCoach, Schedule, ScheduleSlot, Tournament,
+    TournamentRegistration
+)
+
+# Querysets the API views run, in one place so the query plan audit
+# (reservations.query_audit) explains exactly what the views execute.
+
+ORDER_ORDERING = ('-order_date', '-id')
+PAYMENT_ORDERING = ('-payment_date', '-id')
+TOURNAMENT_ORDERING = ('start_date', 'id')
+SLOT_ORDERING = ('date', 'start_time')
+
+
+def player_court_reservations(user):
+    return Reservation.objects.filter(user=user).order_by('id')
+
+
+def player_orders(user):
+    return EquipmentOrder.objects.filter(user=user).annotate(
+        equipment_name=F('equipment__name'),
+        equipment_brand=F('equipment__brand')
+    )
+
+
+def player_payments(user):
+    return Payment.objects.filter(user=user)
+
+
+def open_tournaments():
+    return Tournament.objects.filter(status__in=['upcoming', 'ongoing'])
+
+
+def tournament_registrations(tournament, player):
+    return TournamentRegistration.objects.filter(tournament=tournament, player=player)
+
+
+def active_schedules(coach):
+    return Schedule.objects.filter(coach=coach, is_active=True)
+
+
+def coach_slots(coach, start_date, end_date, is_booked=None):
+    """A coach's slots dated in [start_date, end_date], earliest first; only free or booked ones if is_booked is given"""
+    slots = ScheduleSlot.objects.filter(coach=coach, date__gte=start_date, date__lte=end_date)
+    if is_booked is not None:
+        slots = slots.filter(is_booked=is_booked)
+    return slots.order_by(*SLOT_ORDERING)
+
+
+def schedule_slots(schedule, is_booked):
+    return ScheduleSlot.objects.filter(created_from_schedule=schedule, is_booked=is_booked)
+
+
+def coach_sessions(coach):
+    """A coach's bookings with the player, newest first"""
+    return ReservationCoach.objects.filter(coach=coach).select_related('user').order_by('-date', '-start_time')
+
+
+def coach_session_totals(coach, today):
+    """One row of a coach's session counts and earnings for today, this week, this month and overall"""
+    start_of_week = today - timedelta(days=today.weekday())
+    end_of_week = today + timedelta(days=6 - today.weekday())
+    start_of_month = today.replace(day=1)
+
+    today_filter = Q(date=today)
+    week_filter = Q(date__gte=start_of_week, date__lte=end_of_week)
+    month_filter = Q(date__gte=start_of_month)
+    # Grouped by the one coach rather than aggregated, so it stays a queryset the audit can explain
+    return ReservationCoach.objects.filter(coach=coach).values('coach').annotate(
+        total_reservations=Count('id'),
+        today_sessions=Count('id', filter=today_filter),
+        week_sessions=Count('id', filter=week_filter),
+        month_sessions=Count('id', filter=month_filter),
+        total_earnings=Sum('total_price'),
+        today_earnings=Sum('total_price', filter=today_filter),
+        week_earnings=Sum('total_price', filter=week_filter),
+        month_earnings=Sum('total_price', filter=month_filter),
+    ).order_by('coach')
+
+
+def coach_day_schedule(coach, day):
+    """A coach's slots on a day with the booking for each slot joined in the same query"""
+    booking = ReservationCoach.objects.filter(
+        coach=OuterRef('coach'),
+        date=OuterRef('date'),
+        start_time=OuterRef('start_time'),
+        end_time=OuterRef('end_time')
+    ).order_by('id')
+    return ScheduleSlot.objects.filter(coach=coach, date=day).annotate(
+        booking_player_name=Subquery(booking.values('user__username')[:1]),
+        booking_player_email=Subquery(booking.values('user__email')[:1]),
+        booking_price=Subquery(booking.values('total_price')[:1]),
+    ).order_by('start_time').values(
+        'start_time', 'end_time', 'booking_player_name', 'booking_player_email', 'booking_price'
+    )
@@ -0,0 +1,90 @@
+import re
+from datetime import time, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .availability import grid_bookings, overlapping_bookings, overlapping_coach_sessions
+from .exports import filter_payments
+from .facts import stats_in_range
+from .models import Coach, DailyCoachStats, DailyCourtStats
+from .player_dashboard import NOTIFICATION_ORDERING, day_sessions, day_slots, notifications_for, week_bookings
+from .queries import (
+    ORDER_ORDERING, PAYMENT_ORDERING, TOURNAMENT_ORDERING, active_schedules, coach_day_schedule,
+    coach_session_totals, coach_sessions, coach_slots, open_tournaments, player_court_reservations,
+    player_orders, player_payments, schedule_slots, tournament_registrations
+)
+from .slots import stale_slots
+from .timeline import TIMELINE_ORDERING, timeline_query
+
+# Plan lines that read a whole table: SQLite's "SCAN <table>" (with or without
+# USING [COVERING] INDEX, which is still every row) and PostgreSQL's "Seq Scan on <table>"
+FULL_SCAN = re.compile(r'\bSCAN (?!CONSTANT ROW)(?!\()"?(\w+)|Seq Scan on "?(\w+)')
+
+
+def hot_queries():
+    """(name, queryset, tables allowed to be scanned) for each hot query of the API views.
+
+    The querysets come from the same helpers the views call, so the audit
+    explains what the views run; the ids and dates are placeholders since
+    EXPLAIN only needs the query shape. Scans are allowed only of small
+    tables joined in for a flag, like the coach list.
+    """
+    today = timezone.now().date()
+    week_end = today + timedelta(days=7)
+    user_id = coach_id = terrain_id = schedule_id = tournament_id = 1
+
+    return [
+        ('court overlap check', overlapping_bookings(terrain_id, today, time(10), time(11)), ()),
+        ('player court reservations', player_court_reservations(user_id), ()),
+        ('player timeline', timeline_query(user_id, TIMELINE_ORDERING, start_date=today), ()),
+        ('weekly court spending', week_bookings(user_id, today, week_end)[0], ()),
+        ('weekly coach spending', week_bookings(user_id, today, week_end)[1], ()),
+        ('availability grid', grid_bookings([1, 2], today, week_end), ()),
+        ('coach overlap check', overlapping_coach_sessions(coach_id, today, time(10), time(11)), ()),
+        ('coach reservations', coach_sessions(coach_id), ()),
+        ('coach dashboard totals', coach_session_totals(coach_id, today), ()),
+        ('coach dashboard schedule', coach_day_schedule(coach_id, today), ()),
+        ("today's coach sessions", day_sessions(today), (Coach,)),
+        ("today's coach slots", day_slots(today), (Coach,)),
+        ('coach upcoming slots', coach_slots(coach_id, today, week_end), ()),
+        ('coach free slots', coach_slots(coach_id, today, week_end, is_booked=False), ()),
+        ('slots of a schedule', schedule_slots(schedule_id, is_booked=True), ()),
+        ('stale slot pruning', stale_slots(today).values_list('id', 'coach_id'), ()),
+        ('active coach schedules', active_schedules(coach_id), ()),
+        ('user notifications', notifications_for(user_id).order_by(*NOTIFICATION_ORDERING), ()),
+        ('user payments', player_payments(user_id).order_by(*PAYMENT_ORDERING), ()),
+        ('payment export',
+         filter_payments(date_from=f'{today - timedelta(days=30):%Y-%m-%d}', date_to=f'{today:%Y-%m-%d}'),
+         ()),
+        ('user equipment orders', player_orders(user_id).order_by(*ORDER_ORDERING), ()),
+        ('open tournaments', open_tournaments().order_by(*TOURNAMENT_ORDERING), ()),
+        ('tournament registration check', tournament_registrations(tournament_id, user_id), ()),
+        ('court stats range', stats_in_range(DailyCourtStats, today - timedelta(days=30), today), ()),
+        ('coach stats range', stats_in_range(DailyCoachStats, today - timedelta(days=30), today), ()),
+    ]
+
+
+def full_scans(plan, allowed=()):
+    """Tables a query plan reads in full, other than the allowed ones"""
+    scanned = []
+    for match in FULL_SCAN.finditer(plan):
+        table = match.group(1) or match.group(2)
+        if table not in allowed and table not in scanned:
+            scanned.append(table)
+    return scanned
+
+
+def audit_queries():
+    """[(name, plan, tables scanned in full)] for every hot query, explained against the default database"""
+    results = []
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Small tables (a test database) are cheapest to read in full, which
+            # would hide a missing index; make the planner use one when it can
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        for name, queryset, allowed in hot_queries():
+            plan = queryset.explain()
+            results.append((name, plan, full_scans(plan, [model._meta.db_table for model in allowed])))
+    return results
@@ -0,0 +1,178 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from core.models import User
+
+from .models import (
+    Coach, DashboardCounter, Equipment, EquipmentOrder, Payment, Reservation,
+    Terrain, Tournament, TournamentRegistration
+)
+
+# Bump when counter keys change so cached dicts of the old layout are ignored
+ROLLUP_VERSION = 1
+ROLLUP_CACHE_KEY = f'dashboard_rollups:v{ROLLUP_VERSION}'
+
+# Present once reconcile_rollups has seeded the table; until then the
+# incremental updates have nothing correct to build on
+INITIALIZED_KEY = 'rollups:initialized'
+
+
+def payment_month_key(moment):
+    return f'payments:amount:month:{timezone.localtime(moment):%Y-%m}'
+
+
+def _payment_contributions(values):
+    amount = Decimal(str(values['amount']))
+    contributions = {
+        'payments:amount': amount,
+        f"payments:amount:status:{values['status']}": amount,
+    }
+    if values['payment_date'] is not None:
+        contributions[payment_month_key(values['payment_date'])] = amount
+    return contributions
+
+
+# How much each row of a model adds to which counters, from its field values
+ROLLUP_CONTRIBUTIONS = {
+    User: (('role',), lambda values: {'users': 1, f"users:role:{values['role']}": 1}),
+    Terrain: ((), lambda values: {'terrains': 1}),
+    Coach: ((), lambda values: {'coaches': 1}),
+    Reservation: ((), lambda values: {'reservations': 1}),
+    Equipment: ((), lambda values: {'equipment': 1}),
+    Tournament: ((), lambda values: {'tournaments': 1}),
+    TournamentRegistration: ((), lambda values: {'tournament_registrations': 1}),
+    EquipmentOrder: (
+        ('status',),
+        lambda values: {'equipment_orders': 1, f"equipment_orders:status:{values['status']}": 1},
+    ),
+    Payment: (('amount', 'status', 'payment_date'), _payment_contributions),
+}
+
+
+def contributions_of(instance):
+    """Counter contributions of a model instance, or None if its tracked fields are deferred"""
+    fields, contribute = ROLLUP_CONTRIBUTIONS[type(instance)]
+    # __dict__ rather than getattr so a deferred field never triggers a query
+    values = {name: instance.__dict__[name] for name in fields if name in instance.__dict__}
+    if len(values) != len(fields):
+        return None
+    return contribute(values)
+
+
+def invalidate_rollups():
+    cache.delete(ROLLUP_CACHE_KEY)
+    # Again after commit, in case a reader cached the old values meanwhile
+    transaction.on_commit(lambda: cache.delete(ROLLUP_CACHE_KEY), robust=True)
+
+
+def mark_rollups_stale():
+    """Have the next get_rollups() recompute every counter.
+
+    For deletes that cascade into counted rows without sending signals.
+    """
+    DashboardCounter.objects.filter(key=INITIALIZED_KEY).delete()
+    invalidate_rollups()
+
+
+def apply_deltas(old, new):
+    """Move counters from an instance's old contributions to its new ones.
+
+    The counters are shared by every writer, so they are updated after the
+    surrounding transaction commits rather than locked for its duration; a
+    rolled back write never touches them. The update is robust: if it fails,
+    Django logs the error and the write that queued it still succeeds (the
+    counters are then off until reconcile_rollups runs).
+    """
+    deltas = {}
+    for key, value in (old or {}).items():
+        deltas[key] = deltas.get(key, 0) - value
+    for key, value in (new or {}).items():
+        deltas[key] = deltas.get(key, 0) + value
+
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if deltas:
+        transaction.on_commit(lambda: _write_deltas(deltas), robust=True)
+
+
+def _write_deltas(deltas):
+    with transaction.atomic():
+        # Sorted so concurrent writers lock the counter rows in the same order
+        for key, delta in sorted(deltas.items()):
+            if DashboardCounter.objects.filter(key=key).update(value=F('value') + delta):
+                continue
+            # A key seen for the first time (new month, role or status); before
+            # the first reconciliation there is no baseline to add to
+            if DashboardCounter.objects.filter(key=INITIALIZED_KEY).exists():
+                counter, created = DashboardCounter.objects.get_or_create(key=key, defaults={'value': delta})
+                if not created:
+                    DashboardCounter.objects.filter(key=key).update(value=F('value') + delta)
+    cache.delete(ROLLUP_CACHE_KEY)
+
+
+def compute_rollups():
+    """Every counter recomputed from the source tables"""
+    totals = {
+        'users': User.objects.count(),
+        'terrains': Terrain.objects.count(),
+        'coaches': Coach.objects.count(),
+        'reservations': Reservation.objects.count(),
+        'equipment': Equipment.objects.count(),
+        'tournaments': Tournament.objects.count(),
+        'tournament_registrations': TournamentRegistration.objects.count(),
+        'equipment_orders': EquipmentOrder.objects.count(),
+        'payments:amount': Payment.objects.aggregate(total=Sum('amount'))['total'] or 0,
+    }
+    for row in User.objects.values('role').annotate(total=Count('id')):
+        totals[f"users:role:{row['role']}"] = row['total']
+    for row in EquipmentOrder.objects.values('status').annotate(total=Count('id')):
+        totals[f"equipment_orders:status:{row['status']}"] = row['total']
+    for row in Payment.objects.values('status').annotate(total=Sum('amount')):
+        totals[f"payments:amount:status:{row['status']}"] = row['total']
+    months = Payment.objects.annotate(month=TruncMonth('payment_date')).values('month').annotate(total=Sum('amount'))
+    for row in months:
+        totals[payment_month_key(row['month'])] = row['total']
+    return {key: Decimal(value) for key, value in totals.items()}
+
+
+def reconcile_rollups():
+    """Overwrite the counters with freshly computed values.
+
+    Returns {key: (stored, expected)} for every counter that had drifted.
+    """
+    with transaction.atomic():
+        expected = compute_rollups()
+        stored = dict(DashboardCounter.objects.values_list('key', 'value'))
+        stored.pop(INITIALIZED_KEY, None)
+
+        drift = {}
+        for key in set(stored) | set(expected):
+            if stored.get(key, 0) != expected.get(key, 0):
+                drift[key] = (stored.get(key), expected.get(key, Decimal(0)))
+
+        DashboardCounter.objects.exclude(key__in=list(expected) + [INITIALIZED_KEY]).delete()
+        for key, value in expected.items():
+            DashboardCounter.objects.update_or_create(key=key, defaults={'value': value})
+        DashboardCounter.objects.update_or_create(key=INITIALIZED_KEY, defaults={'value': 1})
+        invalidate_rollups()
+    return drift
+
+
+def get_rollups():
+    """{key: Decimal} of every dashboard counter, from the cache when possible"""
+    rollups = cache.get(ROLLUP_CACHE_KEY)
+    if rollups is not None:
+        return rollups
+
+    rollups = dict(DashboardCounter.objects.values_list('key', 'value'))
+    if INITIALIZED_KEY not in rollups:
+        reconcile_rollups()
+        rollups = dict(DashboardCounter.objects.values_list('key', 'value'))
+
+    cache.set(ROLLUP_CACHE_KEY, rollups, settings.DASHBOARD_ROLLUP_CACHE_TTL)
+    return rollups
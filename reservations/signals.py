@@ -1,7 +1,16 @@
-from django.db.models.signals import post_save
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Coach
+from .caching import (
+    ENDPOINT_DEPENDENCIES, ENDPOINT_DEPENDENCY_FIELDS, bump_model_version, bump_terrain_bookings,
+    invalidate_coach_dashboard
+)
+from .facts import FACT_SOURCES, apply_fact_change, fact_fields, fact_of, fact_of_values, remove_bookings
+from .models import (
+    Coach, DirectDeleteSignalMixin, Reservation, ReservationCoach, Schedule, ScheduleSlot, Terrain, instance_deleted
+)
+from .rollups import ROLLUP_CONTRIBUTIONS, apply_deltas, contributions_of, mark_rollups_stale
 
 User = get_user_model()
 
@@ -25,10 +34,13 @@ def create_coach_profile(sender, instance, created, **kwargs):
         print(f"✅ Created Coach profile for user: {instance.username}")
 
 @receiver(post_save, sender=User)
-def update_coach_profile(sender, instance, created, **kwargs):
+def update_coach_profile(sender, instance, created, update_fields=None, **kwargs):
     """
     Update Coach profile when User information changes
     """
+    # A login only stamps last_login; nothing the profile copies changed
+    if update_fields is not None and not {'first_name', 'last_name', 'username', 'email', 'role'} & set(update_fields):
+        return
     if not created and instance.role == 'coach':
         try:
             coach = Coach.objects.get(user=instance)
@@ -50,3 +62,178 @@ def update_coach_profile(sender, instance, created, **kwargs):
                 is_active=True
             )
             print(f"✅ Created missing Coach profile for user: {instance.username}")
+
+
+# Models using DirectDeleteSignalMixin are deliberately given no pre_delete or
+# post_delete receivers: those would make Django load and delete their rows
+# one at a time whenever a user, court or coach is deleted. Direct deletes
+# arrive through instance_deleted, cascades through the parents' receivers.
+
+def _stored_values(instance, fields, update_fields=None):
+    """
+    The database's current values of fields for a row about to be updated, or None for a new row or
+    when update_fields leaves all of them alone. Read on save rather than snapshotted in post_init,
+    which would cost every load of these models, User on each authenticated request included.
+    """
+    if instance._state.adding or instance.pk is None:
+        return None
+    if update_fields is not None:
+        names = {instance._meta.get_field(name).name for name in fields}
+        if not names & {instance._meta.get_field(name).name for name in update_fields}:
+            return None
+    return type(instance)._base_manager.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=ReservationCoach)
+@receiver(instance_deleted, sender=ReservationCoach)
+def invalidate_coach_dashboard_on_booking(sender, instance, **kwargs):
+    """
+    Drop the cached coach dashboard when one of the coach's sessions is booked, moved or cancelled
+    """
+    invalidate_coach_dashboard(instance.coach_id)
+
+
+@receiver(post_save, sender=ScheduleSlot)
+@receiver(instance_deleted, sender=ScheduleSlot)
+def invalidate_coach_dashboard_on_slot_change(sender, instance, **kwargs):
+    """Slot counts are part of the dashboard; bulk slot writes invalidate in slots.py"""
+    invalidate_coach_dashboard(instance.coach_id)
+
+
+@receiver(post_save, sender=Coach)
+def invalidate_coach_dashboard_on_profile_change(sender, instance, **kwargs):
+    invalidate_coach_dashboard(instance.id)
+
+
+@receiver(post_delete, sender=Schedule)
+def invalidate_coach_dashboard_on_schedule_delete(sender, instance, **kwargs):
+    """The schedule's slots go with it"""
+    invalidate_coach_dashboard(instance.coach_id)
+
+
+def remember_rollup_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Read what the stored row contributes to the dashboard counters so the save can apply the difference
+    """
+    fields = ROLLUP_CONTRIBUTIONS[sender][0]
+    instance._stored_rollup_values = None if raw else _stored_values(instance, fields, update_fields)
+
+
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        apply_deltas(None, contributions_of(instance))
+        return
+    stored = instance.__dict__.pop('_stored_rollup_values', None)
+    new = contributions_of(instance)
+    if stored is not None and new is not None:
+        apply_deltas(ROLLUP_CONTRIBUTIONS[sender][1](stored), new)
+    # Otherwise none of the counted fields were written
+
+
+def update_rollups_on_delete(sender, instance, **kwargs):
+    apply_deltas(contributions_of(instance), None)
+
+
+def recount_rollups_on_delete(sender, **kwargs):
+    """
+    Deleting one of these cascades into counted rows without signals, so the counters are recomputed
+    on the next read
+    """
+    mark_rollups_stale()
+
+
+for rollup_model, (rollup_fields, _) in ROLLUP_CONTRIBUTIONS.items():
+    # Rows of models without counted fields contribute the same whatever an update changes
+    if rollup_fields:
+        pre_save.connect(remember_rollup_fields, sender=rollup_model)
+    post_save.connect(update_rollups_on_save, sender=rollup_model)
+    if issubclass(rollup_model, DirectDeleteSignalMixin):
+        instance_deleted.connect(update_rollups_on_delete, sender=rollup_model)
+    else:
+        post_delete.connect(recount_rollups_on_delete, sender=rollup_model)
+
+
+def remember_booking_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Read the stored booking's day, times and court or coach so the save can move its daily stats
+    """
+    instance._stored_booking = None if raw else _stored_values(instance, fact_fields(sender), update_fields)
+
+
+def update_facts_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        apply_fact_change(None, fact_of(instance))
+        return
+    new = fact_of(instance)
+    if instance._stored_booking is not None and new is not None:
+        apply_fact_change(fact_of_values(sender, instance._stored_booking), new)
+    # Otherwise the stats columns were not written, or were deferred; rebuild_daily_stats corrects the latter
+
+
+def update_facts_on_delete(sender, instance, **kwargs):
+    apply_fact_change(fact_of(instance), None)
+
+
+for booking_model in FACT_SOURCES:
+    pre_save.connect(remember_booking_fields, sender=booking_model)
+    post_save.connect(update_facts_on_save, sender=booking_model)
+    instance_deleted.connect(update_facts_on_delete, sender=booking_model)
+
+
+def bump_catalog_version(sender, update_fields=None, **kwargs):
+    """
+    Give the written model a new version, which retires the cached responses and ETags built from it
+    """
+    shown = ENDPOINT_DEPENDENCY_FIELDS.get(sender)
+    if shown and update_fields is not None and not set(shown) & set(update_fields):
+        return
+    bump_model_version(sender)
+
+
+for catalog_model in {model for models in ENDPOINT_DEPENDENCIES.values() for model in models}:
+    post_save.connect(bump_catalog_version, sender=catalog_model)
+    post_delete.connect(bump_catalog_version, sender=catalog_model)
+
+
+@receiver(post_save, sender=Reservation)
+def bump_availability_grid(sender, instance, **kwargs):
+    """
+    Retire the cached availability grid of the courts a reservation was and is on
+    """
+    stored = instance._stored_booking
+    for terrain_id in {instance.terrain_id, stored and stored['terrain_id']} - {None}:
+        bump_terrain_bookings(terrain_id)
+
+
+@receiver(instance_deleted, sender=Reservation)
+def bump_availability_grid_on_cancel(sender, instance, **kwargs):
+    bump_terrain_bookings(instance.terrain_id)
+
+
+@receiver(post_delete, sender=Terrain)
+def bump_availability_grid_on_court_delete(sender, instance, **kwargs):
+    bump_terrain_bookings(instance.id)
+
+
+@receiver(pre_delete, sender=User)
+def forget_bookings_of_deleted_user(sender, instance, **kwargs):
+    """
+    A user's bookings and slots go with the account in one query per table and send no signals, so
+    update the daily stats, availability grids and coach dashboards they fed before they are gone
+    """
+    reservations = Reservation.objects.filter(user=instance)
+    sessions = ReservationCoach.objects.filter(user=instance)
+    for terrain_id in set(reservations.values_list('terrain_id', flat=True)):
+        bump_terrain_bookings(terrain_id)
+    coach_ids = set(sessions.values_list('coach_id', flat=True)) | set(
+        ScheduleSlot.objects.filter(Q(booked_by=instance) | Q(created_from_schedule__created_by=instance))
+        .values_list('coach_id', flat=True)
+    )
+    for coach_id in coach_ids:
+        invalidate_coach_dashboard(coach_id)
+    remove_bookings(reservations)
+    remove_bookings(sessions)
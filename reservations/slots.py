@@ -0,0 +1,97 @@
+import calendar
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+
+from .caching import invalidate_coach_dashboard
+from .models import Coach, Schedule, ScheduleSlot
+
+
+def generate_schedule_slots_for_coach(coach, start_date=None, days=None):
+    """Materialize ScheduleSlot rows from a coach's weekly schedule.
+
+    The desired slots for start_date..start_date + days (inclusive) are built
+    in memory, diffed against the existing slots fetched in one query, and
+    only the missing ones are inserted in a single bulk_create. Returns the
+    number of slots actually created, which is lower than the number
+    attempted when an admin added some of them by hand in the meantime.
+    """
+    start_date = start_date or date.today()
+    if days is None:
+        days = settings.COACH_SLOT_HORIZON_DAYS
+    end_date = start_date + timedelta(days=days)
+
+    # Active weekly schedule grouped by day name
+    schedules_by_day = {}
+    for schedule in Schedule.objects.filter(coach=coach, is_active=True):
+        schedules_by_day.setdefault(schedule.day_of_week, []).append(schedule)
+    if not schedules_by_day:
+        return 0
+
+    with transaction.atomic():
+        # Serializes regenerations of one coach, so generated slots counted below are ours alone
+        list(Coach.objects.select_for_update().filter(pk=coach.pk).values_list('pk'))
+
+        in_range = ScheduleSlot.objects.filter(coach=coach, date__gte=start_date, date__lte=end_date)
+        existing = set(in_range.values_list('date', 'start_time', 'end_time'))
+        generated = in_range.filter(created_from_schedule__isnull=False)
+        generated_before = generated.count()
+
+        new_slots = []
+        current_date = start_date
+        while current_date <= end_date:
+            day_name = calendar.day_name[current_date.weekday()].lower()
+            for schedule in schedules_by_day.get(day_name, []):
+                key = (current_date, schedule.start_time, schedule.end_time)
+                if key not in existing:
+                    existing.add(key)
+                    new_slots.append(ScheduleSlot(
+                        coach=coach,
+                        date=current_date,
+                        start_time=schedule.start_time,
+                        end_time=schedule.end_time,
+                        created_from_schedule=schedule
+                    ))
+            current_date += timedelta(days=1)
+
+        if not new_slots:
+            return 0
+
+        # ignore_conflicts skips slots an admin added by hand meanwhile, but
+        # doesn't say which rows went in, so count them back. Hand-made slots
+        # have no created_from_schedule and are left out of the count.
+        ScheduleSlot.objects.bulk_create(new_slots, ignore_conflicts=True)
+        created = generated.count() - generated_before
+
+    if created:
+        # bulk_create sends no post_save
+        invalidate_coach_dashboard(coach.id)
+    return created
+
+
+def stale_slots(before_date):
+    return ScheduleSlot.objects.filter(date__lt=before_date, is_booked=False)
+
+
+def prune_stale_slots(before_date, batch_size=1000):
+    """Delete unbooked slots dated before before_date, batch_size rows at a time.
+
+    Booked slots are kept as history. Deleting by primary key batches keeps
+    each statement short so bookings are never blocked for long.
+    """
+    deleted = 0
+    coach_ids = set()
+    stale = stale_slots(before_date)
+    while True:
+        batch = list(stale.values_list('id', 'coach_id')[:batch_size])
+        if not batch:
+            break
+        ScheduleSlot.objects.filter(id__in=[slot_id for slot_id, _ in batch]).delete()
+        coach_ids.update(coach_id for _, coach_id in batch)
+        deleted += len(batch)
+
+    # Queryset deletes send no signals
+    for coach_id in coach_ids:
+        invalidate_coach_dashboard(coach_id)
+    return deleted
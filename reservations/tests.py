@@ -1,3 +1,1281 @@
-from django.test import TestCase
+import base64
+import calendar
+import csv
+import importlib
+import json
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+from datetime import time, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.apps import apps
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, OperationalError, connection, transaction
+from django.db.models.deletion import Collector
+from django.db.models.signals import post_init
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import User
+from core.pagination import decode_cursor, encode_cursor
+from core.perf import Histogram, perf_stats
+from .availability import _GridCache, busy_bitmap, free_gaps, grid_cache, is_court_free
+from . import booking
+from .booking import BOOKING_MAX_ATTEMPTS, BookingError, book_court
+from .caching import endpoint_cache_stats, terrain_booking_versions
+from .datasets import generate_dataset
+from .query_audit import audit_queries, full_scans
+from .facts import rebuild_daily_stats
+from .management.commands.roll_coach_slots import Command as RollCoachSlotsCommand
+from .rollups import compute_rollups, get_rollups, payment_month_key, reconcile_rollups
+from .slots import generate_schedule_slots_for_coach, prune_stale_slots
+from .timeline import player_timeline
+from .models import (
+    Coach, DailyCoachStats, DailyCourtStats, DashboardCounter, Equipment, EquipmentOrder, Notification, Payment, Reservation, ReservationCoach, Schedule,
+    ScheduleSlot, Terrain, Tournament, TournamentRegistration
+)
+
+
+class TodaysCoachSchedulesTests(TestCase):
+    def setUp(self):
+        self.player = User.objects.create(username='player', email='player@tennis.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.player)
+        self.url = reverse('get_todays_coach_schedules')
+
+    def add_coaches(self, count):
+        today = timezone.now().date()
+        for _ in range(count):
+            index = Coach.objects.count()
+            coach = Coach.objects.create(
+                name=f'Coach {index}', email=f'coach{index}@tennis.com', price_per_hour=Decimal('50.00')
+            )
+            for hour in (9, 10, 11):
+                ScheduleSlot.objects.create(
+                    coach=coach, date=today, start_time=time(hour), end_time=time(hour + 1)
+                )
+            ReservationCoach.objects.create(
+                user=self.player, coach=coach, date=today, start_time=time(9), end_time=time(10), total_price=0
+            )
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_query_count_does_not_grow_with_coaches(self):
+        self.add_coaches(1)
+        few_queries, _ = self.count_queries()
+
+        self.add_coaches(10)
+        many_queries, data = self.count_queries()
+
+        self.assertEqual(few_queries, many_queries)
+        self.assertEqual(data['summary']['total_coaches'], 11)
+        self.assertEqual(data['summary']['total_slots'], 33)
+        self.assertEqual(data['summary']['total_booked'], 11)
+        self.assertEqual(data['summary']['total_earnings'], 11 * 50.0)
+
+    def test_booking_details_are_joined_to_slots(self):
+        self.add_coaches(1)
+        _, data = self.count_queries()
+
+        slots = data['coaches_schedules'][0]['schedule']['slots']
+        self.assertEqual([slot['is_booked'] for slot in slots], [True, False, False])
+        self.assertEqual(slots[0]['booking_details'], {'player_name': 'player', 'total_price': 50.0})
+
+
+class CachedEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create(username='admin', email='admin@tennis.com', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, name, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def add_tournament(self, name):
+        start = timezone.now() + timedelta(days=30)
+        return Tournament.objects.create(
+            name=name, description='', tournament_type='singles', start_date=start,
+            end_date=start + timedelta(days=2), registration_deadline=start - timedelta(days=7),
+            max_participants=16, entry_fee=Decimal('20.00'), prize_money=Decimal('500.00'),
+            created_by=self.admin
+        )
+
+    def test_repeat_request_reads_only_the_versions(self):
+        Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+
+        first_queries, first = self.get('list_terrains')
+        cached_queries, cached = self.get('list_terrains')
+
+        self.assertGreater(first_queries, 1)
+        self.assertEqual(cached_queries, 1)
+        self.assertEqual(first, cached)
+        self.assertEqual(endpoint_cache_stats()['terrains'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_terrain_writes_invalidate(self):
+        terrain = Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+        self.get('list_terrains')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Terrain.objects.create(name='Court 2', location='South', price_per_hour=Decimal('40.00'))
+        self.assertEqual([row['name'] for row in self.get('list_terrains')[1]], ['Court 1', 'Court 2'])
+
+        terrain.price_per_hour = Decimal('35.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            terrain.save()
+        self.assertEqual(self.get('list_terrains')[1][0]['price_per_hour'], '35.00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            terrain.delete()
+        self.assertEqual([row['name'] for row in self.get('list_terrains')[1]], ['Court 2'])
+
+    def test_equipment_coach_and_tournament_writes_invalidate(self):
+        equipment = Equipment.objects.create(name='Balls', type='balls', brand='Wilson', price=Decimal('5.00'))
+        coach = Coach.objects.create(name='Coach A', email='a@tennis.com', price_per_hour=Decimal('50.00'))
+        self.add_tournament('Spring Open')
+        self.get('equipment_list')
+        self.get('coaches_list')
+        self.get('tournament_list')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            equipment.stock_quantity = 12
+            equipment.save()
+            coach.name = 'Coach B'
+            coach.save()
+            self.add_tournament('Summer Open')
+
+        self.assertEqual(self.get('equipment_list')[1]['equipment'][0]['stock_quantity'], 12)
+        self.assertEqual(self.get('coaches_list')[1]['coaches'][0]['name'], 'Coach B')
+        self.assertEqual(
+            [row['name'] for row in self.get('tournament_list')[1]],
+            ['Spring Open', 'Summer Open']
+        )
+
+    def test_unrelated_writes_keep_the_cache(self):
+        self.get('subscription_plans')
+        self.get('equipment_list')
+        with self.captureOnCommitCallbacks(execute=True):
+            Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+
+        self.assertEqual(self.get('equipment_list')[0], 1)
+        self.assertEqual(self.get('subscription_plans')[0], 0)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'worker_a'},
+        'worker_b': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'worker_b'},
+    })
+    def test_workers_with_their_own_cache_see_each_others_writes(self):
+        Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+        worker_b = mock.patch('reservations.caching.cache', caches['worker_b'])
+        with worker_b:
+            etag = self.client.get(reverse('list_terrains'))['ETag']
+            self.get('list_terrains')
+
+        # The write is handled by worker A, which only has its own cache
+        with self.captureOnCommitCallbacks(execute=True):
+            Terrain.objects.create(name='Court 2', location='South', price_per_hour=Decimal('40.00'))
+
+        with worker_b:
+            response = self.client.get(reverse('list_terrains'), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([row['name'] for row in response.json()], ['Court 1', 'Court 2'])
+            self.assertEqual(len(self.get('list_terrains')[1]), 2)
+
+    def test_query_strings_are_cached_separately(self):
+        for index in range(3):
+            Equipment.objects.create(name=f'Racket {index}', type='racket', brand='Head', price=Decimal('90.00'))
+
+        _, page = self.get('equipment_list', limit=2)
+        _, full = self.get('equipment_list')
+
+        self.assertEqual(page['count'], 2)
+        self.assertEqual(full['count'], 3)
+        self.assertEqual(self.get('equipment_list', limit=2)[1], page)
+
+    def test_linked_account_changes_invalidate_coaches(self):
+        account = User.objects.create(username='coach', email='coach@tennis.com', role='coach')
+        self.assertEqual(self.get('coaches_list')[1]['coaches'][0]['user_info']['username'], 'coach')
+
+        account.username = 'head_coach'
+        with self.captureOnCommitCallbacks(execute=True):
+            account.save()
+        self.assertEqual(self.get('coaches_list')[1]['coaches'][0]['user_info']['username'], 'head_coach')
+
+        # Logging in stamps last_login, which the list does not show
+        account.last_login = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            account.save(update_fields=['last_login'])
+        self.assertEqual(self.get('coaches_list')[0], 1)
+
+    def test_errors_are_not_cached(self):
+        response = self.client.get(reverse('tournament_list'), {'limit': 'many'})
+        self.assertEqual(response.status_code, 400)
+        self.client.get(reverse('tournament_list'), {'limit': 'many'})
+
+        self.assertEqual(endpoint_cache_stats()['tournaments']['hits'], 0)
+
+    def test_cache_requires_authentication(self):
+        self.get('equipment_list')
+        self.client.force_authenticate(None)
+
+        self.assertEqual(self.client.get(reverse('equipment_list')).status_code, 401)
+
+    @override_settings(ENDPOINT_CACHE_TTLS={'terrains': 0})
+    def test_zero_ttl_disables_caching(self):
+        self.get('list_terrains')
+        self.assertGreater(self.get('list_terrains')[0], 0)
+
+    def test_file_backend(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        backend = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}
+
+        with override_settings(CACHES={'default': backend}):
+            Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+            self.get('list_terrains')
+            self.assertEqual(self.get('list_terrains')[0], 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Terrain.objects.create(name='Court 2', location='South', price_per_hour=Decimal('40.00'))
+            self.assertEqual(len(self.get('list_terrains')[1]), 2)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create(username='admin', email='admin@tennis.com', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.terrain = Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+
+    def test_matching_etag_gets_304(self):
+        for name in ('list_terrains', 'terrain_management', 'coaches_list', 'equipment_list', 'tournament_list'):
+            response = self.client.get(reverse(name))
+            etag = response['ETag']
+
+            with CaptureQueriesContext(connection) as queries:
+                repeat = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(repeat.status_code, 304, name)
+            self.assertEqual(repeat['ETag'], etag)
+            self.assertEqual(repeat.content, b'')
+            # Only the version read
+            self.assertEqual(len(queries), 1, name)
+
+    def test_write_changes_etag(self):
+        etag = self.client.get(reverse('terrain_management'))['ETag']
+
+        self.terrain.available = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.terrain.save()
+        response = self.client.get(reverse('terrain_management'), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertFalse(response.json()[0]['available'])
+
+    def test_unrelated_write_keeps_etag(self):
+        etag = self.client.get(reverse('equipment_list'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.terrain.delete()
+
+        self.assertEqual(self.client.get(reverse('equipment_list'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_etag_depends_on_query_string(self):
+        etag = self.client.get(reverse('equipment_list'))['ETag']
+        response = self.client.get(reverse('equipment_list'), {'limit': 1}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_weak_and_listed_etags_match(self):
+        etag = self.client.get(reverse('list_terrains'))['ETag']
+        response = self.client.get(reverse('list_terrains'), HTTP_IF_NONE_MATCH=f'"other", W/{etag}')
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_304_requires_authentication(self):
+        etag = self.client.get(reverse('terrain_management'))['ETag']
+        self.client.force_authenticate(None)
+
+        response = self.client.get(reverse('terrain_management'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(COURT_OPENING_HOUR=8, COURT_CLOSING_HOUR=22, AVAILABILITY_GRID_SLOT_MINUTES=15)
+class AvailabilityGridTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        grid_cache.clear()
+        self.player = User.objects.create(username='player', email='player@tennis.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.player)
+        self.courts = [
+            Terrain.objects.create(name=f'Court {index}', location='North', price_per_hour=Decimal('30.00'))
+            for index in range(2)
+        ]
+        self.today = timezone.now().date()
+
+    def book(self, terrain, start, end, day=None):
+        return Reservation.objects.create(
+            user=self.player, terrain=terrain, date=day or self.today, start_time=start, end_time=end
+        )
+
+    def grid(self, **params):
+        params.setdefault('from', self.today.strftime('%Y-%m-%d'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('availability_grid'), params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def busy_slots(self, data, terrain_index, day_index=0):
+        encoded = data['terrains'][terrain_index]['busy'][day_index]
+        bitmap = int.from_bytes(base64.b64decode(encoded), 'little')
+        return [slot for slot in range(data['slots_per_day']) if bitmap >> slot & 1]
+
+    def test_bitmap_marks_overlapped_slots(self):
+        self.book(self.courts[0], time(9), time(10, 30))
+        self.book(self.courts[0], time(21, 50), time(23))
+        _, data = self.grid(days=3)
+
+        self.assertEqual(data['slots_per_day'], 56)
+        self.assertEqual(len(data['dates']), 3)
+        self.assertEqual(self.busy_slots(data, 0), [4, 5, 6, 7, 8, 9, 55])
+        self.assertEqual(self.busy_slots(data, 1), [])
+        self.assertEqual(self.busy_slots(data, 0, day_index=1), [])
+
+    def test_booking_ending_at_midnight_runs_to_closing(self):
+        self.book(self.courts[0], time(21), time(0))
+        _, data = self.grid()
+
+        self.assertEqual(self.busy_slots(data, 0), [52, 53, 54, 55])
+        self.assertEqual(busy_bitmap([(time(22), time(0))], 0, 60, 24), 0b11 << 22)
+
+    def test_array_encoding(self):
+        self.book(self.courts[1], time(8), time(8, 30))
+        _, data = self.grid(encoding='array', terrain=str(self.courts[1].id))
+
+        self.assertEqual([terrain['id'] for terrain in data['terrains']], [self.courts[1].id])
+        self.assertEqual(data['terrains'][0]['busy'][0][:3], [1, 1, 0])
+
+    def test_repeat_request_reads_only_terrains_and_versions(self):
+        self.book(self.courts[0], time(9), time(10))
+        first_queries, first = self.grid(days=7)
+        cached_queries, cached = self.grid(days=7)
+
+        self.assertEqual(first_queries, 3)
+        self.assertEqual(cached_queries, 2)
+        self.assertEqual(first, cached)
+
+    def test_bookings_refresh_the_grid(self):
+        self.grid()
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = self.book(self.courts[0], time(10), time(11))
+        self.assertEqual(self.busy_slots(self.grid()[1], 0), [8, 9, 10, 11])
+
+        reservation.terrain = self.courts[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.save()
+        _, data = self.grid()
+        self.assertEqual(self.busy_slots(data, 0), [])
+        self.assertEqual(self.busy_slots(data, 1), [8, 9, 10, 11])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.delete()
+        self.assertEqual(self.busy_slots(self.grid()[1], 1), [])
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'worker_a'},
+        'worker_b': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'worker_b'},
+    })
+    def test_workers_with_their_own_caches_see_each_others_bookings(self):
+        worker_b_grid = _GridCache()
+
+        def on_worker_b():
+            with mock.patch('reservations.caching.cache', caches['worker_b']), \
+                    mock.patch('reservations.availability.grid_cache', worker_b_grid):
+                return self.grid()[1]
+
+        self.assertEqual(self.busy_slots(on_worker_b(), 0), [])
+
+        # Booked through worker A, whose caches worker B never sees
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.courts[0], time(10), time(11))
+
+        self.assertEqual(self.busy_slots(on_worker_b(), 0), [8, 9, 10, 11])
+
+    def test_invalid_parameters(self):
+        url = reverse('availability_grid')
+        self.assertEqual(self.client.get(url, {'days': 0}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'days': 500}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'from': 'tomorrow'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'encoding': 'hex'}).status_code, 400)
+
+
+class QueryPlanAuditTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        for name, plan, scans in audit_queries():
+            self.assertEqual(scans, [], f'{name}:\n{plan}')
+
+    def test_full_scans_are_detected(self):
+        self.assertEqual(full_scans('2 0 0 SCAN reservations_payment'), ['reservations_payment'])
+        self.assertEqual(full_scans('3 0 0 SCAN coach USING COVERING INDEX coach_idx'), ['coach'])
+        self.assertEqual(full_scans('Seq Scan on "reservations_payment"  (cost=0.00..1.01 rows=1)'),
+                         ['reservations_payment'])
+        self.assertEqual(full_scans('3 0 0 SCAN coach', allowed=['coach']), [])
+        self.assertEqual(full_scans('3 0 0 SEARCH coach USING INTEGER PRIMARY KEY (rowid=?)'), [])
+
+
+class PerfMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        perf_stats.reset()
+        self.admin = User.objects.create(username='admin', email='admin@tennis.com', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+
+    def endpoint(self, name):
+        report = self.client.get(reverse('perf_report')).json()
+        return next(row for row in report['endpoints'] if row['endpoint'] == name)
+
+    def test_requests_are_recorded_by_url_name(self):
+        self.client.get(reverse('terrain_management'))
+        self.client.get(reverse('terrain_management'))
+
+        stats = self.endpoint('terrain_management')
+        self.assertEqual(stats['requests'], 2)
+        self.assertGreaterEqual(stats['queries']['avg'], 1)
+        self.assertGreater(stats['wall_ms']['max'], 0)
+        self.assertEqual(stats['over_budget'], 0)
+
+    @override_settings(PERF_BUDGET={'queries': 0, 'db_ms': None, 'wall_ms': None})
+    def test_over_budget_requests_are_logged(self):
+        with self.assertLogs('core.perf', 'WARNING') as logs:
+            self.client.get(reverse('terrain_management'))
+
+        self.assertIn('terrain_management', logs.output[0])
+        self.assertEqual(self.endpoint('terrain_management')['over_budget'], 1)
+
+    @override_settings(
+        PERF_BUDGET={'queries': 0, 'db_ms': None, 'wall_ms': None},
+        PERF_ENDPOINT_BUDGETS={'terrain_management': {'queries': None}}
+    )
+    def test_endpoint_budget_overrides(self):
+        with self.assertNoLogs('core.perf', 'WARNING'):
+            self.client.get(reverse('terrain_management'))
+
+    def test_report_is_admin_only_and_resettable(self):
+        self.client.get(reverse('terrain_management'))
+        self.client.delete(reverse('perf_report'))
+        # Only the reset request itself has been recorded since
+        self.assertEqual(
+            [row['endpoint'] for row in self.client.get(reverse('perf_report')).json()['endpoints']],
+            ['perf_report']
+        )
+
+        player = User.objects.create(username='player', email='player@tennis.com')
+        self.client.force_authenticate(player)
+        self.assertEqual(self.client.get(reverse('perf_report')).status_code, 403)
+
+    def test_histogram_percentiles(self):
+        histogram = Histogram((1, 5, 10))
+        for value in [1] * 90 + [4] * 8 + [50] * 2:
+            histogram.add(value)
+
+        self.assertEqual(histogram.percentile(0.5), 1)
+        self.assertEqual(histogram.percentile(0.95), 5)
+        self.assertEqual(histogram.percentile(0.99), 50)
+        self.assertEqual(histogram.summary(100)['avg'], 2.22)
+
+
+class GenerateDatasetTests(TestCase):
+    def test_generated_rows_are_consistent(self):
+        written = generate_dataset(users=30, courts=2, coaches=2, days=7, future_days=3, seed=1)
+
+        self.assertEqual(written['User'], 32)
+        self.assertEqual(written['Reservation'], Reservation.objects.count())
+        self.assertFalse(Reservation.objects.filter(price__isnull=True).exists())
+        self.assertEqual(
+            ScheduleSlot.objects.filter(is_booked=True).count(), ReservationCoach.objects.count()
+        )
+        # Counters were seeded after the bulk insert, so there is nothing to correct
+        self.assertEqual(reconcile_rollups(), {})
+
+        for terrain in Terrain.objects.all():
+            bookings = list(terrain.reservation_set.order_by('date', 'start_time')
+                            .values_list('date', 'start_time', 'end_time'))
+            for previous, current in zip(bookings, bookings[1:]):
+                if previous[0] == current[0]:
+                    self.assertLessEqual(previous[2], current[1])
+
+    def test_same_seed_same_dataset(self):
+        generate_dataset(users=10, courts=1, coaches=1, days=3, future_days=0, seed=7, prefix='a')
+        generate_dataset(users=10, courts=1, coaches=1, days=3, future_days=0, seed=7, prefix='b')
+
+        def bookings(prefix):
+            return list(Reservation.objects.filter(terrain__name__startswith=prefix.title())
+                        .order_by('date', 'start_time').values_list('date', 'start_time', 'end_time', 'price'))
+        self.assertEqual(bookings('a'), bookings('b'))
+
+    def test_bookings_come_with_backdated_payments_and_notifications(self):
+        written = generate_dataset(users=20, courts=1, coaches=0, days=10, future_days=0, seed=3)
+
+        self.assertEqual(Payment.objects.count(), written['Reservation'])
+        self.assertEqual(Notification.objects.count(), written['Reservation'])
+        # bulk_create stamped them with the current time; they were moved back to when each court was booked
+        today = timezone.localdate()
+        self.assertTrue(Payment.objects.filter(payment_date__date__lt=today - timedelta(days=5)).exists())
+        self.assertFalse(Notification.objects.filter(created_at__date__gt=today).exists())
+
+    def test_evenings_are_busier_than_mornings(self):
+        generate_dataset(users=50, courts=3, coaches=0, days=60, future_days=0, seed=5)
+        weekdays = Reservation.objects.exclude(date__week_day__in=[1, 7])
+
+        evening = weekdays.filter(start_time__gte=time(18), start_time__lt=time(20)).count()
+        morning = weekdays.filter(start_time__gte=time(8), start_time__lt=time(10)).count()
+        self.assertGreater(evening, morning * 1.5)
+
+
+class GenerateDatasetCommandTests(TestCase):
+    def test_generates_and_refuses_to_reuse_a_prefix(self):
+        out = StringIO()
+        call_command('generate_dataset', users=5, courts=1, coaches=1, days=2, prefix='cmd', stdout=out)
+
+        self.assertIn('Reservation:', out.getvalue())
+        self.assertEqual(User.objects.filter(username__startswith='cmd_player_').count(), 5)
+        with self.assertRaises(CommandError):
+            call_command('generate_dataset', users=5, prefix='cmd', stdout=StringIO())
+
+
+class PlayerDashboardTests(TransactionTestCase):
+    # The sections are read on worker threads, whose connections only see committed rows
+    def setUp(self):
+        perf_stats.reset()
+        self.player = User.objects.create(username='player', email='player@tennis.com')
+        self.url = reverse('player_dashboard')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.player)}'}
+
+        today = timezone.now().date()
+        terrain = Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+        coach = Coach.objects.create(name='Coach', email='coach@tennis.com', price_per_hour=Decimal('50.00'))
+        for hour in (9, 10, 11):
+            Reservation.objects.create(
+                user=self.player, terrain=terrain, date=today + timedelta(days=1),
+                start_time=time(hour), end_time=time(hour + 1)
+            )
+        ScheduleSlot.objects.create(coach=coach, date=today, start_time=time(9), end_time=time(10))
+        ReservationCoach.objects.create(
+            user=self.player, coach=coach, date=today, start_time=time(9), end_time=time(10)
+        )
+        for i in range(3):
+            Notification.objects.create(
+                user=self.player, title=f'Note {i}', message='Hello', notification_type='general', is_read=i == 0
+            )
+
+    def test_sections_match_the_individual_endpoints(self):
+        response = self.client.get(self.url, **self.auth)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        for name, section in (
+            ('get_todays_coach_schedules', 'todays_coach_schedules'),
+            ('get_user_weekly_spending', 'weekly_spending'),
+        ):
+            self.assertEqual(data[section], self.client.get(reverse(name), **self.auth).json())
+        upcoming = self.client.get(reverse('player_upcoming_reservations'), **self.auth).json()
+        self.assertEqual(data['upcoming_reservations']['results'], upcoming['upcoming_reservations'])
+        self.assertEqual(data['notifications']['unread_count'], 2)
+        self.assertEqual([row['title'] for row in data['notifications']['results']], ['Note 2', 'Note 1', 'Note 0'])
+
+    @override_settings(API_PAGE_SIZE=2)
+    def test_capped_sections_continue_on_their_endpoints(self):
+        data = self.client.get(self.url, **self.auth).json()
+
+        self.assertEqual(data['upcoming_reservations']['count'], 2)
+        rest = self.client.get(
+            reverse('player_upcoming_reservations'), {'cursor': data['upcoming_reservations']['next_cursor']},
+            **self.auth
+        ).json()
+        self.assertEqual(rest['count'], 2)
+
+        rest = self.client.get(
+            reverse('user_notifications'), {'cursor': data['notifications']['next_cursor']}, **self.auth
+        ).json()
+        self.assertEqual([row['title'] for row in rest['results']], ['Note 0'])
+
+    def test_section_queries_count_toward_the_request(self):
+        self.client.get(self.url, **self.auth)
+
+        stats = next(row for row in perf_stats.report() if row['endpoint'] == 'player_dashboard')
+        self.assertGreaterEqual(stats['queries']['max'], 8)
+
+    async def test_served_over_asgi(self):
+        response = await AsyncClient().get(self.url, headers={'Authorization': self.auth['HTTP_AUTHORIZATION']})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['weekly_spending']['sessions_count']['coach_sessions'], 1)
+
+    def test_failures_are_logged_not_returned(self):
+        with mock.patch('reservations.api_views.weekly_spending', side_effect=RuntimeError('secret detail')), \
+                self.assertLogs('reservations.api_views', 'ERROR') as logs:
+            response = self.client.get(self.url, **self.auth)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json(), {'error': 'Could not load the dashboard'})
+        self.assertIn('secret detail', logs.output[0])
+
+    def test_sections_are_read_on_the_dashboard_threads(self):
+        threads = []
+
+        def record_thread(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return {}
+
+        with mock.patch('reservations.api_views.weekly_spending', side_effect=record_thread), \
+                mock.patch('reservations.api_views.todays_coach_schedules', side_effect=record_thread):
+            self.assertEqual(self.client.get(self.url, **self.auth).status_code, 200)
+
+        self.assertEqual(len(threads), 2)
+        self.assertTrue(all(name.startswith('dashboard-section') for name in threads))
+
+    def test_requires_a_valid_token_and_get(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer nonsense').status_code, 401)
+        self.assertEqual(self.client.post(self.url, **self.auth).status_code, 405)
+
+
+class CourtAvailabilityTests(TestCase):
+    def setUp(self):
+        self.terrain = Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+        self.day = timezone.now().date()
+        self.booking = Reservation.objects.create(
+            terrain=self.terrain, date=self.day, start_time=time(10), end_time=time(11, 30)
+        )
+
+    def test_overlaps_are_busy_and_touching_ranges_are_free(self):
+        self.assertFalse(is_court_free(self.terrain, self.day, time(11), time(12)))
+        self.assertFalse(is_court_free(self.terrain, self.day, time(9), time(13)))
+        self.assertFalse(is_court_free(self.terrain.id, self.day, time(10, 30), time(11)))
+        self.assertTrue(is_court_free(self.terrain, self.day, time(9), time(10)))
+        self.assertTrue(is_court_free(self.terrain, self.day, time(11, 30), time(12)))
+        self.assertTrue(is_court_free(self.terrain, self.day + timedelta(days=1), time(10), time(11)))
+
+    def test_excluded_reservation_does_not_conflict_with_itself(self):
+        self.assertTrue(is_court_free(self.terrain, self.day, time(10), time(12), exclude_id=self.booking.id))
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            is_court_free(self.terrain, self.day, time(10), time(11))
+
+    @override_settings(COURT_OPENING_HOUR=8, COURT_CLOSING_HOUR=22)
+    def test_free_gaps(self):
+        for start, end in ((time(7), time(8, 30)), (time(11), time(12)), (time(12), time(13)), (time(21), time(0))):
+            Reservation.objects.create(terrain=self.terrain, date=self.day, start_time=start, end_time=end)
+
+        with self.assertNumQueries(1):
+            gaps = free_gaps(self.terrain, self.day)
+        self.assertEqual(gaps, [(time(8, 30), time(10)), (time(13), time(21))])
+        self.assertEqual(free_gaps(self.terrain, self.day + timedelta(days=1)), [(time(8), time(22))])
+
+
+class BookCourtTests(TestCase):
+    def setUp(self):
+        self.terrain = Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+        self.day = timezone.now().date() + timedelta(days=1)
+        self.first = User.objects.create(username='first', email='first@tennis.com')
+        self.second = User.objects.create(username='second', email='second@tennis.com')
+
+    def test_overlapping_bookings_cannot_both_succeed(self):
+        reservation, price = book_court(self.first, self.terrain.id, self.day, time(10), time(11, 30))
+
+        with self.assertRaises(BookingError):
+            book_court(self.second, self.terrain.id, self.day, time(11), time(12))
+        self.assertEqual(list(Reservation.objects.values_list('id', flat=True)), [reservation.id])
+        self.assertEqual(price, Decimal('45.00'))
+        # The failed attempt left no payment or notification behind
+        self.assertEqual(Payment.objects.count(), 1)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_duplicate_past_the_check_is_rejected_by_the_unique_constraint(self):
+        book_court(self.first, self.terrain.id, self.day, time(10), time(11))
+
+        with mock.patch('reservations.booking.is_court_free', return_value=True):
+            with self.assertRaises(BookingError):
+                book_court(self.second, self.terrain.id, self.day, time(10), time(11))
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    @mock.patch('reservations.booking.time_module.sleep')
+    def test_only_lock_contention_is_retried(self, sleep):
+        real_book = booking._book_court_once
+        attempts = [OperationalError('database is locked')]
+
+        def contended(*args):
+            if attempts:
+                raise attempts.pop()
+            return real_book(*args)
+
+        with mock.patch('reservations.booking._book_court_once', side_effect=contended):
+            reservation, _ = book_court(self.first, self.terrain.id, self.day, time(10), time(11))
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(Reservation.objects.get().id, reservation.id)
+
+        with mock.patch('reservations.booking._book_court_once', side_effect=OperationalError('no such table')):
+            with self.assertRaisesMessage(OperationalError, 'no such table'):
+                book_court(self.second, self.terrain.id, self.day, time(12), time(13))
+        self.assertEqual(sleep.call_count, 1)
+
+    @mock.patch('reservations.booking.time_module.sleep')
+    def test_lock_contention_that_persists_is_reported_busy(self, sleep):
+        with mock.patch('reservations.booking._book_court_once', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(BookingError) as caught:
+                book_court(self.first, self.terrain.id, self.day, time(10), time(11))
+        self.assertEqual(caught.exception.status, 503)
+        self.assertEqual(sleep.call_count, BOOKING_MAX_ATTEMPTS - 1)
+
+
+class CoachDashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.coach_user = User.objects.create(username='coach', email='coach@tennis.com', role='coach')
+        self.coach = Coach.objects.get(user=self.coach_user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.coach_user)
+        self.url = reverse('get_coach_dashboard_stats')
+        self.today = timezone.now().date()
+
+    def total_slots(self):
+        return self.client.get(self.url).json()['schedule_stats']['total_slots']
+
+    def test_slot_writes_invalidate_the_cached_dashboard(self):
+        self.assertEqual(self.total_slots(), 0)
+
+        slot = ScheduleSlot.objects.create(coach=self.coach, date=self.today, start_time=time(9), end_time=time(10))
+        self.assertEqual(self.total_slots(), 1)
+
+        slot.delete()
+        self.assertEqual(self.total_slots(), 0)
+
+    def test_totals_with_and_without_sessions(self):
+        self.assertEqual(self.client.get(self.url).json()['stats']['total_reservations'], 0)
+
+        player = User.objects.create(username='player', email='player@tennis.com')
+        for day, hour in ((self.today, 9), (self.today, 10), (self.today + timedelta(days=40), 9)):
+            ReservationCoach.objects.create(
+                user=player, coach=self.coach, date=day, start_time=time(hour), end_time=time(hour + 1),
+                total_price=Decimal('50.00')
+            )
+
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['stats']['total_reservations'], 3)
+        self.assertEqual(data['stats']['today_sessions'], 2)
+        self.assertEqual(data['earnings']['today'], 100.0)
+        self.assertEqual(data['earnings']['total'], 150.0)
+
+    def test_generated_slots_invalidate_the_cached_dashboard(self):
+        self.assertEqual(self.total_slots(), 0)
+        Schedule.objects.create(
+            coach=self.coach, day_of_week=calendar.day_name[self.today.weekday()].lower(),
+            start_time=time(9), end_time=time(10), created_by=self.coach_user
+        )
+
+        generate_schedule_slots_for_coach(self.coach, start_date=self.today, days=0)
+        self.assertEqual(self.total_slots(), 1)
+
+
+class CoachSlotTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', email='admin@tennis.com', role='admin')
+        self.coach = Coach.objects.create(name='Coach', email='coach@tennis.com', price_per_hour=Decimal('50.00'))
+        self.monday = timezone.now().date() + timedelta(days=7 - timezone.now().date().weekday())
+        for day, hour in (('monday', 9), ('monday', 10), ('wednesday', 9)):
+            Schedule.objects.create(
+                coach=self.coach, day_of_week=day, start_time=time(hour), end_time=time(hour + 1),
+                created_by=self.admin
+            )
+
+    def test_generates_missing_slots_once(self):
+        self.assertEqual(generate_schedule_slots_for_coach(self.coach, start_date=self.monday, days=6), 3)
+        self.assertEqual(
+            sorted(ScheduleSlot.objects.values_list('date', 'start_time')),
+            [(self.monday, time(9)), (self.monday, time(10)), (self.monday + timedelta(days=2), time(9))]
+        )
+        self.assertEqual(generate_schedule_slots_for_coach(self.coach, start_date=self.monday, days=6), 0)
+
+    def test_count_excludes_slots_inserted_by_someone_else(self):
+        bulk_create = ScheduleSlot.objects.bulk_create
+
+        def racing_bulk_create(slots, **kwargs):
+            # Another writer adds one of the same slots just before ours go in
+            ScheduleSlot.objects.create(coach=self.coach, date=self.monday, start_time=time(9), end_time=time(10))
+            return bulk_create(slots, **kwargs)
+
+        with mock.patch.object(ScheduleSlot.objects, 'bulk_create', racing_bulk_create):
+            created = generate_schedule_slots_for_coach(self.coach, start_date=self.monday, days=6)
+
+        self.assertEqual(created, 2)
+        self.assertEqual(ScheduleSlot.objects.count(), 3)
+
+    def test_prune_keeps_booked_and_recent_slots(self):
+        player = User.objects.create(username='player', email='player@tennis.com')
+        cutoff = timezone.now().date()
+        for offset in range(1, 6):
+            ScheduleSlot.objects.create(
+                coach=self.coach, date=cutoff - timedelta(days=offset), start_time=time(9), end_time=time(10)
+            )
+        booked = ScheduleSlot.objects.create(
+            coach=self.coach, date=cutoff - timedelta(days=1), start_time=time(11), end_time=time(12),
+            is_booked=True, booked_by=player
+        )
+        recent = ScheduleSlot.objects.create(coach=self.coach, date=cutoff, start_time=time(9), end_time=time(10))
+
+        self.assertEqual(prune_stale_slots(cutoff, batch_size=2), 5)
+        self.assertEqual(set(ScheduleSlot.objects.values_list('id', flat=True)), {booked.id, recent.id})
+
+
+class RollCoachSlotsCommandTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.lock_file = f'{directory}/roll.lock'
+
+    def roll(self, **options):
+        out = StringIO()
+        call_command('roll_coach_slots', lock_file=self.lock_file, stdout=out, **options)
+        return out.getvalue()
+
+    def test_run_releases_its_lock(self):
+        self.assertIn('Coach slots rolled forward', self.roll())
+        self.assertIn('Coach slots rolled forward', self.roll())
+
+    def test_overlapping_run_is_skipped(self):
+        command = RollCoachSlotsCommand()
+        with command.lock(self.lock_file) as acquired:
+            self.assertTrue(acquired)
+            self.assertIn('skipping', self.roll())
+        self.assertIn('Coach slots rolled forward', self.roll())
+
+    def test_lock_file_left_by_a_crashed_run_does_not_block(self):
+        with open(self.lock_file, 'w') as f:
+            f.write('12345')
+
+        self.assertIn('Coach slots rolled forward', self.roll())
+
+
+@override_settings(STREAM_CHUNK_SIZE=2)
+class StreamedListingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create(username='admin', email='admin@tennis.com', role='admin')
+        self.client.force_authenticate(self.admin)
+        terrain = Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+        for hour in (9, 10, 11):
+            Reservation.objects.create(
+                user=self.admin, terrain=terrain, date=timezone.now().date(), start_time=time(hour),
+                end_time=time(hour + 1)
+            )
+
+    def streamed(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_streamed_reservations_match_the_regular_listing(self):
+        url = reverse('court_reservations')
+        regular = self.client.get(url).json()
+
+        self.assertEqual(json.loads(self.streamed(url, stream='json')), regular)
+        lines = self.streamed(url, stream='ndjson').splitlines()
+        self.assertEqual([json.loads(line) for line in lines], regular['reservations'])
+
+    def test_streamed_users_honour_fields(self):
+        User.objects.create(username='player', email='player@tennis.com')
+
+        rows = json.loads(self.streamed(reverse('user_list'), stream='json', fields='id,username'))
+        self.assertEqual(rows, [{'id': self.admin.id, 'username': 'admin'}, {'id': rows[1]['id'], 'username': 'player'}])
+
+    def test_unknown_stream_mode_is_a_bad_request(self):
+        for name in ('court_reservations', 'user_list'):
+            response = self.client.get(reverse(name), {'stream': 'xml'})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('stream must be one of', response.json()['error'])
+
+
+class PaymentExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create(username='admin', email='admin@tennis.com', role='admin')
+        self.client.force_authenticate(self.admin)
+        self.player = User.objects.create(username='=HYPERLINK("http://x")', email='player@tennis.com')
+
+    def export(self):
+        response = self.client.get(reverse('export_payments'))
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        return list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+
+    def test_formula_cells_are_escaped(self):
+        for description in ('=1+1', '+SUM(A1)', '-2+3', '@cmd', '\tTAB', 'Court booking'):
+            Payment.objects.create(
+                user=self.player, payment_type='court_reservation', amount=Decimal('30.00'), status='completed',
+                transaction_id=f'TX{len(description)}{description[0]}', description=description
+            )
+
+        header, *rows = self.export()
+        columns = {name: i for i, name in enumerate(header)}
+        self.assertEqual(
+            [row[columns['description']] for row in rows],
+            ["'=1+1", "'+SUM(A1)", "'-2+3", "'@cmd", "'\tTAB", 'Court booking']
+        )
+        self.assertEqual({row[columns['username']] for row in rows}, {'\'=HYPERLINK("http://x")'})
+        self.assertEqual({row[columns['amount']] for row in rows}, {'30.00'})
+
+    def test_negative_amounts_stay_numbers(self):
+        Payment.objects.create(
+            user=self.player, payment_type='court_reservation', amount=Decimal('-30.00'), status='refunded',
+            transaction_id='REFUND1', description='Refund'
+        )
+
+        header, row = self.export()
+        self.assertEqual(row[header.index('amount')], '-30.00')
+
+
+class ReservationPriceTests(TestCase):
+    def setUp(self):
+        self.player = User.objects.create(username='player', email='player@tennis.com')
+        self.terrain = Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+        self.day = timezone.now().date() + timedelta(days=1)
+
+    def book(self, start, end, **fields):
+        return Reservation.objects.create(
+            user=self.player, terrain=self.terrain, date=self.day, start_time=start, end_time=end, **fields
+        )
+
+    def test_save_prices_new_bookings_only(self):
+        self.assertEqual(self.book(time(9), time(10, 30)).price, Decimal('45.00'))
+        # Under an hour is charged as one
+        self.assertEqual(self.book(time(11), time(11, 30)).price, Decimal('30.00'))
+        self.assertEqual(self.book(time(12), time(13), price=Decimal('12.50')).price, Decimal('12.50'))
+
+        reservation = self.book(time(14), time(15))
+        self.terrain.price_per_hour = Decimal('40.00')
+        self.terrain.save()
+        reservation.save()
+        self.assertEqual(Reservation.objects.get(id=reservation.id).price, Decimal('30.00'))
+
+    def test_reschedule_keeps_the_booked_rate_on_the_same_court(self):
+        reservation = self.book(time(9), time(10))
+        Terrain.objects.filter(id=self.terrain.id).update(price_per_hour=Decimal('40.00'))
+
+        client = APIClient()
+        client.force_authenticate(self.player)
+        response = client.put(
+            reverse('update_court_reservation', args=[reservation.id]),
+            {'date': self.day.strftime('%Y-%m-%d'), 'start_time': '09:00', 'end_time': '11:00'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['reservation']['price'], 60.0)
+        self.assertEqual(Reservation.objects.get(id=reservation.id).price, Decimal('60.00'))
+
+    def test_reschedule_to_another_court_uses_its_rate(self):
+        reservation = self.book(time(9), time(10))
+        other = Terrain.objects.create(name='Court 2', location='South', price_per_hour=Decimal('50.00'))
+
+        reservation.reschedule(other, self.day, '09:00', '10:30')
+        self.assertEqual(reservation.price, Decimal('75.00'))
+
+    def test_backfill_prices_existing_rows(self):
+        booked = [self.book(time(9), time(10, 30)), self.book(time(11), time(11, 15))]
+        Reservation.objects.update(price=None)
+
+        migration = importlib.import_module('reservations.migrations.0003_reservation_price')
+        migration.backfill_prices(apps, None)
+
+        self.assertEqual(
+            [Reservation.objects.get(id=reservation.id).price for reservation in booked],
+            [Decimal('45.00'), Decimal('30.00')]
+        )
+
+
+class PlayerTimelineTests(TestCase):
+    def setUp(self):
+        self.player = User.objects.create(username='player', email='player@tennis.com')
+        other = User.objects.create(username='other', email='other@tennis.com')
+        terrain = Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+        coach = Coach.objects.create(name='Coach', email='coach@tennis.com', price_per_hour=Decimal('50.00'))
+        self.day = timezone.now().date()
+
+        def court(user, offset, hour):
+            return Reservation.objects.create(
+                user=user, terrain=terrain, date=self.day + timedelta(days=offset), start_time=time(hour),
+                end_time=time(hour + 1)
+            )
+
+        def lesson(user, offset, hour):
+            return ReservationCoach.objects.create(
+                user=user, coach=coach, date=self.day + timedelta(days=offset), start_time=time(hour),
+                end_time=time(hour + 1)
+            )
+
+        # Same day and hour on both sides, so kind and id break the tie
+        self.expected = [
+            ('coach', lesson(self.player, -1, 9).id), ('court', court(self.player, -1, 9).id),
+            ('court', court(self.player, 0, 8).id), ('coach', lesson(self.player, 0, 10).id),
+            ('coach', lesson(self.player, 2, 9).id), ('court', court(self.player, 2, 11).id),
+        ]
+        court(other, 0, 12)
+        lesson(other, 0, 12)
+
+    def keys(self, rows):
+        return [(row['kind'], row['id']) for row in rows]
+
+    def walk(self, limit, **kwargs):
+        entries, cursor = [], None
+        while True:
+            rows, position = player_timeline(self.player, limit=limit, position=decode_cursor(cursor), **kwargs)
+            entries.extend(self.keys(rows))
+            if position is None:
+                return entries
+            cursor = encode_cursor(position)
+
+    def test_both_kinds_merge_in_date_and_time_order(self):
+        rows, position = player_timeline(self.player)
+
+        self.assertIsNone(position)
+        self.assertEqual(self.keys(rows), self.expected)
+        self.assertEqual(self.keys(player_timeline(self.player, descending=True)[0]), self.expected[::-1])
+
+    def test_date_window_applies_to_both_kinds(self):
+        rows, _ = player_timeline(self.player, start_date=self.day, end_date=self.day)
+
+        self.assertEqual(self.keys(rows), self.expected[2:4])
+
+    def test_position_cursor_resumes_across_kinds(self):
+        for limit in (1, 2, 4, 6, 10):
+            self.assertEqual(self.walk(limit), self.expected)
+            self.assertEqual(self.walk(limit, descending=True), self.expected[::-1])
+        self.assertEqual(self.walk(1, start_date=self.day), self.expected[2:])
+
+    def test_endpoint_pages_match_the_full_listing(self):
+        client = APIClient()
+        client.force_authenticate(self.player)
+        url = reverse('player_reservations')
+
+        def ids(data):
+            return [(row['type'], row['id']) for row in data['upcoming_reservations'] + data['past_reservations']]
+
+        full = ids(client.get(url).json())
+        paged, cursor = [], None
+        while True:
+            data = client.get(url, {'limit': 4, **({'cursor': cursor} if cursor else {})}).json()
+            paged.extend(ids(data))
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(full, self.expected[::-1])
+        self.assertEqual(sorted(paged), sorted(full))
+        self.assertEqual(client.get(url, {'cursor': encode_cursor([1, 2])}).status_code, 400)
+
+
+class DailyStatsTests(TestCase):
+    def setUp(self):
+        self.player = User.objects.create(username='player', email='player@tennis.com')
+        self.terrain = Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+        self.coach = Coach.objects.create(name='Coach', email='coach@tennis.com', price_per_hour=Decimal('50.00'))
+        self.day = timezone.now().date()
+
+    def book(self, hour, day=None):
+        return Reservation.objects.create(
+            user=self.player, terrain=self.terrain, date=day or self.day, start_time=time(hour),
+            end_time=time(hour + 1)
+        )
+
+    def court_stats(self):
+        return list(DailyCourtStats.objects.order_by('date').values_list('date', 'bookings', 'booked_minutes', 'revenue'))
+
+    def test_bookings_moves_and_cancellations_update_the_day(self):
+        first, second = self.book(9), self.book(10)
+        self.assertEqual(self.court_stats(), [(self.day, 2, 120, Decimal('60.00'))])
+
+        tomorrow = self.day + timedelta(days=1)
+        second.date = tomorrow
+        second.save()
+        self.assertEqual(self.court_stats(), [(self.day, 1, 60, Decimal('30.00')), (tomorrow, 1, 60, Decimal('30.00'))])
+
+        first.delete()
+        second.delete()
+        self.assertEqual(self.court_stats(), [])
+
+    def test_coach_sessions_use_their_own_count_column(self):
+        session = ReservationCoach.objects.create(
+            user=self.player, coach=self.coach, date=self.day, start_time=time(9), end_time=time(10, 30)
+        )
+        self.assertEqual(
+            list(DailyCoachStats.objects.values_list('sessions', 'booked_minutes', 'revenue')),
+            [(1, 90, Decimal('75.00'))]
+        )
+
+        session.delete()
+        self.assertFalse(DailyCoachStats.objects.exists())
+
+    def test_cancelling_without_a_stats_row_writes_no_negative_row(self):
+        reservation = self.book(9)
+        DailyCourtStats.objects.all().delete()
+
+        reservation.delete()
+        self.assertEqual(self.court_stats(), [])
+
+        # Moving it elsewhere only adds the new day
+        reservation = self.book(11)
+        DailyCourtStats.objects.all().delete()
+        reservation.date = self.day + timedelta(days=1)
+        reservation.save()
+        self.assertEqual(self.court_stats(), [(self.day + timedelta(days=1), 1, 60, Decimal('30.00'))])
+
+    def test_incremental_rows_match_a_rebuild(self):
+        for hour in (9, 10, 12):
+            self.book(hour)
+        self.book(9, day=self.day + timedelta(days=2)).delete()
+        incremental = self.court_stats()
+
+        rebuild_daily_stats()
+        self.assertEqual(self.court_stats(), incremental)
+
+    def test_booking_ending_at_midnight_counts_to_the_end_of_the_day(self):
+        Reservation.objects.create(
+            user=self.player, terrain=self.terrain, date=self.day, start_time=time(22), end_time=time(0)
+        )
+        self.assertEqual(DailyCourtStats.objects.get().booked_minutes, 120)
+
+        rebuild_daily_stats()
+        self.assertEqual(DailyCourtStats.objects.get().booked_minutes, 120)
+
+
+class RollupSignalTests(TestCase):
+    def setUp(self):
+        self.player = User.objects.create(username='player', email='player@tennis.com')
+        self.terrain = Terrain.objects.create(name='Court 1', location='North', price_per_hour=Decimal('30.00'))
+        reconcile_rollups()
+
+    def counters(self):
+        return dict(DashboardCounter.objects.values_list('key', 'value'))
+
+    def pay(self, amount, status='completed'):
+        return Payment.objects.create(
+            user=self.player, payment_type='reservation', amount=Decimal(amount), status=status,
+            transaction_id=f'TX{Payment.objects.count()}', description='Court'
+        )
+
+    def test_counters_move_after_commit(self):
+        before = self.counters()
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = self.pay('30.00')
+            # Not written while the booking transaction is open
+            self.assertEqual(self.counters(), before)
+
+        counters = self.counters()
+        self.assertEqual(counters['payments:amount'], Decimal('30.00'))
+        self.assertEqual(counters['payments:amount:status:completed'], Decimal('30.00'))
+        self.assertEqual(counters[payment_month_key(payment.payment_date)], Decimal('30.00'))
+
+    def test_failed_write_surfaces_its_own_error(self):
+        with self.assertLogs(level='ERROR'):
+            with self.assertRaisesMessage(DatabaseError, 'disk I/O error'), self.captureOnCommitCallbacks(execute=True):
+                # No savepoint, so the failure dooms the test's transaction and
+                # the queued counter write can no longer run
+                with transaction.atomic(savepoint=False):
+                    self.pay('30.00')
+                    raise DatabaseError('disk I/O error')
+
+    def test_failing_counter_write_is_logged(self):
+        with mock.patch('reservations.rollups._write_deltas', side_effect=DatabaseError('locked')), \
+                self.assertLogs(level='ERROR') as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.pay('30.00')
+
+        self.assertIn('locked', '\n'.join(logs.output))
+
+    def test_rolled_back_writes_leave_counters_alone(self):
+        before = self.counters()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.pay('30.00')
+                raise RuntimeError
+        self.assertEqual(self.counters(), before)
+
+    def test_update_moves_between_keys(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = self.pay('30.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.get(id=payment.id)
+            payment.status = 'refunded'
+            payment.save()
+
+        counters = self.counters()
+        self.assertEqual(counters['payments:amount:status:completed'], 0)
+        self.assertEqual(counters['payments:amount:status:refunded'], Decimal('30.00'))
+        self.assertEqual(reconcile_rollups(), {})
+
+    def test_loading_and_unrelated_saves_cost_no_extra_query(self):
+        self.assertFalse(post_init.has_listeners(User))
+        self.assertFalse(post_init.has_listeners(Reservation))
+
+        user = User.objects.get(id=self.player.id)
+        with self.assertNumQueries(1):
+            user.last_login = timezone.now()
+            user.save(update_fields=['last_login'])
+
+    def test_direct_delete_applies_its_delta(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = Reservation.objects.create(
+                user=self.player, terrain=self.terrain, date=timezone.now().date(), start_time=time(9),
+                end_time=time(10)
+            )
+        self.assertEqual(self.counters()['reservations'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.delete()
+        self.assertEqual(self.counters()['reservations'], 0)
+        self.assertFalse(DailyCourtStats.objects.exists())
+
+    def test_deleting_a_user_cascades_in_bulk_and_recounts(self):
+        coach = Coach.objects.create(name='Coach', email='coach@tennis.com', price_per_hour=Decimal('50.00'))
+        today = timezone.now().date()
+        with self.captureOnCommitCallbacks(execute=True):
+            for hour in (9, 10):
+                Reservation.objects.create(
+                    user=self.player, terrain=self.terrain, date=today, start_time=time(hour), end_time=time(hour + 1)
+                )
+            ReservationCoach.objects.create(
+                user=self.player, coach=coach, date=today, start_time=time(9), end_time=time(10)
+            )
+            self.pay('30.00')
+
+        for model in (Reservation, ReservationCoach, Payment, EquipmentOrder, TournamentRegistration, ScheduleSlot):
+            self.assertTrue(Collector('default').can_fast_delete(model.objects.all()), model.__name__)
+
+        grid_version = terrain_booking_versions([self.terrain.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.player.delete()
+
+        self.assertNotEqual(terrain_booking_versions([self.terrain.id]), grid_version)
+        self.assertFalse(DailyCourtStats.objects.exists())
+        self.assertFalse(DailyCoachStats.objects.exists())
+        rollups = get_rollups()
+        self.assertEqual({key: rollups[key] for key in compute_rollups()}, compute_rollups())
+        self.assertEqual(rollups['reservations'], 0)
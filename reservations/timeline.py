@@ -0,0 +1,75 @@
+from django.db.models import CharField, F, Value
+
+from core.pagination import after_position, fetch_page
+
+from .models import Reservation, ReservationCoach
+
+TIMELINE_FIELDS = ('id', 'date', 'start_time', 'end_time', 'kind', 'name', 'location', 'email', 'amount')
+TIMELINE_ORDERING = ('date', 'start_time', 'kind', 'id')
+
+
+def _court_entries(user):
+    return Reservation.objects.filter(user=user).annotate(
+        kind=Value('court', output_field=CharField()),
+        name=F('terrain__name'),
+        location=F('terrain__location'),
+        email=Value(None, output_field=CharField()),
+        amount=F('price'),
+    )
+
+
+def _coach_entries(user):
+    return ReservationCoach.objects.filter(user=user).annotate(
+        kind=Value('coach', output_field=CharField()),
+        name=F('coach__name'),
+        location=Value(None, output_field=CharField()),
+        email=F('coach__email'),
+        amount=F('total_price'),
+    )
+
+
+def timeline_query(user, ordering, start_date=None, end_date=None, position=None):
+    """The UNION ALL of a player's court and coach bookings behind player_timeline"""
+    branches = []
+    for entries in (_court_entries(user), _coach_entries(user)):
+        if start_date:
+            entries = entries.filter(date__gte=start_date)
+        if end_date:
+            entries = entries.filter(date__lte=end_date)
+        if position is not None:
+            entries = after_position(entries, ordering, position)
+        branches.append(entries.values(*TIMELINE_FIELDS))
+    return branches[0].union(branches[1], all=True).order_by(*ordering)
+
+
+def player_timeline(user, start_date=None, end_date=None, descending=False, limit=None, position=None):
+    """A player's court and coach bookings as one list ordered by (date, start_time).
+
+    Both tables are read in a single UNION ALL query; the date window and the
+    keyset position are applied to each branch, so each side can use its
+    (user, date, start_time) index. Returns (rows, next_position), where
+    next_position is None once the last row has been returned.
+    """
+    ordering = tuple(f'-{field}' for field in TIMELINE_ORDERING) if descending else TIMELINE_ORDERING
+
+    timeline = timeline_query(user, ordering, start_date, end_date, position)
+    if limit is None:
+        return list(timeline), None
+
+    return fetch_page(timeline, ordering, limit, position)
+
+
+def timeline_entry(row):
+    """Fields both player endpoints share, in their existing JSON shape"""
+    entry = {'id': row['id'], 'type': row['kind']}
+    if row['kind'] == 'court':
+        entry.update(court_name=row['name'], location=row['location'])
+    else:
+        entry.update(coach_name=row['name'], coach_email=row['email'])
+    entry.update(
+        date=row['date'].strftime('%Y-%m-%d'),
+        start_time=row['start_time'].strftime('%H:%M'),
+        end_time=row['end_time'].strftime('%H:%M'),
+        price=float(row['amount'] or 0),
+    )
+    return entry
@@ -15,13 +15,14 @@ from reservations.api_views import (
     equipment_list, order_equipment, user_orders, tournament_list, register_tournament,
     dashboard_stats, user_list, update_user_role, delete_user, user_notifications,
     mark_notification_read, coach_schedule, delete_schedule, user_payments,
-    create_payment, add_equipment, equipment_detail, admin_coach_schedule_management,
+    create_payment, export_payments, add_equipment, equipment_detail, admin_coach_schedule_management,
     coach_availability, book_coach_slot, book_coach_session, user_subscriptions, cancel_subscription,
     subscription_plans, player_reservations, player_upcoming_reservations, coaches_list,
     update_court_reservation, cancel_coach_reservation, update_coach_reservation,
     update_coach, get_coach_details, create_coach_schedule, get_coach_schedule, delete_schedule_slot,
     get_recent_activities, get_todays_coach_schedules, get_user_weekly_spending,
-    get_coach_reservations, get_coach_dashboard_stats
+    get_coach_reservations, get_coach_dashboard_stats, court_stats, coach_stats,
+    cache_stats, availability_grid_view, perf_report, player_dashboard
 )
 from core.views import RegisterView
 
@@ -64,6 +65,7 @@ urlpatterns = [
     path('api/terrains/', terrain_management, name='terrain_management'),
     path('api/terrains/<int:terrain_id>/', terrain_detail, name='terrain_detail'),
     path('api/court-reservations/', court_reservations, name='court_reservations'),
+    path('api/availability-grid/', availability_grid_view, name='availability_grid'),
     path('api/reservations/<int:reservation_id>/cancel/', cancel_reservation, name='cancel_reservation'),
     path('api/court-reservations/<int:reservation_id>/update/', update_court_reservation, name='update_court_reservation'),
 
@@ -84,6 +86,7 @@ urlpatterns = [
     path('api/admin/recent-activities/', get_recent_activities, name='get_recent_activities'),
 
     # Player dashboard
+    path('api/player/dashboard/', player_dashboard, name='player_dashboard'),
     path('api/player/todays-coach-schedules/', get_todays_coach_schedules, name='get_todays_coach_schedules'),
     path('api/player/weekly-spending/', get_user_weekly_spending, name='get_user_weekly_spending'),
 
@@ -101,6 +104,10 @@ urlpatterns = [
     path('api/tournaments/<int:tournament_id>/register/', register_tournament, name='register_tournament'),
 
     path('api/dashboard/stats/', dashboard_stats, name='dashboard_stats'),
+    path('api/admin/stats/courts/', court_stats, name='court_stats'),
+    path('api/admin/stats/coaches/', coach_stats, name='coach_stats'),
+    path('api/admin/cache-stats/', cache_stats, name='cache_stats'),
+    path('api/admin/perf/', perf_report, name='perf_report'),
     path('api/users/', user_list, name='user_list'),
     path('api/users/<int:user_id>/role/', update_user_role, name='update_user_role'),
     path('api/users/<int:user_id>/delete/', delete_user, name='delete_user'),
@@ -124,6 +131,7 @@ urlpatterns = [
 
     path('api/payments/', user_payments, name='user_payments'),
     path('api/payments/create/', create_payment, name='create_payment'),
+    path('api/admin/payments/export/', export_payments, name='export_payments'),
 
     # Subscription endpoints
     path('api/subscriptions/', user_subscriptions, name='user_subscriptions'),
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta,time
 from decimal import Decimal
+from django.conf import settings
 from django.shortcuts import get_object_or_404, render
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
@@ -8,11 +9,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from reservations.models import Reservation, ReservationCoach, Terrain,Coach,Schedule, ScheduleSlot
+from reservations.availability import is_court_free
+from reservations.caching import cached_endpoint
 from core.models import User
+from core.streaming import get_stream_mode, streaming_response
 from reservations import views
 #from rest_framework.response import Response
 #from rest_framework.decorators import api_view
 @csrf_exempt
+@cached_endpoint('terrains')
 def list_terrains(request):
     terrains = Terrain.objects.all().values('id', 'name', 'location', 'price_per_hour', 'available')
     return JsonResponse(list(terrains), safe=False)
@@ -124,6 +129,16 @@ def make_reservation(request):
 
     user = request.user if request.user.is_authenticated else None
 
+    try:
+        reservation_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+        requested_start = datetime.strptime(start_time, '%H:%M').time()
+        requested_end = datetime.strptime(end_time, '%H:%M').time()
+    except ValueError as e:
+        return JsonResponse({'error': f'Invalid date/time format: {str(e)}'}, status=400)
+
+    if not is_court_free(terrain, reservation_date, requested_start, requested_end):
+        return JsonResponse({'error': 'Time slot is already booked.'}, status=400)
+
     reservation = Reservation.objects.create(
         user=user,
         terrain=terrain,
@@ -170,10 +185,18 @@ def update_reservation(request, reservation_id):
     except Terrain.DoesNotExist:
         return JsonResponse({'error': 'Terrain not found.'}, status=404)
 
-    reservation.terrain = terrain
-    reservation.date = data['date']
-    reservation.start_time = data['start_time']
-    reservation.end_time = data['end_time']
+    try:
+        reservation_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+        requested_start = datetime.strptime(data['start_time'], '%H:%M').time()
+        requested_end = datetime.strptime(data['end_time'], '%H:%M').time()
+    except ValueError as e:
+        return JsonResponse({'error': f'Invalid date/time format: {str(e)}'}, status=400)
+
+    if not is_court_free(terrain, reservation_date, requested_start, requested_end,
+                         exclude_id=reservation.id):
+        return JsonResponse({'error': 'Time slot is already booked.'}, status=400)
+
+    reservation.reschedule(terrain, data['date'], data['start_time'], data['end_time'])
     reservation.save()
 
     return JsonResponse({'message': 'Reservation updated successfully'})
@@ -625,7 +648,8 @@ def reservation(request):
 # ==================== NEW API ENDPOINTS ====================
 
 from .models import Equipment, EquipmentOrder, Tournament, TournamentRegistration, Notification, Payment
-from django.db import models
+from .rollups import get_rollups, payment_month_key
+from django.utils import timezone
 
 @api_view(['GET', 'POST', 'PUT', 'DELETE'])
 @authentication_classes([JWTAuthentication])
@@ -696,24 +720,36 @@ def terrain_detail(request, terrain_id):
 def court_reservations(request):
     """Court reservations management"""
     if request.method == 'GET':
+        try:
+            stream = get_stream_mode(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
         if request.user.role == 'admin':
             reservations = Reservation.objects.all()
         else:
             reservations = Reservation.objects.filter(user=request.user)
 
-        reservation_list = []
-        for reservation in reservations:
-            reservation_list.append({
-                'id': reservation.id,
-                'user': reservation.user.username,
-                'terrain': reservation.terrain.name,
-                'terrain_name': reservation.terrain.name,
-                'date': reservation.date,
-                'start_time': reservation.start_time,
-                'end_time': reservation.end_time,
-            })
+        # Flat rows straight from the cursor; nothing is held beyond one chunk
+        rows = reservations.order_by('id').values_list(
+            'id', 'user__username', 'terrain__name', 'date', 'start_time', 'end_time'
+        ).iterator(chunk_size=settings.STREAM_CHUNK_SIZE)
+        reservation_list = (
+            {
+                'id': reservation_id,
+                'user': username,
+                'terrain': terrain_name,
+                'terrain_name': terrain_name,
+                'date': reservation_date,
+                'start_time': start_time,
+                'end_time': end_time,
+            }
+            for reservation_id, username, terrain_name, reservation_date, start_time, end_time in rows
+        )
 
-        return Response({'reservations': reservation_list})
+        if stream:
+            return streaming_response(reservation_list, stream, key='reservations')
+        return Response({'reservations': list(reservation_list)})
 
     elif request.method == 'POST':
         data = request.data
@@ -905,46 +941,40 @@ def register_tournament(request, tournament_id):
 def dashboard_stats(request):
     """Get comprehensive dashboard statistics"""
     try:
-        # Get counts for different models
-        total_users = User.objects.count()
-        total_terrains = Terrain.objects.count()
-        total_coaches = Coach.objects.count()
-        total_reservations = Reservation.objects.count()
-        total_equipment = Equipment.objects.count()
-        total_tournaments = Tournament.objects.count()
+        # Overall figures come from the precomputed counters
+        rollups = get_rollups()
+        count = lambda key: int(rollups.get(key, 0))
+
+        total_users = count('users')
+        total_terrains = count('terrains')
+        total_coaches = count('coaches')
+        total_reservations = count('reservations')
+        total_equipment = count('equipment')
+        total_tournaments = count('tournaments')
 
         # User role distribution
-        admin_count = User.objects.filter(role='admin').count()
-        coach_count = User.objects.filter(role='coach').count()
-        player_count = User.objects.filter(role='joueur').count()
-        subscriber_count = User.objects.filter(role='abonnée').count()
+        admin_count = count('users:role:admin')
+        coach_count = count('users:role:coach')
+        player_count = count('users:role:joueur')
+        subscriber_count = count('users:role:abonnée')
 
         # Equipment orders
-        total_equipment_orders = EquipmentOrder.objects.count()
-        pending_orders = EquipmentOrder.objects.filter(status='pending').count()
+        total_equipment_orders = count('equipment_orders')
+        pending_orders = count('equipment_orders:status:pending')
 
         # Tournament registrations
-        total_tournament_registrations = TournamentRegistration.objects.count()
-
-        # Calculate total revenue from payments
-        total_revenue = Payment.objects.aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
+        total_tournament_registrations = count('tournament_registrations')
 
-        # Monthly revenue (current month)
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-        monthly_revenue = Payment.objects.filter(
-            payment_date__month=current_month,
-            payment_date__year=current_year
-        ).aggregate(total=models.Sum('amount'))['total'] or 0
+        # Revenue from payments, overall and for the current month
+        total_revenue = rollups.get('payments:amount', 0)
+        monthly_revenue = rollups.get(payment_month_key(timezone.now()), 0)
 
         # User-specific stats (if not admin)
         user_stats = {}
         if request.user.role != 'admin':
             user_reservations = Reservation.objects.filter(user=request.user).count()
             user_equipment_orders = EquipmentOrder.objects.filter(user=request.user).count()
-            user_tournament_registrations = TournamentRegistration.objects.filter(user=request.user).count()
+            user_tournament_registrations = TournamentRegistration.objects.filter(player=request.user).count()
 
             user_stats = {
                 'court_reservations': user_reservations,
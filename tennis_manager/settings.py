@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.perf.PerfBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -108,6 +109,33 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts so concurrent
+            # bookings queue up instead of failing on lock upgrade
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    }
+}
+
+# Cache backend: 'locmem' (per process, the default) or 'file' (shared by
+# every worker on the host, under CACHE_LOCATION). Cached responses are keyed
+# by versions kept in the database, so either is safe with several workers
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION',
+            os.path.join(BASE_DIR, 'django_cache') if CACHE_BACKEND == 'file' else 'tennis-manager'
+        ),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
     }
 }
 
@@ -137,6 +165,77 @@ AUTH_USER_MODEL = 'core.User'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Keyset pagination for listing endpoints (?limit=&cursor=)
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+
+# Rows fetched per database round trip when streaming a listing (?stream=json|ndjson)
+STREAM_CHUNK_SIZE = 2000
+
+# Coach schedule slots are materialized this many days ahead, and unbooked
+# slots older than the retention window are pruned by roll_coach_slots
+COACH_SLOT_HORIZON_DAYS = 30
+COACH_SLOT_RETENTION_DAYS = 7
+
+# Seconds the admin dashboard counters stay cached; writes invalidate them sooner
+DASHBOARD_ROLLUP_CACHE_TTL = 300
+
+# Court opening hours, the denominator of court utilization in the daily stats
+COURT_OPENING_HOUR = 8
+COURT_CLOSING_HOUR = 22
+
+# Longest date range the daily stats endpoints accept
+STATS_MAX_RANGE_DAYS = 366
+
+# Availability grid: slot size in minutes, longest range in days, and
+# day bitmaps each process keeps in memory
+AVAILABILITY_GRID_SLOT_MINUTES = 15
+AVAILABILITY_GRID_MAX_DAYS = 31
+AVAILABILITY_GRID_CACHE_SIZE = 20000
+
+# Per-request query count, database time and wall time, reported at
+# /res/api/admin/perf/; requests over budget are logged as warnings.
+# PERF_ENDPOINT_BUDGETS overrides the budget by URL name (None = no limit)
+PERF_MONITORING = True
+PERF_BUDGET = {'queries': 20, 'db_ms': 250, 'wall_ms': 1000}
+PERF_ENDPOINT_BUDGETS = {
+    'export_payments': {'wall_ms': None},
+}
+
+# Threads the player dashboard reads its sections on; they outlive requests
+# and keep their database connections per CONN_MAX_AGE
+DASHBOARD_SECTION_WORKERS = 4
+
+# Seconds a coach's dashboard stats stay cached (0 disables the cache)
+COACH_DASHBOARD_CACHE_TTL = 30
+
+# Seconds each cached read endpoint is served from the cache (0 disables it);
+# writes to the models behind an endpoint invalidate it sooner
+ENDPOINT_CACHE_TTLS = {
+    'terrains': 300,
+    'equipment': 120,
+    'coaches': 300,
+    'tournaments': 120,
+    'subscription_plans': 3600,
+}
+
+# Face encodings matrix used for 1:N face identification (kept out of MEDIA_ROOT)
+FACE_INDEX_DIR = os.path.join(BASE_DIR, 'face_index')
+# Roles allowed to identify a member from a face alone (front desk staff, or
+# a kiosk signed in as one); identification names the member, it never logs in
+FACE_IDENTIFY_ROLES = ('admin', 'coach')
+
+# Face encoding process pool: worker count, max queued + running jobs before
+# answering 503, and seconds to wait for one encoding
+FACE_ENCODING_WORKERS = int(os.environ.get('FACE_ENCODING_WORKERS', os.cpu_count() or 1))
+FACE_ENCODING_MAX_PENDING = int(os.environ.get('FACE_ENCODING_MAX_PENDING', 32))
+FACE_ENCODING_TIMEOUT = 10
+# Uploads are downscaled so their longest side is at most this many pixels
+FACE_IMAGE_MAX_SIDE = 1024
+# Face upload requests above this many bytes are refused before the body is
+# parsed; at or below FILE_UPLOAD_MAX_MEMORY_SIZE the image stays in memory
+FACE_IMAGE_MAX_BYTES = 2 * 1024 * 1024
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 